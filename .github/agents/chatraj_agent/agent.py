@@ -1,219 +1,883 @@
 import os
+import base64
 import subprocess
 import sys
 import json
+import hashlib
+import shlex
+import threading
+import time
+import traceback
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import Optional
 from typing import Dict
+from typing import Union
+
+from . import tracing
+from .daemon import environ
+
+# Files up to this size are sent inline as `content` in the tree payload
+# instead of being uploaded as separate blobs.
+INLINE_BLOB_LIMIT = 32 * 1024
+BLOB_UPLOAD_WORKERS = 8
+# Commands whose own runs are not added to the perf-history ledger
+UNRECORDED_COMMANDS = {"perf-history", "perf-compare"}
+# Commands always run in this process rather than handed to a `serve` daemon
+LOCAL_COMMANDS = {"serve", "fanout"}
+
+
+def git_blob_sha(data: bytes) -> str:
+    """Return the SHA-1 git assigns to a blob with the given content."""
+    h = hashlib.sha1(b"blob %d\0" % len(data))
+    h.update(data)
+    return h.hexdigest()
 
 
 class ChatrajAgent:
     """Lightweight Python agent to perform common project operations."""
 
-    def __init__(self, repo_root: Optional[str] = None):
+    def __init__(self, repo_root: Optional[str] = None, api_url: Optional[str] = None,
+                 github_repo: Optional[str] = None, scheduler=None):
         self.repo_root = repo_root or os.path.abspath(os.getcwd())
+        self.api_url = (api_url or os.environ.get(
+            "GITHUB_API_URL", "https://api.github.com")).rstrip("/")
+        # owner/name to use instead of the one inferred from the `origin` remote
+        self.github_repo = github_repo
+        # RequestScheduler shared with other agents on the same host (see fanout)
+        self.scheduler = scheduler
+        self._github = None
+        self._mongo = {}
+        self._repo_cache = None
+        self._lock = threading.Lock()
+
+    def run_command(self, command, cwd: Optional[str] = None, check: bool = True, env: Optional[dict] = None):
+        """Run `command` (a string is split shell-style, never run through a shell).
+
+        `env` adds variables to the request's environment (see `daemon.environ`) for the child.
+        """
+        from .suites import resolve_executable
 
-    def run_command(self, command: str, cwd: Optional[str] = None, check: bool = True):
         cwd = cwd or self.repo_root
-        print(f"Running: {command} (cwd={cwd})")
-        result = subprocess.run(command, shell=False, cwd=cwd)
-        if check and result.returncode != 0:
+        argv = shlex.split(command, posix=os.name != "nt") if isinstance(
+            command, str) else list(command)
+        child_env = {**environ(), **(env or {})}
+        print(f"Running: {' '.join(argv)} (cwd={cwd})")
+        started = time.perf_counter()
+        with tracing.span("agent.run_command", argv=" ".join(argv)) as attrs:
+            if getattr(sys.stdout, "captures_subprocesses", False):
+                # stdout is routed to a daemon client: relay the child's output through it
+                proc = subprocess.Popen(resolve_executable(argv), shell=False, cwd=cwd, stdout=subprocess.PIPE,
+                                        stderr=subprocess.STDOUT, text=True, errors="replace", env=child_env)
+                for line in proc.stdout:
+                    sys.stdout.write(line)
+                returncode = proc.wait()
+            else:
+                returncode = subprocess.run(resolve_executable(argv), shell=False, cwd=cwd, env=child_env).returncode
+            attrs["returncode"] = returncode
+        print(f"Finished in {time.perf_counter() - started:.2f}s "
+              f"(exit {returncode}): {' '.join(argv)}")
+        if check and returncode != 0:
             raise RuntimeError(
-                f"Command failed ({result.returncode}): {command}")
-        return result.returncode
-
-    def scan_repo(self):
-        summary = {"files": 0, "dirs": 0}
-        for root, dirs, files in os.walk(self.repo_root):
-            summary["dirs"] += len(dirs)
-            summary["files"] += len(files)
+                f"Command failed ({returncode}): {command}")
+        return returncode
+
+    def npm_cache(self, max_bytes: Optional[int] = None):
+        """The node_modules snapshot cache (CHATRAJ_NPM_CACHE, default `.chatraj-agent/npm-cache`)."""
+        from .npm_cache import DEFAULT_MAX_BYTES, NodeModulesCache
+        from .scanner import state_path
+
+        root = environ().get("CHATRAJ_NPM_CACHE") or state_path(self.repo_root, "npm-cache")
+        if max_bytes is None:
+            max_mb = environ().get("CHATRAJ_NPM_CACHE_MAX_MB")
+            max_bytes = int(max_mb) * 1024 * 1024 if max_mb else DEFAULT_MAX_BYTES
+        return NodeModulesCache(root, max_bytes=max_bytes)
+
+    @tracing.traced("agent.install")
+    def install_dependencies(self, project: str, command=None, use_cache: bool = True,
+                             max_bytes: Optional[int] = None):
+        """Install `project` ("backend" or "frontend") dependencies through the node_modules cache.
+
+        The cache key is the SHA-256 of package-lock.json plus the Node version
+        from `.nvmrc`; a hit restores the snapshot with hardlinks instead of
+        running `npm ci`.
+        """
+        from .npm_cache import install, node_version
+
+        project_dir = os.path.join(self.repo_root, "Backend" if project == "backend" else project)
+        if not os.path.isdir(project_dir):
+            raise FileNotFoundError(f"{os.path.basename(project_dir)} directory not found")
+        argv = shlex.split(command) if isinstance(command, str) else list(command or ["npm", "ci"])
+        summary = install(self.npm_cache(max_bytes), project_dir, argv,
+                          node_version(project_dir, self.repo_root), use_cache=use_cache)
+        print(json.dumps(summary, indent=2))
+        return summary
+
+    def _ensure_node_modules(self, project_dir: str):
+        if not os.path.isdir(os.path.join(project_dir, "node_modules")) and \
+                os.path.isfile(os.path.join(project_dir, "package-lock.json")):
+            self.install_dependencies(os.path.basename(project_dir).lower())
+
+    def cache_stats(self):
+        summary = self.npm_cache().summary()
+        print(json.dumps(summary, indent=2))
+        return summary
+
+    @tracing.traced("agent.scan")
+    def scan_repo(self, workers: Optional[int] = None, top: int = 10, use_index: bool = True):
+        """Scan the repository honouring .gitignore/.dockerignore rules.
+
+        Directories unchanged since the previous run are served from the
+        on-disk index in `.chatraj-agent/scan-index.json`.
+        """
+        from .scanner import RepoScanner
+
+        scanner = RepoScanner(self.repo_root, workers=workers,
+                              top=top, use_index=use_index)
+        summary = scanner.scan()
+        print(json.dumps(summary, indent=2))
+        return summary
+
+    @tracing.traced("agent.assets")
+    def analyze_assets(self, workers: Optional[int] = None, top: int = 10, threshold: float = 0.8,
+                       use_cache: bool = True):
+        """Report duplicate, near-duplicate and oversized tracked files.
+
+        Content hashes are computed in a process pool and cached in
+        `.chatraj-agent/asset-hashes.json` by (inode, size, mtime).
+        """
+        from .assets import analyze_assets
+
+        summary = analyze_assets(self.repo_root, workers=workers, top=top,
+                                 threshold=threshold, use_cache=use_cache)
         print(json.dumps(summary, indent=2))
         return summary
 
-    def run_backend_tests(self):
+    @tracing.traced("agent.docker_context")
+    def docker_context(self, context: str = "Backend", dockerfile: Optional[str] = None,
+                       base: Optional[str] = "main", history: int = 100,
+                       rebuild_seconds: Optional[float] = None, top: int = 10):
+        """Analyse a Docker build context: what `.dockerignore` lets through, which
+        layers the changes since `base` rebuild, and what to ignore or reorder."""
+        from .docker_context import analyze_context
+        from .impact import changed_files
+
+        changed = changed_files(self.repo_root, base) if base else None
+        report = analyze_context(self.repo_root, context=context, dockerfile=dockerfile, changed=changed,
+                                 history=history, rebuild_seconds=rebuild_seconds, top=top)
+        print(json.dumps(report, indent=2))
+        return report
+
+    @tracing.traced("agent.affected_tests")
+    def affected_tests(self, base: str = "main"):
+        """Select the Backend/frontend tests affected by changes since `base`.
+
+        Uses the import graph cached in `.chatraj-agent/import-graph.json`,
+        which is refreshed incrementally on every call.
+        """
+        from .impact import ImportGraph, changed_files, select_tests
+
+        graph = ImportGraph(self.repo_root).build()
+        changed = changed_files(self.repo_root, base)
+        selection = select_tests(graph, changed)
+        for project, sel in selection.items():
+            print(f"{project}: {len(sel['selected'])} selected, {len(sel['skipped'])} skipped")
+            for test, why in sel["selected"].items():
+                print(f"  run  {test}: {why}")
+            for test, why in sel["skipped"].items():
+                print(f"  skip {test}: {why}")
+            for path, why in sel["ignored"].items():
+                print(f"  ignore {path}: {why}")
+        return selection
+
+    def _run_selected(self, project: str, cwd: str, command, changed_since: Optional[str]):
+        if not changed_since:
+            return self.run_command(command, cwd=cwd)
+        selected = self.affected_tests(changed_since)[project]["selected"]
+        if not selected:
+            print(f"No {project} tests affected by changes since {changed_since}; skipping.")
+            return 0
+        prefix = os.path.relpath(cwd, self.repo_root).replace(os.sep, "/") + "/"
+        return self.run_command(command + [t[len(prefix):] for t in selected], cwd=cwd)
+
+    @tracing.traced("agent.backend_test")
+    def run_backend_tests(self, changed_since: Optional[str] = None):
         backend_dir = os.path.join(self.repo_root, "Backend")
         if not os.path.isdir(backend_dir):
             raise FileNotFoundError("Backend directory not found")
-        return self.run_command("npm test", cwd=backend_dir)
+        self._ensure_node_modules(backend_dir)
+        if not changed_since:
+            return self.run_command("npm test", cwd=backend_dir)
+        return self._run_selected("backend", backend_dir,
+                                  ["npx", "jest", "--config", "jest.config.cjs", "--runTestsByPath"], changed_since)
 
-    def run_frontend_tests(self):
+    @tracing.traced("agent.frontend_test")
+    def run_frontend_tests(self, changed_since: Optional[str] = None):
         frontend_dir = os.path.join(self.repo_root, "frontend")
         if not os.path.isdir(frontend_dir):
             raise FileNotFoundError("frontend directory not found")
-        return self.run_command("npm test", cwd=frontend_dir)
+        self._ensure_node_modules(frontend_dir)
+        if not changed_since:
+            return self.run_command("npm test", cwd=frontend_dir)
+        return self._run_selected("frontend", frontend_dir, ["npx", "vitest", "run"], changed_since)
+
+    @tracing.traced("agent.test_all")
+    def run_all_tests(self, shards: Optional[int] = None, suites=None):
+        """Run Backend Jest and frontend Vitest concurrently, each split into shards.
+
+        Output is streamed with a `[suite i/N]` prefix; the shards' JSON reports
+        are merged into one summary, also saved as
+        `.chatraj-agent/test-reports/summary.json`.
+        """
+        from .scanner import state_path
+        from .suites import SUITES, build_shards, format_summary, run_shards
+
+        plan = build_shards(self.repo_root, shards, suites or SUITES)
+        for cwd in sorted({shard.cwd for shard in plan}):
+            self._ensure_node_modules(cwd)
+        summary = run_shards(plan)
+        with open(state_path(self.repo_root, "test-reports", "summary.json"), "w", encoding="utf-8") as fh:
+            json.dump(summary, fh, indent=2)
+        print(format_summary(summary))
+        return summary
+
+    @tracing.traced("agent.loadtest")
+    def loadtest(self, users: int = 20, duration: float = 30.0, ramp_up: float = 0.0, think: float = 0.0,
+                 messages: int = 50, rooms: int = 5, url: Optional[str] = None,
+                 mongodb_uri: Optional[str] = None, redis_url: Optional[str] = None,
+                 rotate_ip: bool = True, out_dir: Optional[str] = None, allow_remote_mongodb: bool = False):
+        """Load-test the Backend's HTTP and Socket.IO endpoints with async virtual users.
+
+        Seeds MongoDB with `Backend/scripts/seed-loadtest.js` (a temporary
+        `mongod` unless `mongodb_uri` is given; MONGODB_URI is never used),
+        starts the Backend on a free port unless `url` (which needs
+        `mongodb_uri`) is given, and writes one `.hgrm` latency histogram per
+        endpoint to `.chatraj-agent/loadtest/`.
+        """
+        from .loadtest import run_loadtest
+        from .scanner import state_path
+
+        backend_dir = os.path.join(self.repo_root, "Backend")
+        if not os.path.isdir(backend_dir):
+            raise FileNotFoundError("Backend directory not found")
+        self._ensure_node_modules(backend_dir)
+        out_dir = out_dir or state_path(self.repo_root, "loadtest")
+        report = run_loadtest(self.repo_root, users=users, duration=duration, ramp_up=ramp_up, think=think,
+                              messages=messages, rooms=rooms, url=url,
+                              mongodb_uri=mongodb_uri, redis_url=redis_url, rotate_ip=rotate_ip, out_dir=out_dir,
+                              allow_remote=allow_remote_mongodb)
+        print(json.dumps(report, indent=2))
+        return report
+
+    @tracing.traced("agent.bundle_report")
+    def bundle_report(self, stats: Optional[str] = None, budgets: Optional[str] = None,
+                      comment_out: Optional[str] = None, threshold: Optional[int] = None, record: bool = True,
+                      base: Optional[str] = None):
+        """Build the frontend with Vite and report chunk sizes against budgets and the last recorded build.
+
+        Unless `stats` names an existing bundle-stats file, runs `vite build`
+        with `frontend/scripts/bundle-stats-plugin.js` enabled. Builds are
+        kept in `.chatraj-agent/bundle-history.json` and the diff is against
+        the build of `base` when it was recorded, else the latest one;
+        `comment_out` receives the Markdown diff for the PR comment.
+        """
+        from .bundle_report import (BUDGETS_FILE, DEFAULT_THRESHOLD, baseline, check_budgets, diff,
+                                    format_comment, load_budgets, load_history, record_build, summarize)
+        from .perf_history import current_commit
+        from .scanner import state_path
+
+        build_seconds = None
+        if not stats:
+            frontend_dir = os.path.join(self.repo_root, "frontend")
+            if not os.path.isdir(frontend_dir):
+                raise FileNotFoundError("frontend directory not found")
+            self._ensure_node_modules(frontend_dir)
+            stats = state_path(self.repo_root, "bundle-stats.json")
+            started = time.perf_counter()
+            self.run_command(["npx", "vite", "build"], cwd=frontend_dir, env={"VITE_BUNDLE_STATS": stats})
+            build_seconds = time.perf_counter() - started
+        with open(os.path.join(self.repo_root, stats), "r", encoding="utf-8") as fh:
+            summary = summarize(json.load(fh), build_seconds)
+
+        threshold = DEFAULT_THRESHOLD if threshold is None else threshold
+        history_path = state_path(self.repo_root, "bundle-history.json")
+        history = load_history(history_path)
+        commit = current_commit(self.repo_root)
+        previous = baseline(history, commit, base)
+        changes = diff(previous["summary"], summary, threshold) if previous else None
+        over = check_budgets(summary, load_budgets(os.path.join(self.repo_root, budgets or BUDGETS_FILE)))
+        comment = format_comment(summary, changes, over, previous, threshold)
+        if comment_out:
+            with open(os.path.join(self.repo_root, comment_out), "w", encoding="utf-8") as fh:
+                fh.write(comment)
+        if record:
+            record_build(history_path, history, commit, summary)
+        report = {"summary": {k: v for k, v in summary.items() if k != "top_modules"},
+                  "baseline": previous and previous["commit"], "changes": changes, "over_budget": over}
+        print(json.dumps(report, indent=2))
+        return report
+
+    @tracing.traced("agent.generate_sitemap")
+    def generate_sitemap(self, mongodb_uri: Optional[str] = None, out_dir: Optional[str] = None,
+                         site_url: Optional[str] = None, compress: bool = True):
+        """Generate the sitemap index and parts in-process.
+
+        Blog URLs are streamed from MongoDB when a URI is available; output is
+        split at 50,000 URLs per part and unchanged parts are not rewritten.
+        """
+        from .sitemap import generate_sitemap
+
+        uri = mongodb_uri or environ().get("MONGODB_URI")
+        blogs = self.mongo_client(uri).get_default_database().get_collection("blogs") if uri else None
+        summary = generate_sitemap(self.repo_root, blogs=blogs, out_dir=out_dir,
+                                   site_url=site_url, compress=compress)
+        print(json.dumps(summary, indent=2))
+        return summary
+
+    @tracing.traced("agent.index_advisor")
+    def index_advisor(self, mongodb_uri: Optional[str] = None, apply: bool = False, shapes=None):
+        """Explain the Backend's hot query shapes and propose (or build) the indexes they lack."""
+        from .index_advisor import CATALOG, advise
+
+        uri = mongodb_uri or environ().get("MONGODB_URI")
+        if not uri:
+            raise EnvironmentError("MONGODB_URI not set in environment")
+        selected = [shape for shape in CATALOG if not shapes or shape.name in shapes]
+        unknown = set(shapes or ()) - {shape.name for shape in CATALOG}
+        if unknown:
+            raise ValueError(f"Unknown query shape(s): {', '.join(sorted(unknown))}; "
+                             f"known: {', '.join(shape.name for shape in CATALOG)}")
+        report = advise(self.mongo_client(uri).get_default_database(), selected, apply=apply)
+        print(json.dumps(report, indent=2, default=str))
+        return report
+
+    @tracing.traced("agent.export")
+    def export_collections(self, out_dir: Optional[str] = None, mongodb_uri: Optional[str] = None,
+                           collections=None, partitions: Optional[int] = None, workers: Optional[int] = None):
+        """Snapshot MongoDB collections as `_id`-range partitioned, gzipped Extended JSON shards.
+
+        Defaults to `.chatraj-agent/snapshots/<UTC timestamp>/`; see snapshot.export_snapshot.
+        """
+        from datetime import datetime, timezone
+
+        from .scanner import state_path
+        from .snapshot import DEFAULT_COLLECTIONS, DEFAULT_PARTITIONS, DEFAULT_WORKERS, export_snapshot
+
+        uri = mongodb_uri or environ().get("MONGODB_URI")
+        if not uri:
+            raise EnvironmentError("MONGODB_URI not set in environment")
+        out_dir = out_dir or state_path(self.repo_root, "snapshots",
+                                        datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ"))
+        summary = export_snapshot(self.mongo_client(uri).get_default_database(), out_dir,
+                                  collections=collections or DEFAULT_COLLECTIONS,
+                                  partitions=partitions or DEFAULT_PARTITIONS, workers=workers or DEFAULT_WORKERS)
+        print(json.dumps(summary, indent=2))
+        return summary
+
+    @tracing.traced("agent.import")
+    def import_collections(self, src: str, mongodb_uri: Optional[str] = None, collections=None,
+                           workers: Optional[int] = None, batch_size: Optional[int] = None, drop: bool = False):
+        """Restore an `export` snapshot with batched unordered inserts, then rebuild its indexes."""
+        from .snapshot import DEFAULT_BATCH_SIZE, DEFAULT_WORKERS, import_snapshot
+
+        uri = mongodb_uri or environ().get("MONGODB_URI")
+        if not uri:
+            raise EnvironmentError("MONGODB_URI not set in environment")
+        report = import_snapshot(self.mongo_client(uri).get_default_database(), os.path.join(self.repo_root, src),
+                                 collections=collections, workers=workers or DEFAULT_WORKERS,
+                                 batch_size=batch_size or DEFAULT_BATCH_SIZE, drop=drop)
+        print(json.dumps(report, indent=2))
+        return report
 
     def generate_frontend_sitemap(self):
         frontend_dir = os.path.join(self.repo_root, "frontend")
         if not os.path.isdir(frontend_dir):
             raise FileNotFoundError("frontend directory not found")
-        # Use npm script if available
-        return self.run_command("npm run generate-sitemap", cwd=frontend_dir)
+        # Static pages, plus blog pages when MONGODB_URI is set
+        return self.generate_sitemap()
 
     def populate_blog_slugs(self):
         backend_dir = os.path.join(self.repo_root, "Backend")
         if not os.path.isdir(backend_dir):
             raise FileNotFoundError("Backend directory not found")
+        self._ensure_node_modules(backend_dir)
         return self.run_command("npm run populate-slugs", cwd=backend_dir)
 
+    @tracing.traced("agent.apply_slugs")
+    def apply_blog_slugs(self, paths=None, batch_size: Optional[int] = None, dry_run: bool = False,
+                         mongodb_uri: Optional[str] = None):
+        """Apply slug mapping files to the `blogs` collection with bulk writes.
+
+        Defaults to the NDJSON chunks written by auto_pr (or the legacy JSON
+        mapping). Progress is checkpointed in `.chatraj-agent/` so a crashed
+        run resumes at the last applied batch.
+        """
+        from .scanner import state_path
+        from . import slugs
+
+        uri = mongodb_uri or environ().get("MONGODB_URI")
+        if not uri:
+            raise EnvironmentError("MONGODB_URI not set in environment")
+        if not paths:
+            chunk_dir = os.path.join(self.repo_root, slugs.MAPPING_DIR)
+            paths = [chunk_dir] if os.path.isdir(chunk_dir) else [
+                os.path.join(self.repo_root, slugs.LEGACY_MAPPING_FILE)]
+        files = slugs.resolve_mapping_paths(paths)
+        blogs = self.mongo_client(uri).get_default_database().get_collection("blogs")
+        stats = slugs.apply_slugs(blogs, files, batch_size=batch_size or slugs.DEFAULT_APPLY_BATCH,
+                                  dry_run=dry_run,
+                                  checkpoint=Path(state_path(self.repo_root, "apply-slugs.checkpoint.json")))
+        print(json.dumps(stats, indent=2))
+        return stats
+
+    @tracing.traced("agent.watch_slugs")
+    def watch_slugs(self, mongodb_uri: Optional[str] = None, batch_size: Optional[int] = None,
+                    flush_interval: Optional[float] = None, duration: Optional[float] = None,
+                    max_events: Optional[int] = None, reset: bool = False, metrics_every: float = 10.0):
+        """Fill missing blog slugs as blogs are created or retitled, from a `blogs` change stream.
+
+        The resume token and latest metrics live in `.chatraj-agent/slug-watch.json`;
+        see slug_watch.SlugWatcher. Needs a replica set (a single node is enough).
+        """
+        from .scanner import state_path
+        from .slug_watch import DEFAULT_FLUSH_INTERVAL, SlugWatcher
+        from .slugs import DEFAULT_APPLY_BATCH
+
+        uri = mongodb_uri or environ().get("MONGODB_URI")
+        if not uri:
+            raise EnvironmentError("MONGODB_URI not set in environment")
+        blogs = self.mongo_client(uri).get_default_database().get_collection("blogs")
+        watcher = SlugWatcher(blogs, Path(state_path(self.repo_root, "slug-watch.json")),
+                              batch_size=batch_size or DEFAULT_APPLY_BATCH,
+                              flush_interval=flush_interval or DEFAULT_FLUSH_INTERVAL)
+        metrics = watcher.run(duration=duration, max_events=max_events, reset=reset, metrics_every=metrics_every,
+                              on_metrics=lambda m: print(json.dumps(m), flush=True))
+        print(json.dumps(metrics, indent=2))
+        return metrics
+
     def generate_backend_sitemap(self):
         backend_dir = os.path.join(self.repo_root, "Backend")
         if not os.path.isdir(backend_dir):
             raise FileNotFoundError("Backend directory not found")
-        return self.run_command("npm run generate-sitemap", cwd=backend_dir)
+        if not environ().get("MONGODB_URI"):
+            raise EnvironmentError("MONGODB_URI not set in environment")
+        return self.generate_sitemap()
 
-    def create_github_issue(self, title: str, body: str, repo: Optional[str] = None):
-        token = os.environ.get("GITHUB_TOKEN")
+    def record_perf(self, command: str, ok: bool = True):
+        """Append this process's trace to `.chatraj-agent/perf-history.sqlite` (best-effort)."""
+        import sqlite3
+        from .perf_history import PerfHistory, current_commit
+        from .scanner import state_path
+
+        try:
+            history = PerfHistory(state_path(self.repo_root, "perf-history.sqlite"))
+            try:
+                history.record(current_commit(self.repo_root), command, tracing.current().spans, ok=ok)
+            finally:
+                history.close()
+        except (sqlite3.Error, OSError) as e:
+            print(f"Could not record perf history: {e}")
+
+    @tracing.traced("agent.fanout")
+    def fanout(self, repos_file: str, argv, concurrency: Optional[int] = None, per_host: Optional[int] = None,
+               report: Optional[str] = None):
+        """Run an agent command in every repository listed in `repos_file` at once.
+
+        See fanout.fanout: per-host concurrency limits, one rate-limit budget
+        per GitHub host, and a failure in one repository does not stop the rest.
+        """
+        from .fanout import DEFAULT_CONCURRENCY, DEFAULT_PER_HOST, run_fanout
+        from .scanner import state_path
+
+        summary = run_fanout(os.path.join(self.repo_root, repos_file), list(argv),
+                             concurrency=concurrency or DEFAULT_CONCURRENCY,
+                             per_host=per_host or DEFAULT_PER_HOST,
+                             report=report or state_path(self.repo_root, "fanout-report.ndjson"))
+        print(json.dumps(summary, indent=2))
+        return summary
+
+    def perf_history(self, limit: int = 20, imports=None, commit: Optional[str] = None):
+        """Import trace files into the perf-history ledger and list the latest runs."""
+        from .perf_history import PerfHistory, current_commit
+        from .scanner import state_path
+
+        history = PerfHistory(state_path(self.repo_root, "perf-history.sqlite"))
+        try:
+            for path in imports or ():
+                history.import_trace(path, commit or current_commit(self.repo_root))
+            runs = history.runs(limit)
+            for run in runs:
+                ops = history.samples(run["id"])
+                top = sorted(ops.items(), key=lambda kv: -kv[1].get("wall", 0))[:3]
+                when = time.strftime("%Y-%m-%d %H:%M", time.localtime(run["recorded_at"]))
+                print(f"#{run['id']:<5} {when}  {run['commit'][:10]:<10}  {run['command']:<28} "
+                      f"{'ok  ' if run['ok'] else 'FAIL'}  "
+                      + ", ".join(f"{op} {m.get('wall', 0):.2f}s" for op, m in top))
+        finally:
+            history.close()
+        return runs
+
+    def perf_compare(self, commit: Optional[str] = None, metrics=None, window: int = 20,
+                     alpha: float = 0.01, min_change: float = 0.10, min_baseline: int = 5,
+                     command: Optional[str] = None):
+        """Compare the runs of `commit` (default: latest) with the rolling baseline of the same command."""
+        from .perf_history import DEFAULT_METRICS, PerfHistory, compare, format_comparison
+        from .scanner import state_path
+
+        history = PerfHistory(state_path(self.repo_root, "perf-history.sqlite"))
+        try:
+            result = compare(history, commit=commit, metrics=metrics or DEFAULT_METRICS, window=window,
+                             alpha=alpha, min_change=min_change, min_baseline=min_baseline,
+                             command=command)
+        finally:
+            history.close()
+        print(format_comparison(result))
+        return result
+
+    def mongo_client(self, uri: str):
+        """Return a MongoClient for `uri`, shared by later calls (and daemon requests)."""
+        with self._lock:
+            if uri not in self._mongo:
+                from pymongo import MongoClient
+
+                self._mongo[uri] = MongoClient(uri, serverSelectionTimeoutMS=5000)
+            return self._mongo[uri]
+
+    def close(self):
+        """Release pooled HTTP and MongoDB connections."""
+        if self._github is not None:
+            self._github.close()
+        for client in self._mongo.values():
+            client.close()
+        self._mongo.clear()
+
+    def github_client(self):
+        """Return the agent's shared GitHubClient, creating it on first use."""
+        token = environ().get("GITHUB_TOKEN")
         if not token:
             raise EnvironmentError("GITHUB_TOKEN not set in environment")
+        if self._github is None or self._github.token != token:
+            from .github_client import GitHubClient
+            from .scanner import STATE_DIR
+
+            self._github = GitHubClient(token, api_url=self.api_url,
+                                        cache_dir=os.path.join(self.repo_root, STATE_DIR, "http-cache"),
+                                        scheduler=self.scheduler)
+        return self._github
+
+    @tracing.traced("agent.create_issue")
+    def create_github_issue(self, title: str, body: str, repo: Optional[str] = None):
+        gh = self.github_client()
         if not repo:
             # try to infer from git remote
             repo = self._infer_github_repo()
-        import requests
 
-        url = f"https://api.github.com/repos/{repo}/issues"
         payload = {"title": title, "body": body}
-        headers = {"Authorization": f"token {token}",
-                   "Accept": "application/vnd.github.v3+json"}
-        resp = requests.post(url, json=payload, headers=headers)
+        resp = gh.post(f"/repos/{repo}/issues", json=payload)
         if resp.status_code not in (200, 201):
             raise RuntimeError(
                 f"Failed to create issue: {resp.status_code} {resp.text}")
         print("Issue created:", resp.json().get("html_url"))
         return resp.json()
 
-    def _retry_request(self, func, max_attempts: int = 3, backoff: float = 0.5):
-        attempt = 0
-        while attempt < max_attempts:
-            try:
-                return func()
-            except Exception:
-                attempt += 1
-                if attempt >= max_attempts:
-                    raise
-                import time
+    @tracing.traced("agent.create_issues")
+    def create_github_issues(self, source: str, output: Optional[str] = None, concurrency: int = 4,
+                             repo: Optional[str] = None):
+        """Bulk-create issues from a JSONL file; see bulk_issues.create_issues."""
+        from .bulk_issues import create_issues, default_output
 
-                time.sleep(backoff * (2 ** (attempt - 1)))
+        gh = self.github_client()
+        if not repo:
+            repo = self._infer_github_repo()
+        output = output or default_output(source)
+        counts = create_issues(gh, repo, source, output,
+                               concurrency=concurrency)
+        print(json.dumps({"results": output, **counts}, indent=2))
+        return counts
 
+    @tracing.traced("agent.create_pull_request")
     def create_pull_request(self, title: str, head: str, base: str = "main", body: str = "", repo: Optional[str] = None):
-        token = os.environ.get("GITHUB_TOKEN")
-        if not token:
-            raise EnvironmentError("GITHUB_TOKEN not set in environment")
+        gh = self.github_client()
         if not repo:
             repo = self._infer_github_repo()
-        import requests
 
-        url = f"https://api.github.com/repos/{repo}/pulls"
         payload = {"title": title, "head": head, "base": base, "body": body}
-        headers = {"Authorization": f"token {token}",
-                   "Accept": "application/vnd.github.v3+json"}
 
-        def do_post():
-            resp = requests.post(url, json=payload, headers=headers)
-            if resp.status_code not in (200, 201):
-                raise RuntimeError(
-                    f"Failed to create PR: {resp.status_code} {resp.text}")
-            return resp.json()
-
-        return self._retry_request(do_post)
+        resp = gh.post(f"/repos/{repo}/pulls", json=payload)
+        if resp.status_code not in (200, 201):
+            raise RuntimeError(
+                f"Failed to create PR: {resp.status_code} {resp.text}")
+        return resp.json()
 
+    @tracing.traced("agent.comment_on_pull_request")
     def comment_on_pull_request(self, pr_number: int, comment: str, repo: Optional[str] = None):
-        token = os.environ.get("GITHUB_TOKEN")
-        if not token:
-            raise EnvironmentError("GITHUB_TOKEN not set in environment")
+        gh = self.github_client()
         if not repo:
             repo = self._infer_github_repo()
-        import requests
 
-        url = f"https://api.github.com/repos/{repo}/issues/{pr_number}/comments"
         payload = {"body": comment}
-        headers = {"Authorization": f"token {token}",
-                   "Accept": "application/vnd.github.v3+json"}
 
-        def do_post():
-            resp = requests.post(url, json=payload, headers=headers)
-            if resp.status_code not in (200, 201):
-                raise RuntimeError(
-                    f"Failed to comment on PR: {resp.status_code} {resp.text}")
-            return resp.json()
+        resp = gh.post(
+            f"/repos/{repo}/issues/{pr_number}/comments", json=payload)
+        if resp.status_code not in (200, 201):
+            raise RuntimeError(
+                f"Failed to comment on PR: {resp.status_code} {resp.text}")
+        return resp.json()
+
+    def _transport(self, transport: Optional[str]) -> str:
+        transport = (transport or environ().get("CHATRAJ_GITHUB_TRANSPORT") or "auto").lower()
+        if transport not in ("auto", "graphql", "rest"):
+            raise ValueError(f"Unknown GitHub transport {transport!r}; expected auto, graphql or rest")
+        return transport
 
-        return self._retry_request(do_post)
+    @staticmethod
+    def _find_own_comment(gh, url: str, tag: str) -> Optional[dict]:
+        """The newest comment containing `tag` written by the token's user, walking the pages newest first.
 
-    def create_branch_with_changes(self, branch: str, files: Dict[str, str], commit_message: str = "chore: automated changes", base: str = "main", repo: Optional[str] = None):
+        Installation tokens cannot read `/user`; their comments are the only
+        bot-authored ones expected to carry the agent's marker.
+        """
+        resp = gh.get("/user")
+        login = resp.json().get("login") if resp.status_code == 200 else None
+
+        def own(c: dict) -> bool:
+            user = c.get("user") or {}
+            return tag in (c.get("body") or "") and (
+                user.get("login") == login if login else user.get("type") == "Bot")
+
+        resp = gh.get(url)
+        first_page = resp
+        if resp.status_code == 200 and "last" in resp.links:
+            resp = gh.get(resp.links["last"]["url"])
+        while True:
+            if resp.status_code != 200:
+                raise RuntimeError(f"Failed to list PR comments: {resp.status_code} {resp.text}")
+            match = next((c for c in reversed(resp.json()) if own(c)), None)
+            if match or "prev" not in resp.links or resp is first_page:
+                return match
+            prev = resp.links["prev"]["url"]
+            resp = first_page if prev == resp.links.get("first", {}).get("url") else gh.get(prev)
+
+    @tracing.traced("agent.upsert_comment")
+    def upsert_pull_request_comment(self, pr_number: int, comment: str, marker: str = "pr",
+                                    repo: Optional[str] = None, transport: Optional[str] = None):
+        """Update the agent's previous comment tagged `marker` on the PR, or add one.
+
+        GraphQL needs one query and one mutation; with `transport="auto"` a
+        failing GraphQL lookup falls back to REST, which pages through the
+        comments and only edits one written by this token's user.
+        """
+        from . import github_graphql
+
+        gh = self.github_client()
+        if not repo:
+            repo = self._infer_github_repo()
+        transport = self._transport(transport)
+        if transport != "rest":
+            try:
+                return github_graphql.upsert_comment(github_graphql.GitHubGraphQL(gh), repo, pr_number,
+                                                     comment, marker)
+            except github_graphql.GraphQLUnavailable as e:
+                if transport == "graphql":
+                    raise
+                print(f"GraphQL unavailable ({e}); falling back to REST")
+
+        tag = github_graphql.comment_marker(marker)
+        body = f"{comment.rstrip()}\n\n{tag}"
+        previous = self._find_own_comment(gh, f"/repos/{repo}/issues/{pr_number}/comments?per_page=100", tag)
+        if previous:
+            resp = gh.patch(f"/repos/{repo}/issues/comments/{previous['id']}", json={"body": body})
+        else:
+            resp = gh.post(f"/repos/{repo}/issues/{pr_number}/comments", json={"body": body})
+        if resp.status_code not in (200, 201):
+            raise RuntimeError(f"Failed to comment on PR: {resp.status_code} {resp.text}")
+        return {"id": resp.json().get("id"), "url": resp.json().get("html_url"), "updated": bool(previous)}
+
+    @tracing.traced("agent.publish_pull_request")
+    def publish_pull_request(self, branch: str, files: Dict[str, Union[str, Path]], commit_message: str,
+                             title: str, body: str = "", base: str = "main", comment: Optional[str] = None,
+                             marker: str = "pr", repo: Optional[str] = None, transport: Optional[str] = None):
+        """Commit `files` to `branch` and open its PR (plus an upserted comment) in as few requests as possible.
+
+        `transport` (or CHATRAJ_GITHUB_TRANSPORT) selects "graphql", "rest"
+        or "auto" (default): GraphQL with `createCommitOnBranch` and batched
+        mutations, falling back to the REST flow when the GraphQL lookup fails
+        before anything was written.
+        """
+        from . import github_graphql
+
+        gh = self.github_client()
+        if not repo:
+            repo = self._infer_github_repo()
+        transport = self._transport(transport)
+        before = gh.stats["requests"]
+        if transport != "rest":
+            try:
+                result = github_graphql.publish(github_graphql.GitHubGraphQL(gh), repo, branch, files,
+                                                commit_message, title, body=body, base=base,
+                                                comment=comment, marker=marker)
+                result["requests"] = gh.stats["requests"] - before
+                return result
+            except github_graphql.GraphQLUnavailable as e:
+                if transport == "graphql":
+                    raise
+                print(f"GraphQL unavailable ({e}); falling back to REST")
+
+        ref = self.create_branch_with_changes(branch, files, commit_message=commit_message, base=base, repo=repo)
+        pr = self.create_pull_request(title, head=branch, base=base, body=body, repo=repo)
+        result = {"transport": "rest", "ref": ref.get("ref"), "branch_created": True,
+                  "pull_request": {"number": pr.get("number"), "html_url": pr.get("html_url"),
+                                   "node_id": pr.get("node_id"), "created": True},
+                  "comment": None}
+        if comment is not None:
+            result["comment"] = self.upsert_pull_request_comment(pr.get("number"), comment, marker=marker,
+                                                                 repo=repo, transport="rest")
+        result["requests"] = gh.stats["requests"] - before
+        return result
+
+    @tracing.traced("agent.create_branch_with_changes")
+    def create_branch_with_changes(self, branch: str, files: Dict[str, Union[str, Path]], commit_message: str = "chore: automated changes", base: str = "main", repo: Optional[str] = None,
+                                   inline_limit: int = INLINE_BLOB_LIMIT, max_workers: int = BLOB_UPLOAD_WORKERS):
         """Create a new branch from `base`, commit `files` (path->content), and return the new branch ref JSON.
 
         Uses the GitHub REST API to create blobs, a tree, a commit and a ref.
+        Blob SHAs are computed locally so files identical to the base tree are
+        skipped, files up to `inline_limit` bytes are inlined in the tree
+        payload and the remaining blobs are uploaded by `max_workers` threads.
+        A `Path` value is read from disk when needed instead of being held in
+        memory for the whole upload; content that is not UTF-8 (images and
+        other binary files) is always uploaded as a base64 blob.
         """
-        token = os.environ.get("GITHUB_TOKEN")
-        if not token:
-            raise EnvironmentError("GITHUB_TOKEN not set in environment")
+        gh = self.github_client()
         if not repo:
             repo = self._infer_github_repo()
-        import requests
 
-        api = f"https://api.github.com/repos/{repo}"
+        api = f"/repos/{repo}"
 
         def get_base():
-            r = requests.get(f"{api}/git/ref/heads/{base}",
-                             headers={"Authorization": f"token {token}"})
+            r = gh.get(f"{api}/git/ref/heads/{base}")
             if r.status_code != 200:
                 raise RuntimeError(
                     f"Failed to get base ref: {r.status_code} {r.text}")
             return r.json()["object"]["sha"]
 
-        base_sha = self._retry_request(get_base)
+        base_sha = get_base()
+        base_tree_sha, base_blobs = self._get_base_tree(gh, api, base_sha)
 
-        blob_shas = {}
+        tree = []
+        uploads = {}
+        unchanged = 0
         for path, content in files.items():
-            def make_blob(path=path, content=content):
-                r = requests.post(f"{api}/git/blobs", json={"content": content,
-                                  "encoding": "utf-8"}, headers={"Authorization": f"token {token}"})
-                if r.status_code not in (200, 201):
-                    raise RuntimeError(
-                        f"Failed to create blob for {path}: {r.status_code} {r.text}")
-                return r.json()["sha"]
+            path = path.replace('\\', '/')
+            data = content.read_bytes() if isinstance(
+                content, Path) else content.encode("utf-8")
+            if base_blobs.get(path) == git_blob_sha(data):
+                unchanged += 1
+                continue
+            try:
+                text = data.decode("utf-8")
+            except UnicodeDecodeError:
+                text = None  # binary: tree entries only take UTF-8 content
+            if text is not None and len(data) <= inline_limit:
+                tree.append({"path": path, "mode": "100644",
+                            "type": "blob", "content": text})
+            else:
+                uploads[path] = content
+
+        def make_blob(path, content):
+            data = content.read_bytes() if isinstance(content, Path) else content.encode("utf-8")
+            try:
+                payload = {"content": data.decode("utf-8"), "encoding": "utf-8"}
+            except UnicodeDecodeError:
+                payload = {"content": base64.b64encode(data).decode("ascii"), "encoding": "base64"}
+            r = gh.post(f"{api}/git/blobs", json=payload)
+            if r.status_code not in (200, 201):
+                raise RuntimeError(
+                    f"Failed to create blob for {path}: {r.status_code} {r.text}")
+            return r.json()["sha"]
 
-            blob_shas[path] = self._retry_request(make_blob)
+        if uploads:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(uploads)))) as pool:
+                # copy_context keeps GitHub request spans in the caller's trace
+                futures = {path: pool.submit(contextvars.copy_context().run, make_blob, path, content)
+                           for path, content in uploads.items()}
+                for path, fut in futures.items():
+                    tree.append({"path": path, "mode": "100644",
+                                "type": "blob", "sha": fut.result()})
 
-        tree = []
-        for path, sha in blob_shas.items():
-            tree.append({"path": path.replace('\\', '/'),
-                        "mode": "100644", "type": "blob", "sha": sha})
+        print(f"Committing {len(files)} files: {unchanged} unchanged, "
+              f"{len(tree) - len(uploads)} inlined, {len(uploads)} uploaded")
 
         def create_tree():
-            r = requests.post(f"{api}/git/trees", json={"tree": tree,
-                              "base_tree": base_sha}, headers={"Authorization": f"token {token}"})
+            r = gh.post(f"{api}/git/trees",
+                        json={"tree": tree, "base_tree": base_sha})
             if r.status_code not in (200, 201):
                 raise RuntimeError(
                     f"Failed to create tree: {r.status_code} {r.text}")
             return r.json()["sha"]
 
-        tree_sha = self._retry_request(create_tree)
+        if tree or not base_tree_sha:
+            tree_sha = create_tree()
+        else:
+            tree_sha = base_tree_sha
 
         def create_commit():
-            r = requests.post(f"{api}/git/commits", json={"message": commit_message, "tree": tree_sha,
-                              "parents": [base_sha]}, headers={"Authorization": f"token {token}"})
+            r = gh.post(f"{api}/git/commits", json={"message": commit_message, "tree": tree_sha,
+                        "parents": [base_sha]})
             if r.status_code not in (200, 201):
                 raise RuntimeError(
                     f"Failed to create commit: {r.status_code} {r.text}")
             return r.json()["sha"]
 
-        commit_sha = self._retry_request(create_commit)
+        commit_sha = create_commit()
 
         def create_ref():
-            r = requests.post(f"{api}/git/refs", json={"ref": f"refs/heads/{branch}",
-                              "sha": commit_sha}, headers={"Authorization": f"token {token}"})
+            r = gh.post(f"{api}/git/refs",
+                        json={"ref": f"refs/heads/{branch}", "sha": commit_sha})
             if r.status_code not in (200, 201):
                 raise RuntimeError(
                     f"Failed to create ref: {r.status_code} {r.text}")
             return r.json()
 
-        ref = self._retry_request(create_ref)
+        ref = create_ref()
         return ref
 
+    def _get_base_tree(self, gh, api: str, commit_sha: str):
+        """Return (tree_sha, {path: blob_sha}) for `commit_sha`.
+
+        Best-effort: any failure yields an empty mapping so every file is sent.
+        Both lookups are immutable by SHA, so repeat runs are 304 cache hits.
+        """
+        try:
+            r = gh.get(f"{api}/git/commits/{commit_sha}")
+            if r.status_code != 200:
+                return None, {}
+            tree_sha = (r.json().get("tree") or {}).get("sha")
+            if not tree_sha:
+                return None, {}
+            r = gh.get(f"{api}/git/trees/{tree_sha}?recursive=1")
+            if r.status_code != 200:
+                return tree_sha, {}
+            entries = r.json().get("tree") or []
+        except Exception:
+            return None, {}
+        return tree_sha, {e["path"]: e["sha"] for e in entries if e.get("type") == "blob"}
+
     def _infer_github_repo(self) -> str:
+        if self.github_repo:
+            return self.github_repo
+        # cached until .git/config changes, so a warm agent runs `git remote` once
+        try:
+            stamp = os.stat(os.path.join(self.repo_root, ".git", "config")).st_mtime_ns
+        except OSError:
+            stamp = None
+        if self._repo_cache and stamp is not None and self._repo_cache[0] == stamp:
+            return self._repo_cache[1]
         # best-effort: read git remote origin
         try:
             out = subprocess.check_output(
-                "git remote get-url origin", shell=True, cwd=self.repo_root, text=True).strip()
+                "git remote get-url origin", shell=True, cwd=self.repo_root, text=True, env=environ()).strip()
         except Exception:
             raise RuntimeError(
                 "Could not infer repo; please pass repo='owner/name' or set git remote 'origin'")
@@ -222,34 +886,190 @@ class ChatrajAgent:
             out = out.split(":", 1)[1]
         out = out.replace("https://github.com/", "").replace("/", "/")
         out = out.rstrip(".git")
+        self._repo_cache = (stamp, out)
         return out
 
 
-def main(argv=None):
-    argv = argv or sys.argv[1:]
-    from .cli import build_parser
-
-    parser = build_parser()
-    args = parser.parse_args(argv)
-    agent = ChatrajAgent()
-
+def dispatch(agent: ChatrajAgent, args, parser):
+    """Run the subcommand selected by `args` on `agent`."""
     if args.command == "scan":
-        agent.scan_repo()
+        agent.scan_repo(workers=args.workers, top=args.top,
+                        use_index=not args.no_index)
+    elif args.command == "assets":
+        agent.analyze_assets(workers=args.workers, top=args.top, threshold=args.similarity,
+                             use_cache=not args.no_cache)
+    elif args.command == "docker-context":
+        agent.docker_context(context=args.context, dockerfile=args.dockerfile, base=args.base or None,
+                             history=args.history, rebuild_seconds=args.rebuild_seconds, top=args.top)
     elif args.command == "backend-test":
-        agent.run_backend_tests()
+        agent.run_backend_tests(changed_since=args.changed_since)
     elif args.command == "frontend-test":
-        agent.run_frontend_tests()
+        agent.run_frontend_tests(changed_since=args.changed_since)
+    elif args.command == "affected-tests":
+        agent.affected_tests(args.base)
+    elif args.command == "test-all":
+        summary = agent.run_all_tests(shards=args.shards, suites=args.suites)
+        if not summary["success"]:
+            sys.exit(1)
+    elif args.command == "loadtest":
+        agent.loadtest(users=args.users, duration=args.duration, ramp_up=args.ramp_up, think=args.think,
+                       messages=args.messages, rooms=args.rooms, url=args.url, mongodb_uri=args.mongodb_uri,
+                       redis_url=args.redis_url, rotate_ip=not args.keep_rate_limits, out_dir=args.out_dir,
+                       allow_remote_mongodb=args.allow_remote_mongodb)
     elif args.command == "generate-frontend-sitemap":
         agent.generate_frontend_sitemap()
+    elif args.command == "bundle-report":
+        report = agent.bundle_report(stats=args.stats, budgets=args.budgets, comment_out=args.comment_out,
+                                     threshold=args.threshold, record=not args.no_record, base=args.base)
+        if args.check and report["over_budget"]:
+            sys.exit(1)
+    elif args.command == "index-advisor":
+        report = agent.index_advisor(mongodb_uri=args.mongodb_uri, apply=args.apply, shapes=args.shapes)
+        if args.check and report["unresolved"]:
+            sys.exit(1)
+    elif args.command == "export":
+        agent.export_collections(out_dir=args.out, mongodb_uri=args.mongodb_uri, collections=args.collections,
+                                 partitions=args.partitions, workers=args.workers)
+    elif args.command == "import":
+        agent.import_collections(args.src, mongodb_uri=args.mongodb_uri, collections=args.collections,
+                                 workers=args.workers, batch_size=args.batch_size, drop=args.drop)
     elif args.command == "populate-slugs":
         agent.populate_blog_slugs()
     elif args.command == "generate-backend-sitemap":
         agent.generate_backend_sitemap()
+    elif args.command == "apply-slugs":
+        agent.apply_blog_slugs(args.paths, batch_size=args.batch_size,
+                               dry_run=args.dry_run)
+    elif args.command == "watch-slugs":
+        agent.watch_slugs(mongodb_uri=args.mongodb_uri, batch_size=args.batch_size,
+                          flush_interval=args.flush_interval, duration=args.duration,
+                          max_events=args.max_events, reset=args.reset, metrics_every=args.metrics_every)
     elif args.command == "create-issue":
         agent.create_github_issue(args.title, args.body, repo=args.repo)
+    elif args.command == "create-issues":
+        counts = agent.create_github_issues(args.source, output=args.output,
+                                            concurrency=args.concurrency, repo=args.repo)
+        if counts["failed"] or counts["invalid"]:
+            sys.exit(1)
+    elif args.command == "pr-comment":
+        body = Path(args.body_file).read_text(encoding="utf-8") if args.body_file else args.body
+        result = agent.upsert_pull_request_comment(args.number, body, marker=args.marker, repo=args.repo,
+                                                   transport=args.transport)
+        print(json.dumps(result, indent=2))
+    elif args.command == "install":
+        for project in args.projects or ["backend", "frontend"]:
+            agent.install_dependencies(project, command=args.install_command,
+                                       use_cache=not args.no_cache,
+                                       max_bytes=args.max_size_mb * 1024 * 1024 if args.max_size_mb else None)
+    elif args.command == "cache":
+        if args.cache_command == "stats":
+            agent.cache_stats()
+        else:
+            parser.print_help()
+    elif args.command == "fanout":
+        summary = agent.fanout(args.repos, args.fanout_argv, concurrency=args.concurrency,
+                               per_host=args.per_host, report=args.report)
+        if summary["failed"]:
+            sys.exit(1)
+    elif args.command == "auto-pr":
+        from .auto_pr import run as run_auto_pr
+
+        code = run_auto_pr(agent)
+        if code:
+            sys.exit(code)
+    elif args.command == "perf-history":
+        agent.perf_history(limit=args.limit, imports=args.imports, commit=args.commit)
+    elif args.command == "perf-compare":
+        result = agent.perf_compare(commit=args.commit, metrics=args.metrics, window=args.window,
+                                    alpha=args.alpha, min_change=args.min_change,
+                                    min_baseline=args.min_baseline, command=args.perf_command)
+        if result["regressions"]:
+            sys.exit(1)
     else:
         parser.print_help()
 
 
+def run_isolated(agent: ChatrajAgent, argv, refused=()) -> int:
+    """Parse and dispatch `argv` on `agent` in a fresh tracer; return the exit code instead of raising.
+
+    Used where one process runs many commands (the `serve` daemon, `fanout`):
+    argument errors, `sys.exit` and exceptions all end this command only.
+    """
+    from .cli import build_parser
+
+    ok = False
+    code = 1
+    args = None
+    with tracing.use(tracing.Tracer()):
+        try:
+            parser = build_parser()
+            args = parser.parse_args(argv)
+            if args.command in refused:
+                raise RuntimeError(f"{args.command} cannot be run here")
+            with tracing.span(f"cli.{args.command or 'help'}"):
+                dispatch(agent, args, parser)
+            ok, code = True, 0
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            ok = code == 0
+        except Exception:
+            traceback.print_exc()
+        if args is not None and args.command and args.command not in UNRECORDED_COMMANDS \
+                and not args.no_history:
+            agent.record_perf(args.command, ok=ok)
+    return code
+
+
+def main(argv=None):
+    argv = argv or sys.argv[1:]
+    from .cli import build_parser
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "serve":
+        from . import daemon
+
+        if args.stop:
+            print("Daemon stopped." if daemon.stop(os.getcwd()) else "No daemon running.")
+        elif args.status:
+            info = daemon.ping(daemon.socket_path(os.getcwd()))
+            print(json.dumps(info, indent=2) if info else "No daemon running.")
+        else:
+            daemon.serve(os.getcwd(), workers=args.workers)
+        return
+    if args.command and args.command not in LOCAL_COMMANDS and not (args.trace or args.profile or os.environ.get("CHATRAJ_TRACE")
+                             or os.environ.get("CHATRAJ_NO_DAEMON")):
+        # hand the command to a running `serve` daemon; fall back to running it here
+        from .daemon import request
+
+        code = request(os.getcwd(), argv)
+        if code is not None:
+            if code:
+                sys.exit(code)
+            return
+    agent = ChatrajAgent()
+
+    profiler = None
+    if args.profile:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    ok = False
+    try:
+        with tracing.span(f"cli.{args.command or 'help'}"):
+            dispatch(agent, args, parser)
+        ok = True
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            from .scanner import state_path
+
+            tracing.write_profile(profiler, args.profile_out or state_path(agent.repo_root, "profile.pstats"))
+        tracing.emit(args.trace, args.trace_format)
+        if args.command and args.command not in UNRECORDED_COMMANDS and not args.no_history:
+            agent.record_perf(args.command, ok=ok)
+
+
 if __name__ == "__main__":
     main()
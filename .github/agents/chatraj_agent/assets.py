@@ -0,0 +1,221 @@
+import hashlib
+import json
+import mmap
+import os
+import random
+import subprocess
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .daemon import environ
+from .scanner import ALWAYS_IGNORED, STATE_DIR, IgnoreRules, is_ignored, state_path
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+CACHE_VERSION = 1
+HASH_NAME = "xxh3_128" if xxhash is not None else "blake2b-128"
+# Text files larger than this are hashed but not compared for near-duplicates
+MAX_TEXT_BYTES = 1024 * 1024
+MIN_TEXT_LINES = 5
+MINHASH_PERMS = 64
+LSH_BANDS = 16
+_MERSENNE = (1 << 61) - 1
+_rng = random.Random(0x5eed)
+# fixed coefficients so signatures stay comparable across runs and processes
+_PERMS = [(_rng.randrange(1, _MERSENNE), _rng.randrange(0, _MERSENNE)) for _ in range(MINHASH_PERMS)]
+# Below this many uncached files the pool start-up costs more than it saves
+POOL_THRESHOLD = 64
+
+
+def _new_hash():
+    return xxhash.xxh3_128() if xxhash is not None else hashlib.blake2b(digest_size=16)
+
+
+def minhash(lines: Iterable[bytes]) -> Optional[List[int]]:
+    """MinHash signature of the set of non-blank, whitespace-stripped lines."""
+    shingles = {int.from_bytes(hashlib.blake2b(line, digest_size=8).digest(), "big")
+                for line in (raw.strip() for raw in lines) if line}
+    if len(shingles) < MIN_TEXT_LINES:
+        return None
+    return [min((a * h + b) % _MERSENNE for h in shingles) for a, b in _PERMS]
+
+
+def hash_file(path: str) -> Tuple[str, Optional[List[int]]]:
+    """Content hash of `path` via a read-only memory map, plus a MinHash for small text files."""
+    with open(path, "rb") as fh:
+        size = os.fstat(fh.fileno()).st_size
+        if size == 0:
+            return _new_hash().hexdigest(), None
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            h = _new_hash()
+            h.update(mm)
+            signature = None
+            if size <= MAX_TEXT_BYTES and mm.find(b"\0", 0, min(size, 8192)) == -1:
+                mm.seek(0)
+                signature = minhash(iter(mm.readline, b""))  # line by line, without copying the map
+            return h.hexdigest(), signature
+
+
+def _hash_batch(paths: Sequence[str]) -> List[Tuple[str, Optional[str], Optional[List[int]]]]:
+    out = []
+    for path in paths:
+        try:
+            digest, signature = hash_file(path)
+        except OSError:
+            digest, signature = None, None
+        out.append((path, digest, signature))
+    return out
+
+
+def list_files(repo_root: str) -> List[str]:
+    """Tracked files (what a clone contains); outside git, a walk honouring the root .gitignore."""
+    try:
+        out = subprocess.check_output(["git", "ls-files", "-z"], cwd=repo_root, stderr=subprocess.DEVNULL,
+                                      env=environ())
+        return [p for p in out.decode("utf-8", errors="surrogateescape").split("\0")
+                if p and os.path.isfile(os.path.join(repo_root, p))]
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    rules = [r for r in [IgnoreRules.load("", os.path.join(repo_root, ".gitignore"))] if r]
+    files = []
+    for dirpath, dirnames, filenames in os.walk(repo_root):
+        rel_dir = os.path.relpath(dirpath, repo_root).replace(os.sep, "/")
+        rel_dir = "" if rel_dir == "." else rel_dir + "/"
+        dirnames[:] = [d for d in dirnames if d not in ALWAYS_IGNORED
+                       and not is_ignored(rules, rel_dir + d, True)]
+        files += [rel_dir + f for f in filenames if not is_ignored(rules, rel_dir + f, False)]
+    return files
+
+
+class AssetIndex:
+    """Content hashes of repository files, cached by (inode, size, mtime).
+
+    Uncached files are hashed in a process pool; each worker memory-maps the
+    file so large binaries are never copied into Python byte strings.
+    """
+
+    def __init__(self, repo_root: str, workers: Optional[int] = None, use_cache: bool = True):
+        self.repo_root = os.path.abspath(repo_root)
+        self.workers = workers or os.cpu_count() or 1
+        self.use_cache = use_cache
+        self.cache_path = os.path.join(self.repo_root, STATE_DIR, "asset-hashes.json")
+        self.entries: Dict[str, dict] = {}
+        self.stats = {"files": 0, "bytes": 0, "hashed": 0, "cached": 0}
+
+    def _load(self) -> Dict[str, dict]:
+        if not self.use_cache:
+            return {}
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != CACHE_VERSION or data.get("hash") != HASH_NAME:
+            return {}
+        return data.get("files", {})
+
+    def _save(self):
+        if not self.use_cache:
+            return
+        path = state_path(self.repo_root, "asset-hashes.json")
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"version": CACHE_VERSION, "hash": HASH_NAME, "files": self.entries},
+                      fh, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    def build(self, files: Optional[Sequence[str]] = None) -> "AssetIndex":
+        cached = self._load()
+        todo: Dict[str, dict] = {}
+        for rel in files if files is not None else list_files(self.repo_root):
+            try:
+                st = os.stat(os.path.join(self.repo_root, rel))
+            except OSError:
+                continue
+            key = [st.st_ino, st.st_size, st.st_mtime_ns]
+            old = cached.get(rel)
+            self.stats["files"] += 1
+            self.stats["bytes"] += st.st_size
+            if old and old["key"] == key:
+                self.entries[rel] = old
+                self.stats["cached"] += 1
+            else:
+                todo[rel] = {"key": key, "size": st.st_size}
+
+        paths = [os.path.join(self.repo_root, rel) for rel in todo]
+        if len(paths) < POOL_THRESHOLD or self.workers == 1:
+            results = _hash_batch(paths)
+        else:
+            step = max(1, len(paths) // (self.workers * 4))
+            batches = [paths[i:i + step] for i in range(0, len(paths), step)]
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                results = [r for batch in pool.map(_hash_batch, batches) for r in batch]
+        for (rel, entry), (_, digest, signature) in zip(todo.items(), results):
+            if digest is None:
+                continue
+            entry.update(hash=digest, minhash=signature)
+            self.entries[rel] = entry
+            self.stats["hashed"] += 1
+        self._save()
+        return self
+
+    def duplicates(self) -> List[dict]:
+        groups: Dict[Tuple[int, str], List[str]] = {}
+        for rel, e in self.entries.items():
+            if e["size"]:
+                groups.setdefault((e["size"], e["hash"]), []).append(rel)
+        result = [{"hash": h, "size": size, "paths": sorted(paths), "wasted_bytes": size * (len(paths) - 1)}
+                  for (size, h), paths in groups.items() if len(paths) > 1]
+        return sorted(result, key=lambda g: -g["wasted_bytes"])
+
+    def near_duplicates(self, threshold: float = 0.8) -> List[dict]:
+        """Pairs of text files whose estimated line-set Jaccard similarity is at least `threshold`.
+
+        Candidates come from locality-sensitive hashing over bands of the
+        MinHash signature, so files are never compared all-pairs.
+        """
+        rows = MINHASH_PERMS // LSH_BANDS
+        buckets: Dict[Tuple[int, Tuple[int, ...]], List[str]] = {}
+        for rel, e in self.entries.items():
+            if e.get("minhash"):
+                for band in range(LSH_BANDS):
+                    key = (band, tuple(e["minhash"][band * rows:(band + 1) * rows]))
+                    buckets.setdefault(key, []).append(rel)
+        seen = set()
+        pairs = []
+        for members in buckets.values():
+            for i, a in enumerate(members):
+                for b in members[i + 1:]:
+                    pair = (a, b) if a < b else (b, a)
+                    if pair in seen:
+                        continue
+                    seen.add(pair)
+                    ea, eb = self.entries[a], self.entries[b]
+                    if ea["hash"] == eb["hash"]:
+                        continue  # exact duplicates are reported separately
+                    similarity = sum(x == y for x, y in zip(ea["minhash"], eb["minhash"])) / MINHASH_PERMS
+                    if similarity >= threshold:
+                        pairs.append({"paths": list(pair), "similarity": round(similarity, 2),
+                                      "bytes": min(ea["size"], eb["size"])})
+        return sorted(pairs, key=lambda p: (-p["similarity"], -p["bytes"]))
+
+    def largest(self, top: int = 10) -> List[dict]:
+        total = self.stats["bytes"] or 1
+        ranked = sorted(self.entries.items(), key=lambda kv: -kv[1]["size"])[:top]
+        return [{"path": rel, "size": e["size"], "share": round(e["size"] / total, 4)} for rel, e in ranked]
+
+
+def analyze_assets(repo_root: str, workers: Optional[int] = None, top: int = 10,
+                   threshold: float = 0.8, use_cache: bool = True) -> dict:
+    index = AssetIndex(repo_root, workers=workers, use_cache=use_cache).build()
+    duplicates = index.duplicates()
+    return {**index.stats, "hash": HASH_NAME,
+            "duplicate_groups": len(duplicates),
+            "duplicate_wasted_bytes": sum(g["wasted_bytes"] for g in duplicates),
+            "duplicates": duplicates,
+            "near_duplicates": index.near_duplicates(threshold),
+            "largest": index.largest(top)}
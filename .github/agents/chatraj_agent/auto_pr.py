@@ -1,9 +1,12 @@
-import os
 import sys
 from pathlib import Path
 
+from . import tracing
 from .agent import ChatrajAgent
-from typing import Dict
+from .daemon import environ
+from .scanner import STATE_DIR
+from .slugs import DEFAULT_BATCH_SIZE, MAPPING_DIR, detect_missing_slugs
+from typing import Dict, Union
 
 try:
     from pymongo import MongoClient
@@ -12,51 +15,58 @@ except Exception:
 
 
 def main():
+    try:
+        with tracing.span("auto_pr.main"):
+            return run()
+    finally:
+        # CHATRAJ_TRACE=<file> writes the spans of this run (see tracing.emit)
+        tracing.emit()
+
+
+def run(agent=None):
+    """The automated PR flow for `agent`'s repository (default: a new agent for the working directory)."""
     # Safety gate: only run when enabled via env
-    enable = os.environ.get("AUTO_PR_ENABLE", "false").lower() == "true"
+    enable = environ().get("AUTO_PR_ENABLE", "false").lower() == "true"
     if not enable:
         print("AUTO_PR_ENABLE not true; skipping automated PR flow.")
         return 0
 
-    token = os.environ.get("GITHUB_TOKEN")
+    token = environ().get("GITHUB_TOKEN")
     if not token:
         print("GITHUB_TOKEN not set; cannot create PR")
         return 2
 
-    agent = ChatrajAgent()
+    root = Path(agent.repo_root) if agent is not None else Path(".")
+    agent = agent or ChatrajAgent()
 
     branch = "automated/add-agent-config"
     # files to add in PR
-    files: Dict[str, str] = {
-        ".github/ISSUE_TEMPLATE/automated_issue.md": Path(".github/ISSUE_TEMPLATE/automated_issue.md").read_text() if Path(".github/ISSUE_TEMPLATE/automated_issue.md").exists() else "# Automated Issue Template",
+    files: Dict[str, Union[str, Path]] = {
+        ".github/ISSUE_TEMPLATE/automated_issue.md": (root / ".github/ISSUE_TEMPLATE/automated_issue.md").read_text() if (root / ".github/ISSUE_TEMPLATE/automated_issue.md").exists() else "# Automated Issue Template",
         ".github/agents/agent.config.yml": "enabled: true\nsource: chatraj-agent\n",
     }
 
-    # Optional: detect missing blog slugs via MongoDB and add a JSON mapping file to the PR
-    mongodb_uri = os.environ.get("MONGODB_URI")
+    # Optional: detect missing blog slugs via MongoDB and add NDJSON mapping chunks to the PR
+    mongodb_uri = environ().get("MONGODB_URI")
     if mongodb_uri and MongoClient is not None:
         try:
             client = MongoClient(mongodb_uri, serverSelectionTimeoutMS=5000)
             db = client.get_default_database()
-            blogs = db.get_collection("blogs")
-            missing = []
-            for doc in blogs.find({"$or": [{"slug": {"$exists": False}}, {"slug": None}]}, {"_id": 1, "title": 1}):
-                _id = str(doc.get("_id"))
-                title = doc.get("title") or ""
-                # simple slugify
-                slug = title.lower().strip().replace(" ", "-")
-                slug = ''.join(ch for ch in slug if (
-                    ch.isalnum() or ch == '-'))
-                missing.append({"_id": _id, "title": title, "slug": slug})
-            if missing:
-                import json
-
-                mapping_path = "Backend/scripts/auto_populate_slugs.json"
-                files[mapping_path] = json.dumps(missing, indent=2)
+            batch_size = int(environ().get(
+                "SLUG_SCAN_BATCH_SIZE", DEFAULT_BATCH_SIZE))
+            with tracing.span("auto_pr.slug_scan", batch_size=batch_size) as attrs:
+                stats = detect_missing_slugs(
+                    db, root / STATE_DIR / "slugs", batch_size=batch_size)
+                attrs.update(missing=stats["missing"], parts=len(stats["parts"]))
+            for part in stats["parts"]:
+                files[f"{MAPPING_DIR}/{part.name}"] = part
+            if stats["missing"]:
                 print(
-                    f"Found {len(missing)} blogs missing slugs; added {mapping_path} to PR files.")
+                    f"Found {stats['missing']} blogs missing slugs; added {len(stats['parts'])} mapping chunk(s) under {MAPPING_DIR}/ to PR files.")
             else:
                 print("No blogs missing slugs detected in DB.")
+            print(f"Slug scan: {stats['seconds']}s, {stats['existing_slugs']} existing slugs, "
+                  f"peak RSS {stats['peak_rss_mb'] or 'n/a'} MB")
         except Exception as e:
             print("MongoDB check failed:", e)
     else:
@@ -65,50 +75,54 @@ def main():
         else:
             print("MONGODB_URI not set; skipping DB slug detection.")
 
-    print("Creating branch and committing files via GitHub API...")
-    try:
-        ref = agent.create_branch_with_changes(
-            branch, files, commit_message="chore(agent): add automated issue template and agent config")
-        print("Created branch:", ref.get("ref")
-              if isinstance(ref, dict) else ref)
-    except Exception as e:
-        print("Failed to create branch:", e)
-        return 3
-
-    try:
-        pr_body_lines = [
-            "Adds agent config and issue template.",
+    pr_body_lines = [
+        "Adds agent config and issue template.",
+        "",
+        "---",
+        "This PR was created automatically by the Chatraj agent.",
+    ]
+    mapping_files = sorted(
+        p for p in files if p.startswith(MAPPING_DIR + "/"))
+    if mapping_files:
+        pr_body_lines += [
+            "",
+            "Detected missing blog slugs and included NDJSON mapping chunks:",
+        ] + [f"- `{p}`" for p in mapping_files] + [
             "",
-            "---",
-            "This PR was created automatically by the Chatraj agent.",
+            "To apply these mappings after PR merge, run the backend apply script on the server or locally (requires `MONGODB_URI`):",
+            "",
+            "```powershell",
+            "# on the server or local machine with access to the DB",
+            "$env:MONGODB_URI = \"<your_mongodb_uri>\";",
+            "cd Backend/scripts;",
+            "Get-ChildItem auto_populate_slugs/*.ndjson | ForEach-Object { node apply-slugs-from-json.mjs $_.FullName }",
+            "```",
+            "",
+            "Or apply all chunks with batched bulk writes from the Python agent (resumable, supports `--dry-run`):",
+            "",
+            "```powershell",
+            "python -m .github.agents.chatraj_agent.agent apply-slugs",
+            "```",
+            "",
+            "Alternatively, you can merge this PR and then run the `Backend/scripts/apply-slugs-from-json.mjs` script in CI with a protected secret for `MONGODB_URI`.",
         ]
-        mapping_path = "Backend/scripts/auto_populate_slugs.json"
-        if mapping_path in files:
-            pr_body_lines += [
-                "",
-                "Detected missing blog slugs and included a mapping file:",
-                f"- `{mapping_path}`",
-                "",
-                "To apply these mappings after PR merge, run the backend apply script on the server or locally (requires `MONGODB_URI`):",
-                "",
-                "```powershell",
-                "# on the server or local machine with access to the DB",
-                "$env:MONGODB_URI = \"<your_mongodb_uri>\";",
-                "cd Backend/scripts;",
-                "node apply-slugs-from-json.mjs ../auto_populate_slugs.json",
-                "```",
-                "",
-                "Alternatively, you can merge this PR and then run the `Backend/scripts/apply-slugs-from-json.mjs` script in CI with a protected secret for `MONGODB_URI`.",
-            ]
-
-        pr_body = "\n".join(pr_body_lines)
-
-        pr = agent.create_pull_request("chore(agent): add automated issue template and config",
-                                       head=branch, base="main", body=pr_body)
-        print("Created PR:", pr.get("html_url"))
+
+    pr_body = "\n".join(pr_body_lines)
+
+    print("Committing files and opening the PR via the GitHub API...")
+    try:
+        with tracing.span("auto_pr.publish", files=len(files)) as attrs:
+            result = agent.publish_pull_request(
+                branch, files, commit_message="chore(agent): add automated issue template and agent config",
+                title="chore(agent): add automated issue template and config", body=pr_body, base="main")
+            attrs["requests"] = result["requests"]
+        pr = result["pull_request"]
+        print("Committed to branch:", result["ref"])
+        print("Created PR:" if pr["created"] else "Updated PR:", pr["html_url"])
+        print(f"{result['requests']} GitHub requests via {result['transport']}")
     except Exception as e:
-        print("Failed to create PR:", e)
-        return 4
+        print("Failed to publish PR:", e)
+        return 3
 
     return 0
 
@@ -0,0 +1,133 @@
+"""Benchmark `apply-slugs` (unordered bulk_write) against per-document updates.
+
+Mirrors Backend/scripts/benchmark_update_keys.js: the per-document loop is
+what Backend/scripts/apply-slugs-from-json.mjs does today. Runs against an
+in-memory stand-in by default (with a simulated round-trip latency) or against
+a real server with --uri mongodb://localhost:27017/bench --latency 0.
+(mongomock's bulk_write does not accept the UpdateOne objects of pymongo>=4.9.)
+
+    python .github/agents/chatraj_agent/benchmarks/bench_apply_slugs.py --docs 5000
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from chatraj_agent.slugs import apply_slugs, write_chunks  # noqa: E402
+
+
+class LatencyCollection:
+    """Adds a fixed delay per round trip, like simulateDelay in the JS benchmark."""
+
+    def __init__(self, collection, latency: float):
+        self._collection = collection
+        self._latency = latency
+        self.round_trips = 0
+
+    def update_one(self, *args, **kwargs):
+        self.round_trips += 1
+        time.sleep(self._latency)
+        return self._collection.update_one(*args, **kwargs)
+
+    def bulk_write(self, *args, **kwargs):
+        self.round_trips += 1
+        time.sleep(self._latency)
+        return self._collection.bulk_write(*args, **kwargs)
+
+
+class MemoryCollection:
+    """Just enough of a pymongo Collection, keyed by _id, for this benchmark."""
+
+    def __init__(self):
+        self.docs = {}
+
+    def delete_many(self, _filter):
+        self.docs.clear()
+
+    def insert_many(self, docs):
+        for d in docs:
+            self.docs[d["_id"]] = dict(d)
+
+    def _set(self, _filter, update):
+        doc = self.docs.get(_filter["_id"])
+        if doc is None:
+            return 0, 0
+        changed = any(doc.get(k) != v for k, v in update["$set"].items())
+        doc.update(update["$set"])
+        return 1, int(changed)
+
+    def update_one(self, _filter, update):
+        matched, modified = self._set(_filter, update)
+        return SimpleNamespace(matched_count=matched, modified_count=modified)
+
+    def bulk_write(self, ops, ordered=True):
+        results = [self._set(op._filter, op._doc) for op in ops]
+        return SimpleNamespace(matched_count=sum(r[0] for r in results),
+                               modified_count=sum(r[1] for r in results))
+
+    def update_many(self, _filter, update):
+        for doc in self.docs.values():
+            for k in update.get("$unset", {}):
+                doc.pop(k, None)
+
+    def count_documents(self, _filter):
+        return sum(1 for d in self.docs.values() if "slug" in d)
+
+    def drop(self):
+        self.docs.clear()
+
+
+def get_collection(uri):
+    if uri:
+        from pymongo import MongoClient
+
+        return MongoClient(uri).get_default_database().get_collection("bench_blogs")
+    return MemoryCollection()
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--docs", type=int, default=5000)
+    p.add_argument("--batch-size", type=int, default=1000)
+    p.add_argument("--latency", type=float, default=0.001,
+                   help="Simulated round-trip latency in seconds (default 1 ms; use 0 with --uri)")
+    p.add_argument("--uri", help="Benchmark a real MongoDB instead of the in-memory stand-in")
+    args = p.parse_args(argv)
+
+    raw = get_collection(args.uri)
+    raw.delete_many({})
+    raw.insert_many([{"_id": f"blog{i}", "title": f"Post {i}"} for i in range(args.docs)])
+    items = [{"_id": f"blog{i}", "title": f"Post {i}", "slug": f"post-{i}"} for i in range(args.docs)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        parts = write_chunks(iter(items), Path(tmp))
+
+        print("Testing per-document updates...")
+        coll = LatencyCollection(raw, args.latency)
+        start = time.perf_counter()
+        for it in items:
+            coll.update_one({"_id": it["_id"]}, {"$set": {"slug": it["slug"]}})
+        per_doc = time.perf_counter() - start
+        per_doc_trips = coll.round_trips
+        print(f"Per-document approach took: {per_doc * 1000:.2f} ms ({per_doc_trips} round trips)")
+
+        raw.update_many({}, {"$unset": {"slug": ""}})
+        print("Testing unordered bulk_write...")
+        coll = LatencyCollection(raw, args.latency)
+        start = time.perf_counter()
+        stats = apply_slugs(coll, parts, batch_size=args.batch_size)
+        bulk = time.perf_counter() - start
+        print(f"bulk_write approach took: {bulk * 1000:.2f} ms ({coll.round_trips} round trips, "
+              f"{stats['modified']} modified)")
+
+    assert raw.count_documents({"slug": {"$exists": True}}) == args.docs
+    print(f"\nImprovement: {per_doc / bulk:.2f}x faster, {per_doc_trips // max(1, coll.round_trips)}x fewer round trips")
+    raw.drop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Benchmark `create_branch_with_changes` against a local mock GitHub API.
+
+Compares the old flow (one serial blob upload per file) with the current one
+(local blob hashing, inline small files, concurrent uploads).
+
+    python .github/agents/chatraj_agent/benchmarks/bench_branch_changes.py --files 300
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from chatraj_agent.agent import ChatrajAgent, git_blob_sha  # noqa: E402
+
+
+class MockGitHub(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency: float, base_blobs):
+        super().__init__(("127.0.0.1", 0), MockHandler)
+        self.latency = latency
+        self.base_blobs = base_blobs
+        self.counts = Counter()
+        self.lock = threading.Lock()
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, payload):
+        time.sleep(self.server.latency)
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _count(self):
+        key = self.command + " " + self.path.split("/repos/o/r", 1)[-1].split("?")[0]
+        for prefix in ("/git/ref/heads/", "/git/commits/", "/git/trees/"):
+            if key.startswith(self.command + " " + prefix):
+                key = self.command + " " + prefix + "*"
+        with self.server.lock:
+            self.server.counts[key] += 1
+
+    def do_GET(self):
+        self._count()
+        if "/git/ref/heads/" in self.path:
+            return self._reply(200, {"object": {"sha": "base-sha"}})
+        if self.path.endswith("/git/commits/base-sha"):
+            return self._reply(200, {"tree": {"sha": "base-tree"}})
+        if "/git/trees/base-tree" in self.path:
+            tree = [{"path": p, "type": "blob", "sha": s} for p, s in self.server.base_blobs.items()]
+            return self._reply(200, {"tree": tree})
+        return self._reply(404, {})
+
+    def do_POST(self):
+        self._count()
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if self.path.endswith("/git/blobs"):
+            return self._reply(201, {"sha": git_blob_sha(payload["content"].encode())})
+        if self.path.endswith("/git/refs"):
+            return self._reply(201, {"ref": payload["ref"]})
+        return self._reply(201, {"sha": "0" * 40})
+
+
+def legacy_create_branch(api_url, branch, files):
+    """The pre-optimisation flow: every file is uploaded serially as a blob."""
+    import requests
+
+    api = f"{api_url}/repos/o/r"
+    auth = {"Authorization": f"token {os.environ['GITHUB_TOKEN']}"}
+    base_sha = requests.get(f"{api}/git/ref/heads/main", headers=auth).json()["object"]["sha"]
+    tree = []
+    for path, content in files.items():
+        sha = requests.post(f"{api}/git/blobs", json={"content": content, "encoding": "utf-8"},
+                            headers=auth).json()["sha"]
+        tree.append({"path": path, "mode": "100644", "type": "blob", "sha": sha})
+    tree_sha = requests.post(f"{api}/git/trees", json={"tree": tree, "base_tree": base_sha},
+                             headers=auth).json()["sha"]
+    commit_sha = requests.post(f"{api}/git/commits", json={"message": "bench", "tree": tree_sha,
+                               "parents": [base_sha]}, headers=auth).json()["sha"]
+    return requests.post(f"{api}/git/refs", json={"ref": f"refs/heads/{branch}", "sha": commit_sha},
+                         headers=auth).json()
+
+
+def make_files(n, unchanged_ratio, large_ratio):
+    files, base = {}, {}
+    for i in range(n):
+        path = f"Backend/scripts/generated/file_{i:04d}.json"
+        size = 64 * 1024 if i % int(1 / large_ratio) == 0 else 2 * 1024
+        content = json.dumps({"i": i, "pad": "x" * size})
+        files[path] = content
+        if i < n * unchanged_ratio:
+            base[path] = git_blob_sha(content.encode())
+    return files, base
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--files", type=int, default=300)
+    p.add_argument("--latency", type=float, default=0.02, help="Mock API latency per request (s)")
+    p.add_argument("--unchanged", type=float, default=0.5, help="Fraction of files already in base tree")
+    p.add_argument("--large", type=float, default=0.1, help="Fraction of files above the inline limit")
+    args = p.parse_args(argv)
+
+    files, base = make_files(args.files, args.unchanged, args.large)
+    server = MockGitHub(args.latency, base)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ["GITHUB_TOKEN"] = "bench-token"
+    os.environ["GITHUB_API_URL"] = url
+
+    results = {}
+    for name, run in (("serial", lambda: legacy_create_branch(url, "bench-serial", files)),
+                      ("optimized", lambda: ChatrajAgent().create_branch_with_changes(
+                          "bench-opt", files, repo="o/r"))):
+        server.counts.clear()
+        start = time.perf_counter()
+        run()
+        results[name] = (time.perf_counter() - start, sum(server.counts.values()), dict(server.counts))
+    server.shutdown()
+
+    for name, (elapsed, total, counts) in results.items():
+        print(f"{name:>9}: {total:4d} requests in {elapsed * 1000:8.1f} ms  {counts}")
+    serial, opt = results["serial"], results["optimized"]
+    print(f"\nRequests: {serial[1]} -> {opt[1]} ({serial[1] / opt[1]:.1f}x fewer)")
+    print(f"Wall time: {serial[0] / opt[0]:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
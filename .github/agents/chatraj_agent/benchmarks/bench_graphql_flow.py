@@ -0,0 +1,77 @@
+"""Compare the REST and GraphQL commit-and-PR flows against a local GitHub stand-in.
+
+Each flow commits `--files` files to a new branch, opens a PR and posts the
+run-results comment; the GraphQL flow then syncs the branch a second time
+(new commit, PR update and comment upsert).
+
+    python .github/agents/chatraj_agent/benchmarks/bench_graphql_flow.py --files 50
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "tests"))
+
+from chatraj_agent.agent import ChatrajAgent  # noqa: E402
+from github_standin import GitHubStandIn  # noqa: E402
+
+
+def make_files(n, unchanged_ratio):
+    files, base = {}, {}
+    for i in range(n):
+        path = f"Backend/scripts/generated/file_{i:04d}.json"
+        content = json.dumps({"i": i, "pad": "x" * (64 * 1024 if i % 10 == 0 else 2 * 1024)})
+        files[path] = content
+        if i < n * unchanged_ratio:
+            base[path] = content
+    return files, base
+
+
+def run(transport, files, base, latency, syncs):
+    server = GitHubStandIn(base, latency=latency).start()
+    os.environ["GITHUB_API_URL"] = server.url
+    rounds = []
+    try:
+        with tempfile.TemporaryDirectory() as state:
+            agent = ChatrajAgent(repo_root=state)
+            for i in range(syncs):
+                if i:
+                    files = {**files, "Backend/scripts/generated/file_0000.json": json.dumps({"sync": i})}
+                server.counts.clear()
+                start = time.perf_counter()
+                agent.publish_pull_request("bench", files, f"bench {i}", "Bench", comment=f"results {i}",
+                                           repo="o/r", transport=transport)
+                rounds.append((time.perf_counter() - start, server.total(), dict(server.counts)))
+    finally:
+        server.stop()
+    return rounds
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--files", type=int, default=50)
+    p.add_argument("--latency", type=float, default=0.05, help="Stand-in latency per request (s)")
+    p.add_argument("--unchanged", type=float, default=0.5, help="Fraction of files already on main")
+    args = p.parse_args(argv)
+
+    files, base = make_files(args.files, args.unchanged)
+    os.environ["GITHUB_TOKEN"] = "bench-token"
+    results = {"rest": run("rest", files, base, args.latency, 1),
+               "graphql": run("graphql", files, base, args.latency, 2)}
+
+    for name, rounds in results.items():
+        for i, (elapsed, total, counts) in enumerate(rounds):
+            label = f"{name} {'create' if i == 0 else 'sync'}"
+            print(f"{label:>14}: {total:4d} requests in {elapsed * 1000:8.1f} ms  {counts}")
+    rest, gql = results["rest"][0], results["graphql"][0]
+    print(f"\nRequests: {rest[1]} -> {gql[1]} ({rest[1] / gql[1]:.1f}x fewer)")
+    print(f"Wall time: {rest[0] / gql[0]:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
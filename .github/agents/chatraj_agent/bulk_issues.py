@@ -0,0 +1,122 @@
+import contextvars
+import json
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, Set, Tuple
+
+# Issue fields accepted from each input line; anything else is ignored.
+ISSUE_FIELDS = ("title", "body", "labels", "assignees", "milestone")
+
+
+def iter_issue_specs(path: str) -> Iterator[Tuple[int, dict]]:
+    """Yield (line_number, spec) for each non-blank line of a JSONL file."""
+    with open(path, "r", encoding="utf-8") as fh:
+        for lineno, line in enumerate(fh, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                spec = json.loads(line)
+            except ValueError as e:
+                yield lineno, {"_error": f"invalid JSON: {e}"}
+                continue
+            if not isinstance(spec, dict) or not spec.get("title"):
+                yield lineno, {"_error": "missing title"}
+                continue
+            yield lineno, spec
+
+
+def load_completed_titles(output: str) -> Set[str]:
+    """Titles already created or skipped by a previous (possibly interrupted) run."""
+    done = set()
+    if not os.path.exists(output):
+        return done
+    with open(output, "r", encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue  # a torn last line from an interrupted run
+            if rec.get("status") in ("created", "exists"):
+                done.add(rec.get("title"))
+    return done
+
+
+def list_open_issue_titles(gh, repo: str) -> Set[str]:
+    """Titles of all open issues (pull requests excluded), following pagination."""
+    titles = set()
+    url = f"/repos/{repo}/issues?state=open&per_page=100"
+    while url:
+        resp = gh.get(url)
+        if resp.status_code != 200:
+            raise RuntimeError(
+                f"Failed to list issues: {resp.status_code} {resp.text}")
+        for issue in resp.json():
+            if "pull_request" not in issue:
+                titles.add(issue.get("title"))
+        url = (getattr(resp, "links", None) or {}).get("next", {}).get("url")
+    return titles
+
+
+def create_issues(gh, repo: str, source: str, output: str, concurrency: int = 4) -> Dict[str, int]:
+    """Create the issues listed in `source` (JSONL), appending results to `output` (NDJSON).
+
+    Input is streamed with at most `2 * concurrency` issues in flight. Titles
+    that are already open, already recorded in `output`, or repeated in the
+    input are not submitted again, so re-running after an interruption
+    resumes where the previous run stopped.
+    """
+    existing = list_open_issue_titles(gh, repo)
+    completed = load_completed_titles(output)
+    seen: Set[str] = set()
+    counts = {"created": 0, "exists": 0, "resumed": 0, "failed": 0, "invalid": 0}
+    lock = threading.Lock()
+
+    def submit(lineno: int, spec: dict) -> dict:
+        payload = {k: spec[k] for k in ISSUE_FIELDS if k in spec}
+        try:
+            resp = gh.post(f"/repos/{repo}/issues", json=payload)
+        except Exception as e:
+            return {"line": lineno, "title": spec["title"], "status": "failed", "error": str(e)}
+        if resp.status_code not in (200, 201):
+            return {"line": lineno, "title": spec["title"], "status": "failed",
+                    "error": f"{resp.status_code} {resp.text[:200]}"}
+        data = resp.json()
+        return {"line": lineno, "title": spec["title"], "status": "created",
+                "number": data.get("number"), "html_url": data.get("html_url")}
+
+    with open(output, "a", encoding="utf-8") as out:
+        def record(rec: dict):
+            with lock:
+                counts[rec["status"]] += 1
+                out.write(json.dumps(rec) + "\n")
+                out.flush()
+
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            pending = set()
+            for lineno, spec in iter_issue_specs(source):
+                if "_error" in spec:
+                    record({"line": lineno, "status": "invalid", "error": spec["_error"]})
+                    continue
+                title = spec["title"]
+                if title in completed:
+                    counts["resumed"] += 1
+                    continue
+                if title in existing or title in seen:
+                    record({"line": lineno, "title": title, "status": "exists"})
+                    continue
+                seen.add(title)
+                pending.add(pool.submit(contextvars.copy_context().run, submit, lineno, spec))
+                if len(pending) >= 2 * concurrency:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        record(fut.result())
+            for fut in pending:
+                record(fut.result())
+    return counts
+
+
+def default_output(source: str) -> str:
+    base, _ = os.path.splitext(source)
+    return base + ".results.ndjson"
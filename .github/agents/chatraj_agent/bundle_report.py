@@ -0,0 +1,220 @@
+import json
+import os
+import re
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+SIZE_KEYS = ("raw", "gzip", "brotli")
+BUDGETS_FILE = "frontend/bundle-budgets.json"
+HISTORY_LIMIT = 20
+# Size changes (gzip) smaller than this are left out of the PR comment
+DEFAULT_THRESHOLD = 1024
+# Content hash Vite adds to emitted file names, e.g. index-B4x9_kQz.css
+_HASH = re.compile(r"-[A-Za-z0-9_-]{8}(?=\.[a-z]+$)")
+_PACKAGE = re.compile(r"node_modules/((?:@[^/]+/)?[^/]+)")
+
+
+def _sizes(item: dict) -> Dict[str, int]:
+    return {k: item.get(k) or 0 for k in SIZE_KEYS}
+
+
+def _add(total: Dict[str, int], item: dict):
+    for k in SIZE_KEYS:
+        total[k] = total.get(k, 0) + (item.get(k) or 0)
+
+
+def package_of(module_id: str) -> str:
+    """npm package a module belongs to (the innermost node_modules), `(app)` for src/, else `(other)`."""
+    found = _PACKAGE.findall(module_id)
+    if found:
+        return found[-1]
+    return "(app)" if module_id.startswith("src/") else "(other)"
+
+
+def _unique(key: str, seen: Dict[str, int]) -> str:
+    seen[key] = seen.get(key, 0) + 1
+    return key if seen[key] == 1 else f"{key}#{seen[key]}"
+
+
+def summarize(stats: dict, build_seconds: Optional[float] = None) -> dict:
+    """Reduce the bundle-stats plugin output to hash-free, comparable keys.
+
+    Chunks are keyed by their facade module (or chunk name), assets by file
+    name without the content hash. Each entry's `initial` size is what a
+    first visit downloads: the entry chunk, its static imports and their CSS.
+    """
+    by_file = {c["file"]: c for c in stats["chunks"]}
+    assets_by_file = {a["file"]: a for a in stats["assets"]}
+    seen: Dict[str, int] = {}
+    chunks, packages, modules = {}, {}, []
+    totals = {"js": {}, "css": {}, "all": {}}
+    for chunk in stats["chunks"]:
+        key = _unique(chunk.get("facade") or f"{chunk['name']}.js", seen)
+        chunks[key] = _sizes(chunk)
+        _add(totals["js"], chunk)
+        for mod in chunk.get("modules", []):
+            _add(packages.setdefault(package_of(mod["id"]), {}), mod)
+            modules.append({"id": mod["id"], "chunk": key, **_sizes(mod)})
+    assets = {}
+    for asset in stats["assets"]:
+        key = _unique(asset.get("name") or _HASH.sub("", os.path.basename(asset["file"])), seen)
+        assets[key] = _sizes(asset)
+        if asset["file"].endswith(".css"):
+            _add(totals["css"], asset)
+    _add(totals["all"], totals["js"])
+    _add(totals["all"], totals["css"])
+
+    entries = {}
+    for chunk in stats["chunks"]:
+        if not chunk.get("isEntry"):
+            continue
+        files, stack = set(), [chunk["file"]]
+        while stack:
+            f = stack.pop()
+            if f in files or f not in by_file:
+                continue
+            files.add(f)
+            stack.extend(by_file[f].get("imports", []))
+        initial = {}
+        css = {c for f in files for c in by_file[f].get("css", [])}
+        for f in files:
+            _add(initial, by_file[f])
+        for c in css:
+            _add(initial, assets_by_file.get(c, {}))
+        entries[chunk.get("facade") or chunk["name"]] = {**{k: initial.get(k, 0) for k in SIZE_KEYS},
+                                                         "files": len(files) + len(css)}
+    return {
+        "build_seconds": round(build_seconds, 2) if build_seconds is not None else None,
+        "totals": {k: {s: v.get(s, 0) for s in SIZE_KEYS} for k, v in totals.items()},
+        "entries": entries,
+        "chunks": chunks,
+        "assets": assets,
+        "packages": dict(sorted(packages.items(), key=lambda kv: -kv[1]["gzip"])),
+        "top_modules": sorted(modules, key=lambda m: -m["gzip"])[:20],
+    }
+
+
+def load_budgets(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def _over(what: str, sizes: dict, budget: dict) -> List[dict]:
+    found = []
+    for key in SIZE_KEYS:
+        limit = budget.get(f"{key}_kb")
+        if limit is not None and sizes.get(key, 0) > limit * 1024:
+            found.append({"what": what, "metric": key, "limit": int(limit * 1024), "actual": sizes[key]})
+    return found
+
+
+def check_budgets(summary: dict, budgets: dict) -> List[dict]:
+    """Budgets exceeded by `summary`.
+
+    Keys of the budgets file: `build_seconds`, and size budgets
+    (`{"gzip_kb": N, "raw_kb": N, "brotli_kb": N}`) under `total`, `initial`
+    (every entry's first load), `chunk` (any single chunk), `entries` and
+    `packages` (by name).
+    """
+    over = []
+    limit = budgets.get("build_seconds")
+    if limit is not None and summary.get("build_seconds") is not None and summary["build_seconds"] > limit:
+        over.append({"what": "build time", "metric": "seconds", "limit": limit, "actual": summary["build_seconds"]})
+    over += _over("total JS + CSS", summary["totals"]["all"], budgets.get("total", {}))
+    for name, sizes in summary["entries"].items():
+        over += _over(f"initial load of {name}", sizes, {**budgets.get("initial", {}),
+                                                       **budgets.get("entries", {}).get(name, {})})
+    for name, sizes in summary["chunks"].items():
+        over += _over(f"chunk {name}", sizes, budgets.get("chunk", {}))
+    for name, budget in budgets.get("packages", {}).items():
+        over += _over(f"package {name}", summary["packages"].get(name, {}), budget)
+    return over
+
+
+def diff(previous: dict, current: dict, threshold: int = DEFAULT_THRESHOLD) -> Dict[str, List[dict]]:
+    """Rows whose gzip size changed by at least `threshold` bytes, per section; added and removed rows too."""
+    changes = {}
+    for section in ("totals", "entries", "chunks", "assets", "packages"):
+        before, after = previous.get(section, {}), current.get(section, {})
+        rows = []
+        for name in sorted(set(before) | set(after)):
+            old, new = before.get(name), after.get(name)
+            if old is not None and new is not None and abs(new["gzip"] - old["gzip"]) < threshold:
+                continue
+            rows.append({"name": name, "before": old and _sizes(old), "after": new and _sizes(new)})
+        if rows:
+            changes[section] = rows
+    return changes
+
+
+def load_history(path: str) -> List[dict]:
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def baseline(history: List[dict], commit: str, base: Optional[str] = None) -> Optional[dict]:
+    """The recorded build of `base` if there is one, else the latest build of another
+    commit (or of this one, if that is all there is)."""
+    for record in reversed(history):
+        if base and record["commit"] == base:
+            return record
+    for record in reversed(history):
+        if record["commit"] != commit:
+            return record
+    return history[-1] if history else None
+
+
+def record_build(path: str, history: List[dict], commit: str, summary: dict):
+    history = history + [{"commit": commit, "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                          "summary": summary}]
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(history[-HISTORY_LIMIT:], fh)
+
+
+def _kb(n: Optional[int]) -> str:
+    return "–" if n is None else f"{n / 1024:.1f} kB"
+
+
+def _delta(old: Optional[dict], new: Optional[dict], key: str) -> str:
+    if new is None:
+        return f"removed ({_kb(old[key])})"
+    if old is None:
+        return f"{_kb(new[key])} (new)"
+    change = new[key] - old[key]
+    pct = f", {change / old[key]:+.1%}" if old[key] else ""
+    return f"{_kb(new[key])} ({'+' if change >= 0 else '−'}{_kb(abs(change))}{pct})"
+
+
+SECTION_TITLES = {"totals": "Totals", "entries": "Initial load per entry", "chunks": "Chunks",
+                  "assets": "Assets", "packages": "Packages"}
+
+
+def format_comment(summary: dict, changes: Optional[Dict[str, List[dict]]], over: List[dict],
+                   previous: Optional[dict] = None, threshold: int = DEFAULT_THRESHOLD) -> str:
+    """Markdown for the PR comment: only what changed since the baseline, plus budget overruns."""
+    lines = ["### Frontend bundle"]
+    if previous is None:
+        all_sizes = summary["totals"]["all"]
+        lines.append(f"\nNo earlier build recorded. Total JS + CSS: {_kb(all_sizes['raw'])} raw, "
+                     f"{_kb(all_sizes['gzip'])} gzip, {_kb(all_sizes['brotli'])} brotli.")
+    else:
+        commit = previous["commit"][:7]
+        seconds = (summary.get("build_seconds"), previous["summary"].get("build_seconds"))
+        if None not in seconds:
+            lines.append(f"\nBuild time {seconds[0]:.1f}s ({seconds[0] - seconds[1]:+.1f}s vs `{commit}`).")
+        if not changes:
+            lines.append(f"\nNo gzip size change of {_kb(threshold)} or more since `{commit}`.")
+        for section, rows in (changes or {}).items():
+            lines += [f"\n**{SECTION_TITLES[section]}** (vs `{commit}`)", "",
+                      "| | raw | gzip | brotli |", "|---|---:|---:|---:|"]
+            lines += [f"| `{r['name']}` | " + " | ".join(_delta(r["before"], r["after"], k) for k in SIZE_KEYS) + " |"
+                      for r in rows]
+    if over:
+        lines += ["", "**Over budget:**"]
+        lines += [f"- {o['what']}: {o['actual']:.1f}s (budget {o['limit']}s)" if o["metric"] == "seconds"
+                  else f"- {o['what']}: {_kb(o['actual'])} {o['metric']} (budget {_kb(o['limit'])})" for o in over]
+    return "\n".join(lines) + "\n"
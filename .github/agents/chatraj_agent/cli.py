@@ -4,18 +4,108 @@ import argparse
 def build_parser():
     p = argparse.ArgumentParser(
         prog="chatraj-agent", description="Chatraj project management agent")
+    p.add_argument("--trace", metavar="FILE", default=None,
+                   help="Write timing spans to FILE and print a summary (also: CHATRAJ_TRACE)")
+    p.add_argument("--trace-format", choices=["json", "chrome"], default=None,
+                   help="Trace file format; `chrome` loads in chrome://tracing or Perfetto (default: json)")
+    p.add_argument("--profile", action="store_true",
+                   help="Run the command under cProfile and print the top functions")
+    p.add_argument("--profile-out", metavar="FILE", default=None,
+                   help="Where --profile saves its stats (default: .chatraj-agent/profile.pstats)")
+    p.add_argument("--no-history", action="store_true",
+                   help="Do not record this run in .chatraj-agent/perf-history.sqlite")
     sub = p.add_subparsers(dest="command")
 
-    sub.add_parser("scan", help="Scan repository and print file/dir counts")
-    sub.add_parser(
+    sc = sub.add_parser("scan", help="Scan repository and print file/dir counts")
+    sc.add_argument("--workers", type=int, default=None,
+                    help="Number of scanner threads (default: 4x CPU count)")
+    sc.add_argument("--top", type=int, default=10,
+                    help="Number of largest files to report")
+    sc.add_argument("--no-index", action="store_true",
+                    help="Ignore and do not update the on-disk scan index")
+    asp = sub.add_parser(
+        "assets", help="Find duplicate, near-duplicate and largest tracked files")
+    asp.add_argument("--workers", type=int, default=None,
+                     help="Hashing processes (default: CPU count)")
+    asp.add_argument("--top", type=int, default=10,
+                     help="Number of largest files to report")
+    asp.add_argument("--similarity", type=float, default=0.8,
+                     help="Minimum estimated similarity for near-duplicate text files (0-1)")
+    asp.add_argument("--no-cache", action="store_true",
+                     help="Ignore and do not update the hash cache")
+    dc = sub.add_parser(
+        "docker-context", help="Analyse a Docker build context, predicted layer rebuilds and savings")
+    dc.add_argument("--context", default="Backend",
+                    help="Build context directory relative to the repo root (default: Backend)")
+    dc.add_argument("--dockerfile", default=None,
+                    help="Dockerfile path (default: <context>/Dockerfile)")
+    dc.add_argument("--base", default="main",
+                    help="Git ref whose diff predicts rebuilt layers (empty string to skip)")
+    dc.add_argument("--history", type=int, default=100,
+                    help="Recent commits used to estimate rebuilds a suggestion avoids")
+    dc.add_argument("--rebuild-seconds", type=float, default=None,
+                    help="Typical image rebuild time, to turn avoided rebuilds into seconds saved")
+    dc.add_argument("--top", type=int, default=10,
+                    help="Number of largest context files to report")
+    bt = sub.add_parser(
         "backend-test", help="Run Backend tests (npm test in Backend)")
-    sub.add_parser("frontend-test",
-                   help="Run frontend tests (npm test in frontend)")
+    ft = sub.add_parser("frontend-test",
+                        help="Run frontend tests (npm test in frontend)")
+    for tp in (bt, ft):
+        tp.add_argument("--changed-since", metavar="BASE", default=None,
+                        help="Only run tests affected by changes since git ref BASE")
+    at = sub.add_parser(
+        "affected-tests", help="List tests affected by changes since a git ref, and why")
+    at.add_argument("--base", default="main",
+                    help="Git ref to diff against (default: main)")
+    ta = sub.add_parser(
+        "test-all", help="Run Backend (Jest) and frontend (Vitest) tests in parallel shards")
+    ta.add_argument("--shards", type=int, default=None,
+                    help="Shards per suite (default: CPU count split across suites)")
+    ta.add_argument("--suite", dest="suites", action="append", choices=["backend", "frontend"],
+                    help="Limit to one suite (repeatable; default: both)")
+    ins = sub.add_parser(
+        "install", help="Install npm dependencies via the content-addressed node_modules cache")
+    ins.add_argument("--project", dest="projects", action="append", choices=["backend", "frontend"],
+                     help="Project to install (repeatable; default: both)")
+    ins.add_argument("--command", dest="install_command", default="npm ci",
+                     help="Install command run on a cache miss (default: npm ci)")
+    ins.add_argument("--no-cache", action="store_true",
+                     help="Always run the install command and leave the cache untouched")
+    ins.add_argument("--max-size-mb", type=int, default=None,
+                     help="Cache size cap before LRU eviction (default: CHATRAJ_NPM_CACHE_MAX_MB or 5120)")
+    ca = sub.add_parser("cache", help="Inspect the node_modules cache")
+    ca_sub = ca.add_subparsers(dest="cache_command")
+    ca_sub.add_parser("stats", help="Show cache size, hit rates and bytes saved per project")
     sub.add_parser("generate-frontend-sitemap",
-                   help="Run frontend sitemap generator script")
+                   help="Generate the sitemap index in .chatraj-agent/sitemap (blogs included if MONGODB_URI is set)")
     sub.add_parser("populate-slugs", help="Run backend slug population script")
     sub.add_parser("generate-backend-sitemap",
-                   help="Run backend sitemap generator script")
+                   help="Generate the sitemap index with blog URLs streamed from MongoDB (requires MONGODB_URI)")
+
+    ap = sub.add_parser(
+        "apply-slugs", help="Apply slug mapping files to MongoDB with bulk writes (requires MONGODB_URI)")
+    ap.add_argument("paths", nargs="*",
+                    help="Mapping files or chunk directories (default: Backend/scripts/auto_populate_slugs/)")
+    ap.add_argument("--batch-size", type=int, default=None,
+                    help="Updates per unordered bulk_write (default: 1000)")
+    ap.add_argument("--dry-run", "-n", action="store_true",
+                    help="Print what would be updated without writing")
+
+    ws = sub.add_parser(
+        "watch-slugs", help="Fill missing blog slugs from a MongoDB change stream (requires MONGODB_URI)")
+    ws.add_argument("--mongodb-uri", default=None, help="Database to watch (default: MONGODB_URI)")
+    ws.add_argument("--batch-size", type=int, default=None,
+                    help="Most events per micro-batch / bulk_write (default: 1000)")
+    ws.add_argument("--flush-interval", type=float, default=None,
+                    help="Longest time (s) an event waits in a micro-batch (default: 1)")
+    ws.add_argument("--duration", type=float, default=None,
+                    help="Stop after this many seconds (default: run until interrupted)")
+    ws.add_argument("--max-events", type=int, default=None, help="Stop after this many change events")
+    ws.add_argument("--metrics-every", type=float, default=10.0,
+                    help="Seconds between metrics lines (lag, throughput) on stdout")
+    ws.add_argument("--reset", action="store_true",
+                    help="Forget the saved resume token: rescan for missing slugs and start a new stream")
 
     ci = sub.add_parser(
         "create-issue", help="Create a GitHub issue (requires GITHUB_TOKEN)")
@@ -24,4 +114,149 @@ def build_parser():
     ci.add_argument("--repo", required=False,
                     help="owner/repo (if not provided, inferred from git remote)")
 
+    cis = sub.add_parser(
+        "create-issues", help="Create GitHub issues in bulk from a JSONL file (requires GITHUB_TOKEN)")
+    cis.add_argument("--from", dest="source", required=True,
+                     help="JSONL file with one {title, body, labels?, assignees?} object per line")
+    cis.add_argument("--output", required=False,
+                     help="NDJSON results file, also used to resume (default: <source>.results.ndjson)")
+    cis.add_argument("--concurrency", type=int, default=4,
+                     help="Maximum number of issues submitted at once")
+    cis.add_argument("--repo", required=False,
+                     help="owner/repo (if not provided, inferred from git remote)")
+
+    prc = sub.add_parser(
+        "pr-comment", help="Add or update the agent's comment on a pull request (requires GITHUB_TOKEN)")
+    prc.add_argument("number", type=int, help="Pull request number")
+    prb = prc.add_mutually_exclusive_group(required=True)
+    prb.add_argument("--body")
+    prb.add_argument("--body-file", help="Read the comment body from this file")
+    prc.add_argument("--marker", default="pr",
+                    help="Key identifying the comment to replace on later runs (default: pr)")
+    prc.add_argument("--transport", choices=["auto", "graphql", "rest"], default=None,
+                    help="GitHub API to use (default: CHATRAJ_GITHUB_TRANSPORT or auto)")
+    prc.add_argument("--repo", required=False,
+                    help="owner/repo (if not provided, inferred from git remote)")
+
+    ph = sub.add_parser(
+        "perf-history", help="List recorded agent runs (per-operation timings by commit)")
+    ph.add_argument("--limit", type=int, default=20,
+                    help="Number of most recent runs to show")
+    ph.add_argument("--import", dest="imports", action="append", metavar="TRACE",
+                    help="Record a JSON trace written with --trace/CHATRAJ_TRACE (repeatable)")
+    ph.add_argument("--commit", default=None,
+                    help="Commit SHA for imported traces (default: GITHUB_SHA or HEAD)")
+
+    pc = sub.add_parser(
+        "perf-compare", help="Flag performance regressions against earlier runs; exits 1 on regression")
+    pc.add_argument("--commit", default=None,
+                    help="Commit whose runs are checked (default: the latest recorded)")
+    pc.add_argument("--command", dest="perf_command", default=None,
+                    help="Only check runs of this agent command, e.g. test-backend (default: every command)")
+    pc.add_argument("--metric", dest="metrics", action="append",
+                    help="Metric to compare (repeatable; default: wall, cpu, children_cpu, "
+                         "children_peak_rss_mb, http_requests)")
+    pc.add_argument("--window", type=int, default=20,
+                    help="Number of earlier runs forming the baseline")
+    pc.add_argument("--alpha", type=float, default=0.01,
+                    help="One-sided significance level")
+    pc.add_argument("--min-change", type=float, default=0.10,
+                    help="Smallest relative increase reported as a regression (default: 0.10)")
+    pc.add_argument("--min-baseline", type=int, default=5,
+                    help="Baseline runs required before an operation is judged")
+
+    br = sub.add_parser(
+        "bundle-report", help="Build the frontend and report bundle sizes against budgets and the last build")
+    br.add_argument("--stats", default=None,
+                    help="Use an existing bundle-stats JSON instead of running `vite build`")
+    br.add_argument("--budgets", default=None,
+                    help="Budgets file relative to the repo root (default: frontend/bundle-budgets.json)")
+    br.add_argument("--comment-out", default=None,
+                    help="Write the Markdown size diff for the PR comment to this file")
+    br.add_argument("--threshold", type=int, default=None,
+                    help="Smallest gzip change in bytes shown in the diff (default: 1024)")
+    br.add_argument("--base", default=None,
+                    help="Commit to compare with, e.g. the PR's base (default: the latest recorded build)")
+    br.add_argument("--no-record", action="store_true",
+                    help="Do not add this build to .chatraj-agent/bundle-history.json")
+    br.add_argument("--check", action="store_true", help="Exit 1 if any budget is exceeded")
+    ia = sub.add_parser(
+        "index-advisor", help="Explain the Backend's hot MongoDB queries and propose missing indexes")
+    ia.add_argument("--mongodb-uri", default=None, help="Database to inspect (default: MONGODB_URI)")
+    ia.add_argument("--apply", action="store_true",
+                    help="Build the proposed indexes and explain every query again")
+    ia.add_argument("--shape", dest="shapes", action="append",
+                    help="Only check this query shape, e.g. blogs.recent (repeatable)")
+    ia.add_argument("--check", action="store_true",
+                    help="Exit 1 if any query still scans the collection or sorts in memory")
+    ex = sub.add_parser(
+        "export", help="Snapshot MongoDB collections as compressed NDJSON shards with a manifest")
+    ex.add_argument("--out", default=None,
+                    help="Snapshot directory (default: .chatraj-agent/snapshots/<UTC timestamp>)")
+    ex.add_argument("--partitions", type=int, default=None,
+                    help="_id ranges per collection, each streamed by its own cursor (default: 8)")
+    im = sub.add_parser("import", help="Restore an export snapshot into MongoDB")
+    im.add_argument("src", help="Snapshot directory written by `export`")
+    im.add_argument("--batch-size", type=int, default=None,
+                    help="Documents per unordered insert (default: 1000)")
+    im.add_argument("--drop", action="store_true", help="Drop each collection before restoring it")
+    for sp in (ex, im):
+        sp.add_argument("--mongodb-uri", default=None, help="Database to use (default: MONGODB_URI)")
+        sp.add_argument("--collection", dest="collections", action="append",
+                        help="Only this collection (repeatable; export default: blogs, projects, "
+                             "messages, users; import default: all in the snapshot)")
+        sp.add_argument("--workers", type=int, default=None,
+                        help="Shards read or written at once (default: 8)")
+    lt = sub.add_parser(
+        "loadtest", help="Load-test the Backend's HTTP and Socket.IO endpoints with virtual users")
+    lt.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    lt.add_argument("--duration", type=float, default=30.0,
+                    help="Seconds each virtual user keeps requesting after ramp-up")
+    lt.add_argument("--ramp-up", type=float, default=0.0,
+                    help="Seconds over which virtual users are started")
+    lt.add_argument("--think", type=float, default=0.0,
+                    help="Pause (s) between a virtual user's iterations")
+    lt.add_argument("--messages", type=int, default=50,
+                    help="Socket.IO project-room messages to fan out (0 to skip)")
+    lt.add_argument("--rooms", type=int, default=5, help="Seeded projects used as Socket.IO rooms")
+    lt.add_argument("--url", default=None,
+                    help="Target an already running Backend instead of starting one (needs --mongodb-uri "
+                         "naming the database it serves from)")
+    lt.add_argument("--mongodb-uri", default=None,
+                    help="MongoDB to seed and serve from (default: a temporary mongod; MONGODB_URI is "
+                         "not used). Seeded records are deleted when the run ends")
+    lt.add_argument("--allow-remote-mongodb", action="store_true",
+                    help="Allow a --mongodb-uri that is not on localhost")
+    lt.add_argument("--redis-url", default=None,
+                    help="Redis for the started Backend (default: a temporary redis-server, "
+                         "else Backend's in-memory stand-in)")
+    lt.add_argument("--keep-rate-limits", action="store_true",
+                    help="Do not rotate X-Forwarded-For, so per-IP rate limiters apply")
+    lt.add_argument("--out-dir", default=None,
+                    help="Where .hgrm histograms are written (default: .chatraj-agent/loadtest)")
+
+    fo = sub.add_parser(
+        "fanout", help="Run an agent command in many repositories at once")
+    fo.add_argument("--repos", required=True,
+                    help="File listing one checkout per line: PATH [owner/name] [api=URL]")
+    fo.add_argument("--concurrency", type=int, default=None,
+                    help="Repositories processed at once (default: 8)")
+    fo.add_argument("--per-host", type=int, default=None,
+                    help="Repositories processed at once per GitHub host (default: 4)")
+    fo.add_argument("--report", default=None,
+                    help="NDJSON report, one record per repository as it finishes "
+                         "(default: .chatraj-agent/fanout-report.ndjson)")
+    fo.add_argument("fanout_argv", nargs=argparse.REMAINDER, metavar="COMMAND ...",
+                    help="Agent command to run, e.g. `scan --no-index` or `auto-pr`")
+
+    sub.add_parser(
+        "auto-pr", help="Run the automated PR flow (requires AUTO_PR_ENABLE=true and GITHUB_TOKEN)")
+
+    sv = sub.add_parser(
+        "serve", help="Keep a warm agent serving CLI commands over a Unix socket")
+    sv.add_argument("--workers", type=int, default=4,
+                    help="Commands run at once; further requests wait (default: 4)")
+    sv.add_argument("--stop", action="store_true", help="Stop the running daemon")
+    sv.add_argument("--status", action="store_true", help="Show whether a daemon is running")
+
     return p
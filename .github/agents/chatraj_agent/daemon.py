@@ -0,0 +1,330 @@
+import hashlib
+import io
+import json
+import os
+import signal
+import socket
+import stat
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import List, Mapping, Optional
+
+from .scanner import STATE_DIR
+
+SOCKET_NAME = "agent.sock"
+DEFAULT_WORKERS = 4
+# Read once, when the warm agent is built. Commands otherwise run with the
+# client's whole environment; a client whose values for these differ from the
+# daemon's runs the command itself.
+WARM_ENV_KEYS = ("GITHUB_API_URL",)
+
+_sink: ContextVar = ContextVar("chatraj_output_sink", default=None)
+_environ: ContextVar = ContextVar("chatraj_request_environ", default=None)
+
+
+def private_dir() -> str:
+    """This user's 0700 directory for sockets whose repo path is too long for AF_UNIX."""
+    base = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(base, f"chatraj-agent-{os.getuid()}")
+
+
+def socket_path(repo_root: str) -> str:
+    path = os.path.join(os.path.abspath(repo_root), STATE_DIR, SOCKET_NAME)
+    if len(path.encode()) > 100:  # AF_UNIX paths are limited to ~104-108 bytes
+        digest = hashlib.sha1(os.path.abspath(repo_root).encode()).hexdigest()[:12]
+        path = os.path.join(private_dir(), f"{digest}.sock")
+    return path
+
+
+def _check_private(path: str, kind: int):
+    """Raise PermissionError unless `path` is a `kind` file owned by this user with no group/other access."""
+    st = os.lstat(path)
+    if stat.S_IFMT(st.st_mode) != kind or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise PermissionError(f"{path} is not private to this user; refusing to use it")
+
+
+def check_socket(path: str):
+    """Refuse a socket (or fallback directory) that another user could have created or can reach.
+
+    Requests carry the client's whole environment, including tokens, so they
+    are only sent to a daemon started by the same user.
+    """
+    _check_private(path, stat.S_IFSOCK)
+    if os.path.dirname(path) == private_dir():
+        _check_private(os.path.dirname(path), stat.S_IFDIR)
+
+
+def env_fingerprint(env=None) -> str:
+    """Hash of the environment the warm agent was built from."""
+    env = os.environ if env is None else env
+    return hashlib.sha256(json.dumps({k: env.get(k) for k in WARM_ENV_KEYS}, sort_keys=True).encode()).hexdigest()
+
+
+class OutputRouter(io.TextIOBase):
+    """Stand-in for sys.stdout/stderr that writes to the current request's connection.
+
+    The target is a context variable, so concurrent requests on different
+    worker threads (and threads they start via `contextvars.copy_context`)
+    each reach their own client; anything else goes to the daemon's stream.
+    """
+
+    def __init__(self, fallback, stream: str):
+        self.fallback = fallback
+        self.stream = stream
+
+    @property
+    def captures_subprocesses(self) -> bool:
+        return _sink.get() is not None
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        sink = _sink.get()
+        if sink is None:
+            return self.fallback.write(text)
+        sink.send({self.stream: text})
+        return len(text)
+
+    def flush(self):
+        if _sink.get() is None:
+            self.fallback.flush()
+
+
+@contextmanager
+def routed_output(sink):
+    """Send this context's writes to an installed OutputRouter to `sink.send({"out"|"err": text})`."""
+    token = _sink.set(sink)
+    try:
+        yield sink
+    finally:
+        _sink.reset(token)
+
+
+@contextmanager
+def output_routers():
+    """Install OutputRouters on sys.stdout/stderr for the duration of the block."""
+    stdout, stderr = sys.stdout, sys.stderr
+    sys.stdout, sys.stderr = OutputRouter(stdout, "out"), OutputRouter(stderr, "err")
+    try:
+        yield
+    finally:
+        sys.stdout, sys.stderr = stdout, stderr
+
+
+def environ() -> Mapping[str, str]:
+    """The environment of the request this context serves, or os.environ outside the daemon.
+
+    Commands read their settings from it and pass it as `env` to the
+    processes they start, so concurrent requests never share environments.
+    """
+    env = _environ.get()
+    return os.environ if env is None else env
+
+
+@contextmanager
+def request_environ(env: Mapping[str, str]):
+    """Make `environ()` return `env` in this context."""
+    token = _environ.set(dict(env))
+    try:
+        yield
+    finally:
+        _environ.reset(token)
+
+
+class _Connection:
+    def __init__(self, conn: socket.socket):
+        self.conn = conn
+        self.lock = threading.Lock()
+
+    def send(self, message: dict):
+        data = (json.dumps(message) + "\n").encode("utf-8")
+        with self.lock:
+            try:
+                self.conn.sendall(data)
+            except OSError:
+                pass  # client went away; keep running so the command is not left half-done
+
+
+def _read_line(conn: socket.socket, limit: int = 1 << 20) -> Optional[bytes]:
+    buf = bytearray()
+    while not buf.endswith(b"\n"):
+        chunk = conn.recv(65536)
+        if not chunk:
+            return bytes(buf) or None
+        buf += chunk
+        if len(buf) > limit:
+            raise ValueError("request too large")
+    return bytes(buf)
+
+
+class AgentDaemon:
+    """Serves CLI commands for one repository from a warm `ChatrajAgent`.
+
+    The agent keeps its pooled GitHub session, MongoDB clients and inferred
+    repo name between requests. Requests arrive as one JSON line on a Unix
+    socket (readable by this user only) carrying the client's argv, working
+    directory and environment; they run on a bounded thread pool with that
+    environment, and stream `{"out": ...}` / `{"err": ...}` lines back
+    followed by `{"exit": code}`.
+    """
+
+    def __init__(self, repo_root: str, workers: int = DEFAULT_WORKERS, path: Optional[str] = None):
+        from .agent import ChatrajAgent
+
+        self.repo_root = os.path.abspath(repo_root)
+        self.path = path or socket_path(self.repo_root)
+        self.workers = workers
+        self.agent = ChatrajAgent(self.repo_root)
+        self.fingerprint = env_fingerprint()
+        self._stopping = threading.Event()
+        self._server: Optional[socket.socket] = None
+
+    def bind(self):
+        if not hasattr(socket, "AF_UNIX"):
+            raise RuntimeError("serve needs Unix domain sockets, which this platform lacks")
+        directory = os.path.dirname(self.path)
+        if directory == private_dir():
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            _check_private(directory, stat.S_IFDIR)
+        else:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.path):
+            if ping(self.path):
+                raise RuntimeError(f"An agent daemon is already listening on {self.path}")
+            os.remove(self.path)  # stale socket from a daemon that did not exit cleanly
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)  # socket readable by this user only
+        try:
+            server.bind(self.path)
+        finally:
+            os.umask(old_umask)
+        server.listen(64)
+        server.settimeout(0.5)
+        self._server = server
+
+    def serve_forever(self, route_output: bool = True):
+        """Accept requests until `stop()`; `route_output` installs the OutputRouters on sys.stdout/stderr."""
+        if self._server is None:
+            self.bind()
+        print(f"chatraj-agent daemon serving {self.repo_root} on {self.path} ({self.workers} workers)")
+        try:
+            with output_routers() if route_output else nullcontext(), \
+                    ThreadPoolExecutor(max_workers=self.workers) as pool:
+                while not self._stopping.is_set():
+                    try:
+                        conn, _ = self._server.accept()
+                    except socket.timeout:
+                        continue
+                    except OSError:
+                        break
+                    conn.settimeout(None)
+                    pool.submit(self._handle, conn)
+        finally:
+            self._server.close()
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            self.agent.close()
+
+    def stop(self):
+        self._stopping.set()
+
+    def _handle(self, conn: socket.socket):
+        client = _Connection(conn)
+        try:
+            line = _read_line(conn)
+            request = json.loads(line) if line else {}
+            op = request.get("op", "run")
+            if op == "ping":
+                client.send({"exit": 0, "pid": os.getpid(), "repo_root": self.repo_root})
+            elif op == "stop":
+                client.send({"exit": 0})
+                self.stop()
+            elif request.get("cwd") != self.repo_root or not isinstance(request.get("env"), dict) \
+                    or env_fingerprint(request["env"]) != self.fingerprint:
+                client.send({"refused": "working directory or environment differs from the daemon's"})
+            else:
+                client.send({"exit": self.run(request.get("argv") or [], client, request["env"])})
+        except (OSError, ValueError) as e:
+            client.send({"refused": f"bad request: {e}"})
+        finally:
+            conn.close()
+
+    def run(self, argv: List[str], client: _Connection, env: Optional[dict] = None) -> int:
+        from .agent import run_isolated
+
+        with routed_output(client), request_environ(os.environ if env is None else env):
+            return run_isolated(self.agent, argv, refused=("serve", "fanout"))
+
+
+def _exchange(path: str, request: dict, timeout: Optional[float] = None):
+    check_socket(path)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    sock.connect(path)
+    sock.sendall((json.dumps(request) + "\n").encode("utf-8"))
+    return sock, sock.makefile("r", encoding="utf-8")
+
+
+def ping(path: str) -> Optional[dict]:
+    try:
+        sock, reader = _exchange(path, {"op": "ping"}, timeout=2)
+        with sock, reader:
+            return json.loads(reader.readline() or "null")
+    except (OSError, ValueError):
+        return None
+
+
+def request(repo_root: str, argv: List[str], out=None, err=None) -> Optional[int]:
+    """Run `argv` on the repo's daemon, streaming its output; None if no daemon took the request."""
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    path = socket_path(repo_root)
+    if not os.path.exists(path):
+        return None
+    out, err = out or sys.stdout, err or sys.stderr
+    try:
+        sock, reader = _exchange(path, {"op": "run", "argv": list(argv), "cwd": os.path.abspath(repo_root),
+                                        "env": dict(os.environ)}, timeout=5)
+    except OSError:
+        return None
+    with sock, reader:
+        sock.settimeout(None)  # commands may run for a long time
+        started = False
+        for line in reader:
+            message = json.loads(line)
+            if "refused" in message and not started:
+                return None
+            started = True
+            if "out" in message:
+                out.write(message["out"])
+                out.flush()
+            elif "err" in message:
+                err.write(message["err"])
+                err.flush()
+            elif "exit" in message:
+                return message["exit"]
+    return 1  # daemon closed the connection mid-command
+
+
+def stop(repo_root: str) -> bool:
+    try:
+        sock, reader = _exchange(socket_path(repo_root), {"op": "stop"}, timeout=2)
+        with sock, reader:
+            return bool(reader.readline())
+    except OSError:
+        return False
+
+
+def serve(repo_root: str, workers: int = DEFAULT_WORKERS):
+    daemon = AgentDaemon(repo_root, workers=workers)
+    daemon.bind()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: daemon.stop())
+    daemon.serve_forever()
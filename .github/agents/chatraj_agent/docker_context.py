@@ -0,0 +1,416 @@
+import json
+import os
+import posixpath
+import re
+import shlex
+import subprocess
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set
+
+from .daemon import environ
+
+# Candidate .dockerignore entries: files a runtime image rarely needs.
+# Patterns use .dockerignore syntax (anchored at the context root).
+SUGGESTED_IGNORES = [
+    ("**/*.md", "documentation"),
+    ("**/tests", "test suites"),
+    ("**/__tests__", "test suites"),
+    ("**/__mocks__", "test mocks"),
+    ("**/*.test.*", "test files"),
+    ("**/*.spec.*", "test files"),
+    ("**/coverage", "coverage reports"),
+    ("**/playwright-report", "test reports"),
+    ("**/cypress", "end-to-end tests"),
+    ("**/archived-scripts", "archived scripts"),
+    ("**/*.log", "logs"),
+    ("*.png", "screenshots in the context root"),
+]
+INSTALL_RE = re.compile(r"\b(npm (ci|install|i)\b|yarn( install)?\b|pnpm install|pip install)")
+MANIFEST_RE = re.compile(r"(^|/)(package(-lock)?\*?\.json|package\*\.json|npm-shrinkwrap\.json|yarn\.lock|"
+                         r"pnpm-lock\.yaml|requirements[^/]*\.txt)$")
+CHOWN_RE = re.compile(r"\bchown\s+(-R|--recursive)\b")
+
+
+def _compile(pattern: str, doublestar: bool = True) -> re.Pattern:
+    """Translate a pattern the way moby's patternmatcher does.
+
+    `*` and `?` never match `/`; `**` matches any number of directories
+    (including none); `\\` escapes the next character; `[...]` is a class.
+    """
+    out = ["^"]
+    i, n = 0, len(pattern)
+    while i < n:
+        ch = pattern[i]
+        i += 1
+        if ch == "*":
+            if doublestar and i < n and pattern[i] == "*":
+                i += 1
+                if i < n and pattern[i] == "/":
+                    i += 1
+                out.append(".*" if i >= n else "(.*/)?")
+            else:
+                out.append("[^/]*")
+        elif ch == "?":
+            out.append("[^/]")
+        elif ch == "\\":
+            if i < n:
+                out.append(re.escape(pattern[i]))
+                i += 1
+            else:
+                out.append(r"\\")
+        elif ch in "[]":
+            out.append(ch)
+        else:
+            out.append(re.escape(ch))
+    out.append("$")
+    return re.compile("".join(out))
+
+
+def _parents(relpath: str) -> List[str]:
+    parts = relpath.split("/")
+    return ["/".join(parts[:i]) for i in range(1, len(parts))]
+
+
+class Pattern(NamedTuple):
+    raw: str
+    regex: re.Pattern
+    exclusion: bool
+
+
+class DockerIgnore:
+    """`.dockerignore` rules with Docker's semantics (not .gitignore's).
+
+    Patterns are anchored at the context root (`foo` only matches `./foo`),
+    a pattern matching a directory matches everything below it, `!` re-includes
+    and the last matching pattern wins.
+    """
+
+    def __init__(self, lines: Iterable[str]):
+        self.patterns: List[Pattern] = []
+        for i, line in enumerate(lines):
+            if i == 0:
+                line = line.lstrip("\ufeff")
+            if line.startswith("#"):
+                continue
+            line = line.strip()
+            if not line:
+                continue
+            exclusion = line.startswith("!")
+            if exclusion:
+                line = line[1:].strip()
+            if line:
+                line = posixpath.normpath(line.replace("\\", "/") if os.sep == "\\" else line)
+                if len(line) > 1 and line.startswith("/"):
+                    line = line.lstrip("/")
+            self.patterns.append(Pattern(line, _compile(line), exclusion))
+
+    @classmethod
+    def load(cls, path: str) -> "DockerIgnore":
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as fh:
+                return cls(fh.read().splitlines())
+        except OSError:
+            return cls([])
+
+    @property
+    def has_exclusions(self) -> bool:
+        return any(p.exclusion for p in self.patterns)
+
+    def matches(self, relpath: str) -> bool:
+        matched = False
+        parents = None
+        for p in self.patterns:
+            if p.exclusion != matched:
+                continue  # cannot change the outcome
+            hit = bool(p.regex.match(relpath))
+            if not hit:
+                parents = parents if parents is not None else _parents(relpath)
+                hit = any(p.regex.match(parent) for parent in parents)
+            if hit:
+                matched = not p.exclusion
+        return matched
+
+
+def context_files(context: str, ignore: DockerIgnore) -> Dict[str, Dict[str, int]]:
+    """Walk the build context; returns {"included": {path: size}, "ignored": {path: size}}."""
+    included: Dict[str, int] = {}
+    ignored: Dict[str, int] = {}
+    for dirpath, dirnames, filenames in os.walk(context):
+        rel_dir = os.path.relpath(dirpath, context).replace(os.sep, "/")
+        rel_dir = "" if rel_dir == "." else rel_dir + "/"
+        keep = []
+        for d in dirnames:
+            if ignore.matches(rel_dir + d) and not ignore.has_exclusions:
+                # nothing can re-include files below; count them as ignored without listing rules again
+                for sub, _, names in os.walk(os.path.join(dirpath, d)):
+                    for name in names:
+                        path = os.path.join(sub, name)
+                        ignored[os.path.relpath(path, context).replace(os.sep, "/")] = _size(path)
+            else:
+                keep.append(d)
+        dirnames[:] = keep
+        for name in filenames:
+            rel = rel_dir + name
+            (ignored if ignore.matches(rel) else included)[rel] = _size(os.path.join(dirpath, name))
+    return {"included": included, "ignored": ignored}
+
+
+def _size(path: str) -> int:
+    try:
+        return os.lstat(path).st_size
+    except OSError:
+        return 0
+
+
+class Instruction(NamedTuple):
+    line: int
+    cmd: str
+    args: str
+    flags: Dict[str, str]
+    sources: List[str]
+
+    @property
+    def from_context(self) -> bool:
+        return self.cmd in ("COPY", "ADD") and "from" not in self.flags
+
+    def text(self) -> str:
+        return f"{self.cmd} {self.args}".strip()
+
+
+class Stage(NamedTuple):
+    index: int
+    name: Optional[str]
+    base: str
+    line: int
+    instructions: List[Instruction]
+
+
+def _copy_args(args: str):
+    text = args.strip()
+    flags: Dict[str, str] = {}
+    try:
+        tokens = json.loads(text) if text.startswith("[") else shlex.split(text, posix=True)
+    except ValueError:
+        tokens = text.split()
+    while tokens and tokens[0].startswith("--"):
+        key, _, value = tokens.pop(0)[2:].partition("=")
+        flags[key.lower()] = value
+    sources = tokens[:-1] if len(tokens) > 1 else []
+    return flags, sources
+
+
+def parse_dockerfile(text: str) -> List[Stage]:
+    """Split a Dockerfile into stages of instructions (continuations joined, comments dropped)."""
+    stages: List[Stage] = []
+    logical: List[tuple] = []
+    buf, start = [], None
+    for number, raw in enumerate(text.splitlines(), 1):
+        stripped = raw.strip()
+        if not buf and (not stripped or stripped.startswith("#")):
+            continue
+        if buf and stripped.startswith("#"):
+            continue  # comment lines inside a continuation are skipped
+        if start is None:
+            start = number
+        if stripped.endswith("\\"):
+            buf.append(stripped[:-1])
+            continue
+        buf.append(stripped)
+        logical.append((start, " ".join(part.strip() for part in buf if part.strip())))
+        buf, start = [], None
+    if buf:
+        logical.append((start, " ".join(buf)))
+
+    for line, content in logical:
+        cmd, _, args = content.partition(" ")
+        cmd = cmd.upper()
+        if cmd == "FROM":
+            tokens = [t for t in args.split() if not t.startswith("--")]
+            name = tokens[2] if len(tokens) >= 3 and tokens[1].lower() == "as" else None
+            stages.append(Stage(len(stages), name, tokens[0] if tokens else "", line, []))
+            continue
+        if not stages:
+            continue  # ARG before the first FROM
+        flags, sources = _copy_args(args) if cmd in ("COPY", "ADD") else ({}, [])
+        stages[-1].instructions.append(Instruction(line, cmd, args, flags, sources))
+    return stages
+
+
+def source_matches(source: str, relpath: str) -> bool:
+    """Whether a COPY/ADD source (path or glob relative to the context) copies `relpath`."""
+    src = posixpath.normpath(source.lstrip("/")) if source.strip("/") else "."
+    if src == ".":
+        return True
+    regex = _compile(src, doublestar=False)
+    return bool(regex.match(relpath)) or any(regex.match(p) for p in _parents(relpath))
+
+
+def copied_files(ins: Instruction, files: Dict[str, int]) -> Dict[str, int]:
+    if not ins.from_context:
+        return {}
+    sources = [s for s in ins.sources if not re.match(r"^[a-z]+://", s)]
+    return {p: size for p, size in files.items() if any(source_matches(s, p) for s in sources)}
+
+
+def predict_rebuilds(stages: Sequence[Stage], changed: Set[str], dockerfile_changed: bool = False) -> List[dict]:
+    """Per stage, the first instruction whose cache is invalidated by `changed` and all that follow."""
+    invalid: Dict[str, bool] = {}
+    result = []
+    for stage in stages:
+        first = None
+        reason = None
+        if dockerfile_changed:
+            first, reason = stage.line, "Dockerfile changed"
+        elif stage.base in invalid and invalid[stage.base]:
+            first, reason = stage.line, f"base stage {stage.base} rebuilt"
+        else:
+            for ins in stage.instructions:
+                src_stage = ins.flags.get("from")
+                if src_stage is not None and invalid.get(src_stage):
+                    first, reason = ins.line, f"copies from rebuilt stage {src_stage}"
+                    break
+                if ins.from_context:
+                    hits = sorted(p for p in changed if any(source_matches(s, p) for s in ins.sources))
+                    if hits:
+                        first = ins.line
+                        reason = f"{len(hits)} changed file(s), e.g. {hits[0]}"
+                        break
+        rebuilt = [i.line for i in stage.instructions if first is not None and i.line >= first]
+        for key in (stage.name, str(stage.index)):
+            if key:
+                invalid[key] = first is not None
+        result.append({"stage": stage.name or str(stage.index), "first_invalidated_line": first,
+                       "reason": reason, "rebuilt_lines": rebuilt,
+                       "cached_lines": [i.line for i in stage.instructions if i.line not in rebuilt]})
+    return result
+
+
+def commit_history(repo_root: str, context_rel: str, limit: int) -> List[List[str]]:
+    """Files (relative to the context) changed by each of the last `limit` commits touching it."""
+    try:
+        out = subprocess.check_output(
+            ["git", "log", f"-{limit}", "--name-only", "--format=%x00", "--", context_rel or "."],
+            cwd=repo_root, text=True, stderr=subprocess.DEVNULL, env=environ())
+    except (OSError, subprocess.CalledProcessError):
+        return []
+    prefix = context_rel.rstrip("/") + "/" if context_rel not in ("", ".") else ""
+    commits = []
+    for block in out.split("\0"):
+        files = [line[len(prefix):] for line in block.splitlines() if line.strip() and line.startswith(prefix)]
+        if files:
+            commits.append(files)
+    return commits
+
+
+def suggest(stages: Sequence[Stage], ignore: DockerIgnore, files: Dict[str, int],
+            history: Sequence[Sequence[str]], rebuild_seconds: Optional[float] = None) -> List[dict]:
+    """Ignore entries and instruction changes, with bytes and (from history) rebuilds they would save."""
+    suggestions = []
+    specific_sources = [s for st in stages for i in st.instructions if i.from_context
+                        for s in i.sources if posixpath.normpath(s.lstrip("/") or ".") != "."]
+    broad = any(i.from_context and any(posixpath.normpath(s.lstrip("/") or ".") == "." for s in i.sources)
+                for st in stages for i in st.instructions)
+    relevant = [[p for p in c if p in files] for c in history]
+    relevant = [c for c in relevant if c]
+
+    def with_time(entry: dict) -> dict:
+        if rebuild_seconds is not None:
+            entry["seconds_saved"] = round(entry["avoided_rebuilds"] * rebuild_seconds, 1)
+        return entry
+
+    suggested: List[Set[str]] = []
+    for pattern, reason in SUGGESTED_IGNORES:
+        regex = _compile(pattern)
+        matched = {p: s for p, s in files.items()
+                   if regex.match(p) or any(regex.match(x) for x in _parents(p))}
+        if not matched or any(set(matched) == seen for seen in suggested):
+            continue
+        if any(source_matches(src, p) for src in specific_sources for p in matched):
+            continue  # an explicit COPY needs these files
+        suggested.append(set(matched))
+        avoided = sum(1 for c in relevant if all(p in matched for p in c)) if broad else 0
+        suggestions.append(with_time({
+            "kind": "dockerignore", "entry": pattern, "reason": reason, "files": len(matched),
+            "bytes_saved": sum(matched.values()), "avoided_rebuilds": avoided,
+            "history_commits": len(relevant)}))
+
+    for stage in stages:
+        copied: Dict[str, int] = {}
+        manifest_first = False
+        broad_index = None
+        for idx, ins in enumerate(stage.instructions):
+            if ins.from_context:
+                if all(MANIFEST_RE.search(posixpath.normpath(s)) for s in ins.sources) and broad_index is None:
+                    manifest_first = True
+                elif broad_index is None:
+                    broad_index = idx
+                copied.update(copied_files(ins, files))
+            elif ins.cmd == "RUN" and INSTALL_RE.search(ins.args) and broad_index is not None \
+                    and not manifest_first:
+                avoided = sum(1 for c in relevant if not any(MANIFEST_RE.search(p) for p in c))
+                suggestions.append(with_time({
+                    "kind": "reorder", "stage": stage.name or str(stage.index), "line": ins.line,
+                    "suggestion": "COPY the package manifests and run the install before copying the "
+                                  "rest of the source, so source edits reuse the dependency layer",
+                    "bytes_saved": 0, "avoided_rebuilds": avoided, "history_commits": len(relevant)}))
+            elif ins.cmd == "RUN" and CHOWN_RE.search(ins.args) and copied:
+                suggestions.append({
+                    "kind": "chown", "stage": stage.name or str(stage.index), "line": ins.line,
+                    "suggestion": "use COPY --chown=<user> instead of a recursive chown, which "
+                                  "duplicates every copied file into a new layer",
+                    "bytes_saved": sum(copied.values()), "avoided_rebuilds": 0,
+                    "note": "at least the copied context; files created by earlier RUN steps are duplicated too"})
+    return sorted(suggestions, key=lambda s: (-s["bytes_saved"], -s["avoided_rebuilds"]))
+
+
+def analyze_context(repo_root: str, context: str = "Backend", dockerfile: Optional[str] = None,
+                    changed: Optional[Sequence[str]] = None, history: int = 100,
+                    rebuild_seconds: Optional[float] = None, top: int = 10) -> dict:
+    """Effective build context, COPY/ADD coverage, predicted rebuilds for `changed` and suggestions.
+
+    `changed` holds repo-relative paths (e.g. from `impact.changed_files`).
+    """
+    context_dir = os.path.join(repo_root, context)
+    if not os.path.isdir(context_dir):
+        raise FileNotFoundError(f"{context} directory not found")
+    dockerfile_path = dockerfile or os.path.join(context_dir, "Dockerfile")
+    try:
+        with open(dockerfile_path, "r", encoding="utf-8") as fh:
+            stages = parse_dockerfile(fh.read())
+    except OSError:
+        raise FileNotFoundError(f"{dockerfile_path} not found")
+    ignore = DockerIgnore.load(os.path.join(context_dir, ".dockerignore"))
+    listing = context_files(context_dir, ignore)
+    files = listing["included"]
+    # the Dockerfile and .dockerignore are sent even when ignored, but COPY never sees them
+    always_sent = [os.path.relpath(p, context_dir).replace(os.sep, "/")
+                   for p in (dockerfile_path, os.path.join(context_dir, ".dockerignore"))
+                   if os.path.isfile(p) and os.path.abspath(p).startswith(os.path.abspath(context_dir))]
+
+    context_rel = os.path.relpath(context_dir, repo_root).replace(os.sep, "/")
+    prefix = "" if context_rel == "." else context_rel + "/"
+    dockerfile_rel = os.path.relpath(dockerfile_path, repo_root).replace(os.sep, "/")
+    report = {
+        "context": context_rel, "dockerfile": dockerfile_rel,
+        "files": len(files), "bytes": sum(files.values()),
+        "ignored_files": len(listing["ignored"]), "ignored_bytes": sum(listing["ignored"].values()),
+        "always_sent": always_sent,
+        "largest": [{"path": p, "size": s} for p, s in sorted(files.items(), key=lambda kv: -kv[1])[:top]],
+        "stages": [{"stage": st.name or str(st.index), "base": st.base, "line": st.line,
+                    "copies": [{"line": i.line, "instruction": i.text(),
+                                "files": len(c), "bytes": sum(c.values())}
+                               for i in st.instructions if i.from_context
+                               for c in [copied_files(i, files)]]}
+                   for st in stages],
+    }
+    if changed is not None:
+        in_context = {p[len(prefix):] for p in changed if p.startswith(prefix)}
+        # deleted files count too unless the rules ignore them
+        effective = {p for p in in_context if p in files
+                     or (not os.path.exists(os.path.join(context_dir, p)) and not ignore.matches(p))}
+        report["rebuild"] = {"changed_in_context": len(effective),
+                             "changed_but_ignored": sorted(in_context - effective)[:top],
+                             "stages": predict_rebuilds(stages, effective, dockerfile_rel in changed)}
+    report["suggestions"] = suggest(stages, ignore, files,
+                                    commit_history(repo_root, context_rel, history) if history else [],
+                                    rebuild_seconds)
+    return report
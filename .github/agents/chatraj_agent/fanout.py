@@ -0,0 +1,177 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional
+from urllib.parse import urlparse
+
+from .agent import ChatrajAgent, run_isolated
+from .daemon import output_routers, routed_output
+from .scheduler import RequestScheduler
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_PER_HOST = 4
+# Commands that cannot run inside a fan-out
+REFUSED_COMMANDS = ("serve", "fanout")
+
+
+class RepoSpec(NamedTuple):
+    """One line of the repos file: a local checkout, optionally its GitHub repo and API URL."""
+    path: str
+    github_repo: Optional[str] = None
+    api_url: Optional[str] = None
+
+    def host(self, default_api_url: str) -> str:
+        return urlparse(self.api_url or default_api_url).hostname or "localhost"
+
+
+def read_repos(path: str) -> List[RepoSpec]:
+    """Parse a repos file.
+
+    One checkout per line, relative to the file's directory, followed by an
+    optional `owner/name` (instead of inferring it from `origin`) and
+    `api=URL` for a GitHub Enterprise mirror. `#` starts a comment.
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    specs: List[RepoSpec] = []
+    seen = set()
+    with open(path, "r", encoding="utf-8") as fh:
+        for lineno, line in enumerate(fh, 1):
+            fields = line.split("#", 1)[0].split()
+            if not fields:
+                continue
+            repo_path = os.path.normpath(os.path.join(base, os.path.expanduser(fields[0])))
+            github_repo = api_url = None
+            for field in fields[1:]:
+                if field.startswith("api="):
+                    api_url = field[len("api="):].rstrip("/")
+                elif field.count("/") == 1 and github_repo is None:
+                    github_repo = field
+                else:
+                    raise ValueError(f"{path}:{lineno}: unexpected field {field!r}")
+            if repo_path in seen:
+                raise ValueError(f"{path}:{lineno}: {fields[0]} is listed twice")
+            seen.add(repo_path)
+            specs.append(RepoSpec(repo_path, github_repo, api_url))
+    return specs
+
+
+class _Capture:
+    """Output sink for one repository's command (see daemon.routed_output)."""
+
+    def __init__(self):
+        self.parts: List[str] = []
+        self.lock = threading.Lock()
+
+    def send(self, message: dict):
+        with self.lock:
+            self.parts.extend(message.values())
+
+    def text(self) -> str:
+        with self.lock:
+            return "".join(self.parts)
+
+
+def run_one(spec: RepoSpec, argv: List[str], scheduler: RequestScheduler,
+            agent_factory: Callable[..., ChatrajAgent] = ChatrajAgent) -> dict:
+    """Run `argv` against one repository; never raises, the outcome is in the returned record."""
+    capture = _Capture()
+    started = time.perf_counter()
+    record = {"repo": spec.path, "github_repo": spec.github_repo, "exit": 1, "github_requests": 0}
+    agent = None
+    with routed_output(capture):
+        try:
+            if not os.path.isdir(spec.path):
+                raise FileNotFoundError(f"{spec.path} is not a directory")
+            agent = agent_factory(spec.path, api_url=spec.api_url, github_repo=spec.github_repo,
+                                  scheduler=scheduler)
+            record["exit"] = run_isolated(agent, argv, refused=REFUSED_COMMANDS)
+        except Exception as e:
+            print(f"{type(e).__name__}: {e}")
+        finally:
+            if agent is not None:
+                github = getattr(agent, "_github", None)
+                record["github_requests"] = github.stats["requests"] if github is not None else 0
+                agent.close()
+    record.update(ok=record["exit"] == 0, seconds=round(time.perf_counter() - started, 3),
+                  output=capture.text())
+    return record
+
+
+async def fanout(specs: List[RepoSpec], argv: List[str], concurrency: int = DEFAULT_CONCURRENCY,
+                 per_host: int = DEFAULT_PER_HOST, on_result: Optional[Callable[[dict], None]] = None,
+                 agent_factory: Callable[..., ChatrajAgent] = ChatrajAgent) -> List[dict]:
+    """Run `argv` in every repository, at most `concurrency` at once and `per_host` per GitHub host.
+
+    Agents on the same host share one RequestScheduler, so the rate-limit
+    state learned from any response (and the secondary-limit token bucket)
+    throttles all of them together. Commands run on worker threads with
+    their output captured per repository; `on_result` is called with each
+    record as soon as its repository finishes.
+    """
+    default_api = os.environ.get("GITHUB_API_URL", "https://api.github.com")
+    hosts = {spec.host(default_api) for spec in specs}
+    limits: Dict[str, asyncio.Semaphore] = {host: asyncio.Semaphore(per_host) for host in hosts}
+    schedulers: Dict[str, RequestScheduler] = {host: RequestScheduler() for host in hosts}
+    loop = asyncio.get_running_loop()
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="fanout") as pool:
+        async def run(spec: RepoSpec) -> dict:
+            host = spec.host(default_api)
+            async with limits[host]:
+                record = await loop.run_in_executor(pool, run_one, spec, argv, schedulers[host], agent_factory)
+            record["host"] = host
+            return record
+
+        records = []
+        for next_done in asyncio.as_completed([run(spec) for spec in specs]):
+            record = await next_done
+            records.append(record)
+            if on_result is not None:
+                on_result(record)
+    return records
+
+
+def run_fanout(repos_file: str, argv: List[str], concurrency: int = DEFAULT_CONCURRENCY,
+               per_host: int = DEFAULT_PER_HOST, report: Optional[str] = None,
+               agent_factory: Callable[..., ChatrajAgent] = ChatrajAgent) -> dict:
+    """Fan `argv` out over the repos in `repos_file`, streaming one NDJSON record per repo to `report`."""
+    if not argv:
+        raise ValueError("fanout needs a command to run, e.g. `fanout --repos repos.txt scan`")
+    if argv[0] in REFUSED_COMMANDS:
+        raise ValueError(f"{argv[0]} cannot be run through fanout")
+    specs = read_repos(repos_file)
+    started = time.perf_counter()
+    if report:
+        os.makedirs(os.path.dirname(os.path.abspath(report)), exist_ok=True)
+    out = open(report, "w", encoding="utf-8") if report else None
+
+    def on_result(record: dict):
+        if out is not None:
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+        status = "ok" if record["ok"] else f"failed (exit {record['exit']})"
+        print(f"[{status}] {record['repo']} in {record['seconds']:.2f}s")
+        if not record["ok"]:
+            tail = record["output"].strip().splitlines()[-1:]
+            if tail:
+                print(f"    {tail[0]}")
+
+    try:
+        with output_routers():
+            records = asyncio.run(fanout(specs, argv, concurrency=concurrency, per_host=per_host,
+                                         on_result=on_result, agent_factory=agent_factory))
+    finally:
+        if out is not None:
+            out.close()
+    return {
+        "command": " ".join(argv),
+        "repos": len(records),
+        "ok": sum(1 for r in records if r["ok"]),
+        "failed": sorted(r["repo"] for r in records if not r["ok"]),
+        "seconds": round(time.perf_counter() - started, 3),
+        "github_requests": sum(r.get("github_requests", 0) for r in records),
+        "report": report,
+    }
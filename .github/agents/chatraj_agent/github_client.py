@@ -0,0 +1,177 @@
+import base64
+import hashlib
+import json
+import os
+import threading
+import uuid
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from . import tracing
+from .scheduler import RequestScheduler
+
+DEFAULT_API_URL = "https://api.github.com"
+# Response headers worth keeping alongside a cached body.
+CACHED_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Link")
+
+
+class ResponseCache:
+    """LRU disk cache of GET responses keyed by URL and token.
+
+    Each entry is one JSON file; recency is tracked through the file mtime,
+    which is bumped on every hit, and the oldest files are evicted once the
+    cache holds more than `max_entries`.
+    """
+
+    def __init__(self, directory: str, max_entries: int = 512):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".json")
+
+    def get(self, key: str) -> Optional[dict]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                entry = json.load(fh)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return entry
+
+    def put(self, key: str, entry: dict):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(entry, fh)
+        os.replace(tmp, path)
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            try:
+                names = [n for n in os.listdir(self.directory) if n.endswith(".json")]
+            except OSError:
+                return
+            if len(names) <= self.max_entries:
+                return
+            paths = [os.path.join(self.directory, n) for n in names]
+            paths.sort(key=lambda p: os.stat(p).st_mtime_ns if os.path.exists(p) else 0)
+            for path in paths[:len(paths) - self.max_entries]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+class GitHubClient:
+    """GitHub REST client sharing one keep-alive session across agent calls.
+
+    GETs are sent with `If-None-Match`/`If-Modified-Since` when a cached copy
+    exists; a 304 reply (which GitHub does not count against the rate limit)
+    is answered from the cache. Every request runs through a RequestScheduler
+    for rate limiting and retries. `stats` exposes request, cache-hit and byte
+    counters; `scheduler.metrics` the time spent waiting versus working.
+    """
+
+    def __init__(self, token: str, api_url: str = DEFAULT_API_URL, cache_dir: Optional[str] = None,
+                 cache_entries: int = 512, pool_size: int = 16,
+                 scheduler: Optional[RequestScheduler] = None):
+        self.token = token
+        self.api_url = api_url.rstrip("/")
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Authorization": f"token {token}",
+                                     "Accept": "application/vnd.github.v3+json"})
+        self.scheduler = scheduler or RequestScheduler()
+        self.cache = ResponseCache(cache_dir, cache_entries) if cache_dir else None
+        self._token_id = hashlib.sha256(token.encode()).hexdigest()[:16]
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"requests": 0, "cache_hits": 0,
+                                      "bytes_sent": 0, "bytes_received": 0}
+
+    def url(self, path: str) -> str:
+        if path.startswith(("http://", "https://")):
+            return path
+        return f"{self.api_url}/{path.lstrip('/')}"
+
+    def _count(self, **deltas: int):
+        with self._lock:
+            for key, value in deltas.items():
+                self.stats[key] += value
+        for key, value in deltas.items():
+            tracing.count(f"http_{key}", value)
+
+    def request(self, method: str, path: str, json: Optional[dict] = None,
+                headers: Optional[Dict[str, str]] = None, timeout: float = 30,
+                deadline: Optional[float] = None, **kwargs) -> requests.Response:
+        url = self.url(path)
+        headers = dict(headers or {})
+        key = entry = None
+        if method == "GET" and self.cache is not None:
+            key = hashlib.sha256(f"{self._token_id} {url}".encode()).hexdigest()
+            entry = self.cache.get(key)
+            if entry:
+                if entry.get("etag"):
+                    headers["If-None-Match"] = entry["etag"]
+                if entry.get("last_modified"):
+                    headers["If-Modified-Since"] = entry["last_modified"]
+
+        def send(remaining: Optional[float]):
+            attempt_timeout = min(timeout, remaining) if remaining else timeout
+            resp = self.session.request(method, url, json=json, headers=headers,
+                                        timeout=attempt_timeout, **kwargs)
+            sent = resp.request.body if resp.request is not None else None
+            self._count(requests=1, bytes_sent=len(sent or b""),
+                        bytes_received=len(resp.content or b""))
+            return resp
+
+        with tracing.span("github.request", method=method, path=url[len(self.api_url):] or url) as attrs:
+            resp = self.scheduler.call(send, method=method, deadline=deadline)
+            attrs["status"] = resp.status_code
+
+        if resp.status_code == 304 and entry:
+            self._count(cache_hits=1)
+            return self._from_cache(entry, url)
+        if key and resp.status_code == 200:
+            etag = resp.headers.get("ETag")
+            last_modified = resp.headers.get("Last-Modified")
+            if etag or last_modified:
+                self.cache.put(key, {
+                    "etag": etag, "last_modified": last_modified,
+                    "status": resp.status_code,
+                    "headers": {h: resp.headers[h] for h in CACHED_HEADERS if h in resp.headers},
+                    "body": base64.b64encode(resp.content).decode("ascii"),
+                })
+        return resp
+
+    @staticmethod
+    def _from_cache(entry: dict, url: str) -> requests.Response:
+        resp = requests.Response()
+        resp.status_code = entry["status"]
+        resp.headers = CaseInsensitiveDict(entry.get("headers") or {})
+        resp._content = base64.b64decode(entry["body"])
+        resp.encoding = "utf-8"
+        resp.url = url
+        resp.from_cache = True
+        return resp
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, json: Optional[dict] = None, **kwargs) -> requests.Response:
+        return self.request("POST", path, json=json, **kwargs)
+
+    def patch(self, path: str, json: Optional[dict] = None, **kwargs) -> requests.Response:
+        return self.request("PATCH", path, json=json, **kwargs)
+
+    def close(self):
+        self.session.close()
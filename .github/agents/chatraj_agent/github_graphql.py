@@ -0,0 +1,236 @@
+import base64
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from . import tracing
+
+# Comments scanned for the marker when upserting; older ones are not updated.
+COMMENT_WINDOW = 100
+
+PULL_REQUEST_FIELDS = "id number url baseRefName"
+COMMENT_FIELDS = f"comments(last: {COMMENT_WINDOW}) {{ nodes {{ id url body viewerDidAuthor }} }}"
+
+
+class GraphQLError(RuntimeError):
+    """A GraphQL request failed or returned `errors`."""
+
+    def __init__(self, message: str, errors: Optional[list] = None, status: Optional[int] = None):
+        super().__init__(message)
+        self.errors = errors or []
+        self.status = status
+
+
+class GraphQLUnavailable(GraphQLError):
+    """The lookup failed before anything was written, so the REST flow can safely take over."""
+
+
+def graphql_url(api_url: str) -> str:
+    """GraphQL endpoint for a REST base URL (GitHub Enterprise serves it at /api/graphql)."""
+    api_url = api_url.rstrip("/")
+    if api_url.endswith("/api/v3"):
+        return api_url[:-len("/v3")] + "/graphql"
+    return api_url + "/graphql"
+
+
+def comment_marker(key: str) -> str:
+    return f"<!-- chatraj-agent:{key} -->"
+
+
+class GitHubGraphQL:
+    """Runs GraphQL documents over a GitHubClient's pooled session and scheduler."""
+
+    def __init__(self, client):
+        self.client = client
+        self.url = graphql_url(client.api_url)
+
+    def execute(self, document: str, variables: Optional[dict] = None) -> dict:
+        resp = self.client.post(self.url, json={"query": document, "variables": variables or {}})
+        if resp.status_code != 200:
+            raise GraphQLError(f"GraphQL request failed: {resp.status_code} {getattr(resp, 'text', '')}",
+                               status=resp.status_code)
+        try:
+            payload = resp.json()
+        except ValueError:
+            raise GraphQLError("GraphQL response is not JSON", status=resp.status_code)
+        errors = payload.get("errors") if isinstance(payload, dict) else None
+        if errors:
+            raise GraphQLError("; ".join(e.get("message", str(e)) for e in errors), errors, resp.status_code)
+        if not isinstance(payload, dict) or not isinstance(payload.get("data"), dict):
+            raise GraphQLError("GraphQL response has no data", status=resp.status_code)
+        return payload["data"]
+
+
+def _split_repo(repo: str):
+    owner, _, name = repo.partition("/")
+    if not owner or not name:
+        raise ValueError(f"Expected repo as 'owner/name', got {repo!r}")
+    return owner, name
+
+
+def _find_comment(pull_request: Optional[dict], marker: str) -> Optional[dict]:
+    nodes = ((pull_request or {}).get("comments") or {}).get("nodes") or []
+    for node in reversed(nodes):
+        if node.get("viewerDidAuthor") and marker in (node.get("body") or ""):
+            return node
+    return None
+
+
+def _comment_mutation(pull_request_id: Optional[str], existing: Optional[dict], body: str):
+    """(variable type, selection, input) for the comment upsert, bound to `$comment`."""
+    if existing:
+        return ("UpdateIssueCommentInput!", "updateIssueComment(input: $comment) { issueComment { id url } }",
+                {"id": existing["id"], "body": body})
+    return ("AddCommentInput!", "addComment(input: $comment) { commentEdge { node { id url } } }",
+            {"subjectId": pull_request_id, "body": body})
+
+
+def _comment_result(data: dict) -> dict:
+    if data.get("updateIssueComment"):
+        return {**data["updateIssueComment"]["issueComment"], "updated": True}
+    return {**data["addComment"]["commentEdge"]["node"], "updated": False}
+
+
+def lookup_document(file_count: int) -> str:
+    """Query for the repository id, both refs, any open PR and the blob ids of `file_count` paths."""
+    params = ["$owner: String!", "$name: String!", "$base: String!", "$head: String!"]
+    blobs = []
+    for i in range(file_count):
+        params += [f"$b{i}: String!", f"$h{i}: String!"]
+        blobs.append(f"b{i}: object(expression: $b{i}) {{ ... on Blob {{ oid }} }} "
+                     f"h{i}: object(expression: $h{i}) {{ ... on Blob {{ oid }} }}")
+    return (f"query({', '.join(params)}) {{ repository(owner: $owner, name: $name) {{ id "
+            f"base: ref(qualifiedName: $base) {{ target {{ oid }} }} "
+            f"head: ref(qualifiedName: $head) {{ target {{ oid }} "
+            f"associatedPullRequests(first: 5, states: OPEN) {{ nodes {{ {PULL_REQUEST_FIELDS} {COMMENT_FIELDS} }} }} }} "
+            f"{' '.join(blobs)} }} }}")
+
+
+def publish(gql: GitHubGraphQL, repo: str, branch: str, files: Dict[str, Union[str, bytes, Path]],
+            commit_message: str, title: str, body: str = "", base: str = "main",
+            comment: Optional[str] = None, marker: str = "pr") -> dict:
+    """Commit `files` to `branch`, open or update its PR against `base` and upsert one comment.
+
+    Request 1 reads the repository id, both refs, the open PR with its
+    recent comments and the blob ids of every path on both refs, so files
+    that already match are dropped. Request 2 is one mutation document that
+    creates the branch, commits the changed files with `createCommitOnBranch`
+    and creates or updates the PR (plus the comment when the PR already
+    existed). A new PR needs request 3 for its first comment, since its id
+    is not known until request 2 returns. Raises GraphQLUnavailable when
+    request 1 fails, before anything has been written.
+    """
+    from .agent import git_blob_sha
+
+    owner, name = _split_repo(repo)
+    paths = []
+    contents: List[bytes] = []
+    for path, content in files.items():
+        paths.append(path.replace("\\", "/"))
+        if isinstance(content, Path):
+            contents.append(content.read_bytes())
+        else:
+            contents.append(content if isinstance(content, bytes) else content.encode("utf-8"))
+
+    variables = {"owner": owner, "name": name, "base": f"refs/heads/{base}", "head": f"refs/heads/{branch}"}
+    for i, path in enumerate(paths):
+        variables[f"b{i}"] = f"{base}:{path}"
+        variables[f"h{i}"] = f"{branch}:{path}"
+    with tracing.span("graphql.lookup", files=len(paths)):
+        try:
+            repository = gql.execute(lookup_document(len(paths)), variables).get("repository")
+        except GraphQLError as e:
+            raise GraphQLUnavailable(str(e), e.errors, e.status)
+    if not repository or not repository.get("base"):
+        raise GraphQLUnavailable(f"Repository {repo} or branch {base} not found")
+
+    head = repository.get("head")
+    prefix = "h" if head else "b"
+    parent = (head or repository["base"])["target"]["oid"]
+    additions = [{"path": path, "contents": base64.b64encode(data).decode("ascii")}
+                 for i, (path, data) in enumerate(zip(paths, contents))
+                 if ((repository.get(f"{prefix}{i}") or {}).get("oid")) != git_blob_sha(data)]
+    pulls = [pr for pr in ((head or {}).get("associatedPullRequests") or {}).get("nodes") or []
+             if pr.get("baseRefName") == base]
+    existing_pr = pulls[0] if pulls else None
+    if comment is not None:
+        comment = f"{comment.rstrip()}\n\n{comment_marker(marker)}"
+
+    params, selections, mutation_vars = [], [], {}
+    if not head:
+        params.append("$ref: CreateRefInput!")
+        selections.append("createRef(input: $ref) { ref { name } }")
+        mutation_vars["ref"] = {"repositoryId": repository["id"], "name": f"refs/heads/{branch}", "oid": parent}
+    if additions:
+        headline, _, rest = commit_message.partition("\n")
+        params.append("$commit: CreateCommitOnBranchInput!")
+        selections.append("createCommitOnBranch(input: $commit) { commit { oid url } }")
+        mutation_vars["commit"] = {
+            "branch": {"repositoryNameWithOwner": repo, "branchName": branch},
+            "expectedHeadOid": parent,
+            "message": {"headline": headline, "body": rest.strip()},
+            "fileChanges": {"additions": additions},
+        }
+    if existing_pr:
+        params.append("$pr: UpdatePullRequestInput!")
+        selections.append(f"updatePullRequest(input: $pr) {{ pullRequest {{ {PULL_REQUEST_FIELDS} }} }}")
+        mutation_vars["pr"] = {"pullRequestId": existing_pr["id"], "title": title, "body": body}
+        if comment is not None:
+            kind, selection, comment_input = _comment_mutation(existing_pr["id"],
+                                                               _find_comment(existing_pr, comment_marker(marker)),
+                                                               comment)
+            params.append(f"$comment: {kind}")
+            selections.append(selection)
+            mutation_vars["comment"] = comment_input
+    else:
+        params.append("$pr: CreatePullRequestInput!")
+        selections.append(f"createPullRequest(input: $pr) {{ pullRequest {{ {PULL_REQUEST_FIELDS} }} }}")
+        mutation_vars["pr"] = {"repositoryId": repository["id"], "baseRefName": base,
+                               "headRefName": branch, "title": title, "body": body}
+
+    with tracing.span("graphql.publish", additions=len(additions), mutations=len(selections)):
+        data = gql.execute(f"mutation({', '.join(params)}) {{ {' '.join(selections)} }}", mutation_vars)
+    pull_request = (data.get("updatePullRequest") or data.get("createPullRequest"))["pullRequest"]
+    commit = (data.get("createCommitOnBranch") or {}).get("commit") or {"oid": parent}
+
+    comment_result = None
+    if comment is not None and existing_pr:
+        comment_result = _comment_result(data)
+    elif comment is not None:
+        kind, selection, comment_input = _comment_mutation(pull_request["id"], None, comment)
+        with tracing.span("graphql.comment"):
+            comment_result = _comment_result(gql.execute(f"mutation($comment: {kind}) {{ {selection} }}",
+                                                         {"comment": comment_input}))
+
+    return {
+        "transport": "graphql",
+        "ref": f"refs/heads/{branch}",
+        "branch_created": not head,
+        "commit": commit["oid"],
+        "files": {"changed": len(additions), "unchanged": len(paths) - len(additions)},
+        "pull_request": {"number": pull_request["number"], "html_url": pull_request["url"],
+                         "node_id": pull_request["id"], "created": not existing_pr},
+        "comment": comment_result,
+    }
+
+
+def upsert_comment(gql: GitHubGraphQL, repo: str, number: int, body: str, marker: str = "pr") -> dict:
+    """Replace this token's comment carrying `marker` on PR `number`, or add one: two requests.
+
+    Raises GraphQLUnavailable when the lookup fails; an error from the
+    mutation is raised as-is, since the comment may already have been written.
+    """
+    owner, name = _split_repo(repo)
+    try:
+        data = gql.execute(
+            "query($owner: String!, $name: String!, $number: Int!) { repository(owner: $owner, name: $name) { "
+            f"pullRequest(number: $number) {{ id {COMMENT_FIELDS} }} }} }}",
+            {"owner": owner, "name": name, "number": number})
+    except GraphQLError as e:
+        raise GraphQLUnavailable(str(e), e.errors, e.status)
+    pull_request = (data.get("repository") or {}).get("pullRequest")
+    if not pull_request:
+        raise GraphQLUnavailable(f"Pull request #{number} not found in {repo}")
+    body = f"{body.rstrip()}\n\n{comment_marker(marker)}"
+    kind, selection, comment_input = _comment_mutation(pull_request["id"],
+                                                       _find_comment(pull_request, comment_marker(marker)), body)
+    return _comment_result(gql.execute(f"mutation($comment: {kind}) {{ {selection} }}", {"comment": comment_input}))
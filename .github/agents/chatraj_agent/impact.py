@@ -0,0 +1,209 @@
+import hashlib
+import json
+import os
+import re
+import subprocess
+import uuid
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set
+
+from .daemon import environ
+from .scanner import STATE_DIR, state_path
+
+SOURCE_EXTS = (".js", ".jsx", ".mjs", ".cjs", ".ts", ".tsx")
+RESOLVE_SUFFIXES = ("",) + SOURCE_EXTS + tuple("/index" + ext for ext in SOURCE_EXTS)
+SKIP_DIRS = {"node_modules", ".git", STATE_DIR, "coverage", "dist", "build",
+             "playwright-report", "cypress"}
+GRAPH_VERSION = 1
+# A changed path outside the import graph can only affect tests if it is code or
+# JSON a test may load, a fixture/snapshot/mock, or runner, babel or package config.
+TEST_INPUT_EXTS = SOURCE_EXTS + (".json",)
+TEST_DATA_DIRS = {"__fixtures__", "fixtures", "__snapshots__", "__mocks__"}
+TEST_CONFIG_RE = re.compile(r"(?:jest|vitest|vite|babel)\.(?:config|setup)\.[cm]?[jt]s|\.babelrc(?:\.json)?"
+                            r"|package(?:-lock)?\.json|.*\.snap")
+
+# import x from '...', import '...', export ... from '...', require('...'),
+# import('...') and jest.mock / vi.mock('...') all make a file depend on a module.
+IMPORT_RE = re.compile(
+    r"""(?:\bfrom\s*|\bimport\s*\(?\s*|\brequire\s*\(\s*|\b(?:jest|vi)\.(?:mock|doMock|requireActual|importActual)\s*\(\s*)(['"])([^'"\n]+)\1""")
+
+# project -> (root directories scanned for sources, files whose change affects every test)
+PROJECTS = {
+    "backend": (("Backend",), ("Backend/package.json", "Backend/package-lock.json",
+                               "Backend/jest.config.cjs", "Backend/babel.config.cjs")),
+    "frontend": (("frontend/src", "frontend/__tests__", "frontend/__mocks__"),
+                 ("frontend/package.json", "frontend/package-lock.json", "frontend/vitest.config.js",
+                  "frontend/vite.config.js", "frontend/vitest.setup.js", "frontend/jest.setup.js",
+                  "frontend/register-css-mock.js", "frontend/babel.config.cjs")),
+}
+
+
+def is_test_file(path: str) -> bool:
+    name = os.path.basename(path)
+    return (".test." in name or ".spec." in name or "/__tests__/" in f"/{path}") \
+        and name.endswith(SOURCE_EXTS)
+
+
+def can_affect_tests(path: str) -> bool:
+    """Whether a changed path the import graph cannot follow may still change a test's outcome."""
+    parts = path.split("/")
+    return path.endswith(TEST_INPUT_EXTS) or bool(TEST_DATA_DIRS.intersection(parts[:-1])) \
+        or bool(TEST_CONFIG_RE.fullmatch(parts[-1]))
+
+
+def parse_imports(text: str) -> List[str]:
+    return sorted({m.group(2) for m in IMPORT_RE.finditer(text)})
+
+
+class ImportGraph:
+    """Import graph of the Backend and frontend sources, cached on disk.
+
+    Each file's entry holds its size/mtime, content hash and raw import
+    specifiers. On a warm checkout unchanged files are recognised by stat
+    alone; a file whose stat changed is re-read but only re-parsed when its
+    content hash differs.
+    """
+
+    def __init__(self, repo_root: str):
+        self.repo_root = os.path.abspath(repo_root)
+        self.cache_path = os.path.join(self.repo_root, STATE_DIR, "import-graph.json")
+        self.files: Dict[str, dict] = {}
+        self.stats = {"files": 0, "stat_hits": 0, "hash_hits": 0, "parsed": 0}
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            return {}
+        return data.get("files", {}) if data.get("version") == GRAPH_VERSION else {}
+
+    def _save(self):
+        path = state_path(self.repo_root, "import-graph.json")
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"version": GRAPH_VERSION, "files": self.files}, fh, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    def _walk(self, root: str) -> Iterable[str]:
+        top = os.path.join(self.repo_root, root)
+        for dirpath, dirnames, filenames in os.walk(top):
+            dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+            for name in filenames:
+                if name.endswith(SOURCE_EXTS):
+                    yield os.path.relpath(os.path.join(dirpath, name), self.repo_root).replace(os.sep, "/")
+
+    def build(self) -> "ImportGraph":
+        cached = self._load()
+        for roots, _ in PROJECTS.values():
+            for root in roots:
+                for rel in self._walk(root):
+                    self.files[rel] = self._entry(rel, cached.get(rel))
+        self.stats["files"] = len(self.files)
+        self._save()
+        return self
+
+    def _entry(self, rel: str, old: Optional[dict]) -> dict:
+        st = os.stat(os.path.join(self.repo_root, rel))
+        if old and old["size"] == st.st_size and old["mtime"] == st.st_mtime_ns:
+            self.stats["stat_hits"] += 1
+            return old
+        with open(os.path.join(self.repo_root, rel), "rb") as fh:
+            data = fh.read()
+        digest = hashlib.sha1(data).hexdigest()
+        if old and old["sha"] == digest:
+            self.stats["hash_hits"] += 1
+            imports = old["imports"]
+        else:
+            self.stats["parsed"] += 1
+            imports = parse_imports(data.decode("utf-8", errors="replace"))
+        return {"size": st.st_size, "mtime": st.st_mtime_ns, "sha": digest, "imports": imports}
+
+    def resolve(self, importer: str, spec: str) -> Optional[str]:
+        if not spec.startswith("."):
+            return None  # package or alias import
+        base = os.path.normpath(os.path.join(os.path.dirname(importer), spec)).replace(os.sep, "/")
+        for suffix in RESOLVE_SUFFIXES:
+            if base + suffix in self.files:
+                return base + suffix
+        # Backend's jest moduleNameMapper strips `.js`, so `./x.js` may point at `./x.jsx` etc.
+        stem, ext = os.path.splitext(base)
+        if ext in SOURCE_EXTS:
+            for suffix in SOURCE_EXTS:
+                if stem + suffix in self.files:
+                    return stem + suffix
+        return None
+
+    def reverse_edges(self) -> Dict[str, Set[str]]:
+        rdeps: Dict[str, Set[str]] = {}
+        for path, entry in self.files.items():
+            for spec in entry["imports"]:
+                target = self.resolve(path, spec)
+                if target:
+                    rdeps.setdefault(target, set()).add(path)
+        return rdeps
+
+
+def changed_files(repo_root: str, base: str) -> List[str]:
+    """Files changed since the merge base with `base`, including uncommitted edits."""
+    changed: Set[str] = set()
+    for args in (["git", "diff", "--name-only", f"{base}...HEAD"],
+                 ["git", "diff", "--name-only", "HEAD"],
+                 ["git", "ls-files", "--others", "--exclude-standard"]):
+        try:
+            out = subprocess.check_output(args, cwd=repo_root, text=True, stderr=subprocess.DEVNULL, env=environ())
+        except (OSError, subprocess.CalledProcessError) as e:
+            raise RuntimeError(f"Could not diff against {base}: {e}")
+        changed.update(line.strip() for line in out.splitlines() if line.strip())
+    return sorted(changed)
+
+
+def select_tests(graph: ImportGraph, changed: Iterable[str]) -> Dict[str, dict]:
+    """Return, per project, the affected tests (with the chain that selected them), the skipped ones
+    and the changed paths ignored because they cannot affect tests (docs, images, Dockerfiles...)."""
+    changed = list(changed)
+    rdeps = graph.reverse_edges()
+    result = {}
+    for project, (roots, global_files) in PROJECTS.items():
+        tests = sorted(p for p in graph.files if is_test_file(p) and p.startswith(roots))
+        # Config files, and test inputs the graph cannot follow (a deleted module, a JSON
+        # fixture, a snapshot...), may affect any test: run them all.
+        project_dirs = tuple({r.split("/")[0] + "/" for r in roots})
+        outside = [c for c in changed if c.startswith(project_dirs) and c not in graph.files
+                   and c not in global_files]
+        ignored = {c: "cannot affect tests (not code, JSON, a fixture or test config)"
+                   for c in outside if not can_affect_tests(c)}
+        triggers = [c for c in changed if c in global_files]
+        unresolved = [c for c in outside if c not in ignored]
+        if triggers or unresolved:
+            why = (f"{triggers[0]} changed (affects all tests)" if triggers
+                   else f"{unresolved[0]} changed outside the import graph (affects all tests)")
+            result[project] = {"selected": {t: why for t in tests}, "skipped": {}, "ignored": ignored}
+            continue
+        # breadth-first from each changed file over reverse import edges
+        parent: Dict[str, Optional[str]] = {}
+        queue = deque()
+        for c in changed:
+            if c in graph.files and c.startswith(roots):
+                parent[c] = None
+                queue.append(c)
+        while queue:
+            node = queue.popleft()
+            for dependant in sorted(rdeps.get(node, ())):
+                if dependant not in parent:
+                    parent[dependant] = node
+                    queue.append(dependant)
+
+        def chain(path: str) -> str:
+            hops = []
+            while parent[path] is not None:
+                path = parent[path]
+                hops.append(path)
+            return "changed" if not hops else "imports " + " -> ".join(hops) + " (changed)"
+
+        result[project] = {
+            "selected": {t: chain(t) for t in tests if t in parent},
+            "skipped": {t: "no dependency on changed files" for t in tests if t not in parent},
+            "ignored": ignored,
+        }
+    return result
@@ -0,0 +1,211 @@
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from .slugs import EXISTING_SLUG_FILTER, MISSING_SLUG_FILTER
+
+# Operators that bound an index scan on a range (the "R" of equality-sort-range)
+RANGE_OPERATORS = {"$gt", "$gte", "$lt", "$lte", "$ne", "$nin", "$type", "$exists", "$regex"}
+
+
+class Sample(NamedTuple):
+    """Placeholder in a query shape, filled from a real document in `collection` (default: the shape's own)."""
+    field: str
+    collection: Optional[str] = None
+
+
+class QueryShape(NamedTuple):
+    name: str
+    collection: str
+    filter: dict
+    source: str
+    sort: Optional[List[Tuple[str, int]]] = None
+    limit: int = 0
+    projection: Optional[dict] = None
+
+
+# Hot Backend queries (collection names are Mongoose's pluralised model names)
+CATALOG = [
+    QueryShape("blogs.recent", "blogs", {}, "Backend/services/blog.service.js getAllBlogs",
+               sort=[("createdAt", -1)]),
+    QueryShape("projects.by_member", "projects", {"users": {"$in": [Sample("users")]}},
+               "Backend/services/project.service.js getUserProjects"),
+    QueryShape("projects.showcase", "projects", {}, "Backend/services/project.service.js getShowcase",
+               sort=[("users", -1)], limit=10),
+    QueryShape("users.by_email", "users", {"email": Sample("email")},
+               "Backend/services/user.service.js loginUser/verifyOtp"),
+    QueryShape("users.leaderboard", "users", {}, "Backend/services/user.service.js getLeaderboard",
+               sort=[("projects", -1)], limit=10),
+    QueryShape("blogs.missing_slug", "blogs", MISSING_SLUG_FILTER, "slugs.py iter_missing_slugs (auto-pr)",
+               projection={"_id": 1, "title": 1}),
+    QueryShape("blogs.existing_slugs", "blogs", EXISTING_SLUG_FILTER, "slugs.py load_existing_slugs (auto-pr)",
+               projection={"_id": 0, "slug": 1}),
+]
+
+
+def plan_stages(plan: dict) -> Iterator[dict]:
+    """Yield every stage of an explain plan tree, including classic and SBE layouts."""
+    if not plan:
+        return
+    if "queryPlan" in plan:
+        plan = plan["queryPlan"]
+    yield plan
+    if "inputStage" in plan:
+        yield from plan_stages(plan["inputStage"])
+    for child in plan.get("inputStages", []):
+        yield from plan_stages(child)
+
+
+def _branches(query: dict) -> List[dict]:
+    """Split a top-level `$or` into its branches, each merged with the other predicates."""
+    rest = {k: v for k, v in query.items() if k != "$or"}
+    return [{**rest, **branch} for branch in query["$or"]] if "$or" in query else [query]
+
+
+def propose_index(shape: QueryShape) -> Optional[List[Tuple[str, int]]]:
+    """Compound index for `shape` by the equality-sort-range rule, or None if no index helps.
+
+    A top-level `$or` gets an index only when every branch yields the same
+    one, since then a single index serves each branch of the OR plan.
+    """
+    proposals = []
+    for branch in _branches(shape.filter):
+        equality, ranges = [], []
+        for field, cond in branch.items():
+            if field.startswith("$"):
+                return None
+            operators = set(cond) if isinstance(cond, dict) and cond and \
+                all(str(k).startswith("$") for k in cond) else set()
+            if operators & RANGE_OPERATORS:
+                ranges.append(field)
+            elif not operators or operators <= {"$eq", "$in", "$all", "$elemMatch"}:
+                equality.append(field)
+            else:
+                return None
+        keys = [(field, 1) for field in equality]
+        keys += [(field, d) for field, d in shape.sort or [] if field not in equality]
+        keys += [(field, 1) for field in ranges if field not in dict(keys)]
+        proposals.append(keys)
+    if not proposals[0] or any(p != proposals[0] for p in proposals):
+        return None
+    return proposals[0]
+
+
+def covered_by(keys: List[Tuple[str, int]], indexes: Dict[str, dict]) -> Optional[str]:
+    """Name of an existing index whose key prefix equals `keys` (or `keys` with every direction flipped)."""
+    flipped = [(field, -d) for field, d in keys]
+    for name, info in indexes.items():
+        prefix = [(field, int(d)) for field, d in info["key"][:len(keys)]]
+        if prefix in (keys, flipped):
+            return name
+    return None
+
+
+def _resolve(value, db, collection: str):
+    if isinstance(value, Sample):
+        coll = db[value.collection or collection]
+        doc = coll.find_one({value.field: {"$exists": True, "$ne": []}}, {value.field: 1})
+        if doc is None:
+            raise LookupError(f"no {coll.name} document has `{value.field}` to sample")
+        found = doc[value.field]
+        return found[0] if isinstance(found, list) else found
+    if isinstance(value, dict):
+        return {k: _resolve(v, db, collection) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_resolve(v, db, collection) for v in value]
+    return value
+
+
+def explain(db, shape: QueryShape, query: dict) -> dict:
+    """Run the shape's find under `explain` with executionStats and summarise the winning plan."""
+    find = {"find": shape.collection, "filter": query}
+    if shape.sort:
+        find["sort"] = dict(shape.sort)
+    if shape.limit:
+        find["limit"] = shape.limit
+    if shape.projection:
+        find["projection"] = shape.projection
+    result = db.command({"explain": find, "verbosity": "executionStats"})
+    stats = result["executionStats"]
+    stages = list(plan_stages(result["queryPlanner"]["winningPlan"]))
+    names = [stage.get("stage") for stage in stages]
+    return {
+        "plan": " <- ".join(names),
+        "indexes": sorted({stage["indexName"] for stage in stages if stage.get("indexName")}),
+        "collscan": "COLLSCAN" in names,
+        "in_memory_sort": "SORT" in names,
+        "returned": stats["nReturned"],
+        "docs_examined": stats["totalDocsExamined"],
+        "keys_examined": stats["totalKeysExamined"],
+        "ms": stats["executionTimeMillis"],
+    }
+
+
+def _flagged(explained: dict) -> bool:
+    return explained["collscan"] or explained["in_memory_sort"]
+
+
+def _index_spec(keys: List[Tuple[str, int]]) -> str:
+    return "{ " + ", ".join(f"{field}: {d}" for field, d in keys) + " }"
+
+
+def advise(db, shapes: List[QueryShape] = CATALOG, apply: bool = False) -> dict:
+    """Explain every shape in `shapes` against `db`, flag collection scans and
+    in-memory sorts, and propose (or with `apply`, build) a compound index for each.
+
+    Shapes that share a proposed index build it once; after building, every
+    shape is explained again so the report shows docs examined before and after.
+    """
+    results, indexes_by_coll, proposals = [], {}, {}
+    for shape in shapes:
+        entry = {"shape": shape.name, "collection": shape.collection, "source": shape.source}
+        results.append(entry)
+        try:
+            query = _resolve(shape.filter, db, shape.collection)
+        except LookupError as e:
+            entry["skipped"] = str(e)
+            continue
+        entry["query"] = query
+        entry["before"] = explain(db, shape, query)
+        if not _flagged(entry["before"]):
+            continue
+        keys = propose_index(shape)
+        if keys is None:
+            entry["note"] = "no index serves this shape; consider changing the query"
+            continue
+        if shape.collection not in indexes_by_coll:
+            indexes_by_coll[shape.collection] = db[shape.collection].index_information()
+        existing = covered_by(keys, indexes_by_coll[shape.collection])
+        if existing:
+            entry["note"] = f"index {existing} matches but the planner did not use it"
+            continue
+        # A pending proposal with every direction flipped serves this shape too
+        pending = {keys: {"key": list(keys)} for coll, keys in proposals if coll == shape.collection}
+        keys = tuple(covered_by(keys, pending) or keys)
+        proposals.setdefault((shape.collection, keys), []).append(entry)
+
+    created = []
+    for (collection, keys), entries in proposals.items():
+        spec = _index_spec(list(keys))
+        for entry in entries:
+            entry["proposed_index"] = spec
+            entry["create_index"] = f"db.{collection}.createIndex({spec})"
+        if apply:
+            created.append({"collection": collection, "keys": spec,
+                            "name": db[collection].create_index(list(keys))})
+
+    if created:
+        for shape, entry in zip(shapes, results):
+            if "before" in entry:
+                entry["after"] = explain(db, shape, entry["query"])
+    for entry in results:
+        entry.pop("query", None)
+
+    flagged = [e["shape"] for e in results if "before" in e and _flagged(e["before"])]
+    unresolved = [e["shape"] for e in results if "before" in e and _flagged(e.get("after", e["before"]))]
+    return {
+        "database": db.name,
+        "shapes": results,
+        "flagged": flagged,
+        "proposed": [{"collection": c, "keys": _index_spec(list(k))} for c, k in proposals],
+        "created": created,
+        "unresolved": unresolved,
+    }
@@ -0,0 +1,516 @@
+import asyncio
+import json
+import math
+import os
+import random
+import secrets
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from typing import Dict, List, NamedTuple, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+from .daemon import environ
+
+try:
+    import aiohttp
+except ImportError:  # optional: falls back to pooled requests sessions on worker threads
+    aiohttp = None
+
+try:
+    import socketio  # python-socketio; needed for the Socket.IO fan-out scenario
+except ImportError:
+    socketio = None
+
+SEED_SCRIPT = os.path.join("scripts", "seed-loadtest.js")
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1"}
+# Latencies are recorded in microseconds and reported in milliseconds.
+UNIT = 1000.0
+
+
+class Histogram:
+    """HDR-style latency histogram with a fixed relative precision.
+
+    Values (integer microseconds) fall into power-of-two buckets that are
+    each split into linear sub-buckets, so every recorded value is kept to
+    `significant_figures` decimal digits whatever its magnitude, in memory
+    proportional to the number of distinct sub-buckets hit.
+    """
+
+    def __init__(self, significant_figures: int = 3):
+        self.significant_figures = significant_figures
+        self.sub_bits = max(1, math.ceil(math.log2(2 * 10 ** significant_figures)))
+        self.half = 1 << (self.sub_bits - 1)
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+        self.min = None
+        self.max = 0
+        self._sum = 0
+        self._sum_sq = 0
+
+    def _index(self, value: int) -> int:
+        bucket = max(0, value.bit_length() - self.sub_bits)
+        return bucket * self.half + (value >> bucket)
+
+    def _range(self, index: int):
+        """(lowest, highest) value sharing the sub-bucket `index`."""
+        bucket = 0 if index < 2 * self.half else (index - 2 * self.half) // self.half + 1
+        sub = index - bucket * self.half
+        return sub << bucket, ((sub + 1) << bucket) - 1
+
+    def record(self, value: float, count: int = 1):
+        value = max(0, int(value))
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.total += count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = max(self.max, value)
+        self._sum += value * count
+        self._sum_sq += value * value * count
+
+    def merge(self, other: "Histogram"):
+        if other.sub_bits != self.sub_bits:
+            raise ValueError("Cannot merge histograms with different precision")
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        if other.total:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        self._sum += other._sum
+        self._sum_sq += other._sum_sq
+
+    @property
+    def mean(self) -> float:
+        return self._sum / self.total if self.total else 0.0
+
+    @property
+    def stddev(self) -> float:
+        if not self.total:
+            return 0.0
+        return math.sqrt(max(0.0, self._sum_sq / self.total - self.mean ** 2))
+
+    def value_at_percentile(self, percentile: float) -> int:
+        """Highest value equivalent to the recorded value at `percentile` (0-100)."""
+        if not self.total:
+            return 0
+        target = max(1, math.ceil(percentile / 100.0 * self.total))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._range(index)[1], self.max)
+        return self.max
+
+    def summary(self, scale: float = UNIT) -> dict:
+        return {
+            "count": self.total,
+            "min": round((self.min or 0) / scale, 3),
+            "mean": round(self.mean / scale, 3),
+            "p50": round(self.value_at_percentile(50) / scale, 3),
+            "p95": round(self.value_at_percentile(95) / scale, 3),
+            "p99": round(self.value_at_percentile(99) / scale, 3),
+            "max": round(self.max / scale, 3),
+        }
+
+    def percentile_distribution(self, scale: float = UNIT, ticks_per_half_distance: int = 5) -> str:
+        """Text in HdrHistogram's `.hgrm` percentile-distribution format (values in ms)."""
+        lines = [f"{'Value':>12} {'Percentile':>14} {'TotalCount':>10} {'1/(1-Percentile)':>14}", ""]
+        if self.total:
+            ordered = sorted(self.counts)
+            cumulative, seen = [], 0
+            for index in ordered:
+                seen += self.counts[index]
+                cumulative.append(seen)
+            step = 0
+            while True:
+                percentile = 100.0 * (1 - 0.5 ** (step / ticks_per_half_distance))
+                target = max(1, math.ceil(percentile / 100.0 * self.total))
+                position = next(i for i, c in enumerate(cumulative) if c >= target)
+                value = min(self._range(ordered[position])[1], self.max)
+                fraction = cumulative[position] / self.total
+                inverse = f"{1 / (1 - fraction):14.2f}" if fraction < 1 else ""
+                lines.append(f"{value / scale:12.3f} {fraction:14.12f} {cumulative[position]:10d} {inverse}".rstrip())
+                if fraction >= 1:
+                    break
+                step += 1
+        lines += [f"#[Mean    = {self.mean / scale:12.3f}, StdDeviation   = {self.stddev / scale:12.3f}]",
+                  f"#[Max     = {self.max / scale:12.3f}, Total count    = {self.total:12d}]",
+                  f"#[Buckets = {len({i // self.half for i in self.counts}):12d}, "
+                  f"SubBuckets     = {2 * self.half:12d}]"]
+        return "\n".join(lines) + "\n"
+
+
+class Fixture(NamedTuple):
+    """Seeded data: `users` are {email, id, project} dicts sharing one `password`."""
+    password: str
+    users: List[dict]
+    projects: List[str]
+    blogs: List[str]
+
+
+class Stats:
+    """Per-endpoint latency histograms, status codes and transport errors."""
+
+    def __init__(self):
+        self.histograms: Dict[str, Histogram] = {}
+        self.statuses: Dict[str, Counter] = {}
+        self.errors: Counter = Counter()
+
+    def record(self, endpoint: str, micros: float, status: Optional[int] = None):
+        self.histograms.setdefault(endpoint, Histogram()).record(micros)
+        self.statuses.setdefault(endpoint, Counter())[str(status) if status is not None else "error"] += 1
+
+    def report(self, seconds: float) -> dict:
+        report = {}
+        for endpoint, hist in self.histograms.items():
+            statuses = self.statuses.get(endpoint, Counter())
+            ok = sum(n for s, n in statuses.items() if s.startswith("2"))
+            report[endpoint] = {"requests": hist.total, "ok": ok,
+                                "throughput_rps": round(hist.total / seconds, 2) if seconds else 0.0,
+                                "statuses": dict(statuses), "latency_ms": hist.summary()}
+        return report
+
+
+class _RequestsTransport:
+    """One pooled requests.Session per virtual user, driven from worker threads."""
+
+    name = "requests"
+
+    def __init__(self, base_url: str, users: int):
+        self.base_url = base_url.rstrip("/")
+        self.pool = ThreadPoolExecutor(max_workers=max(1, users), thread_name_prefix="loadtest")
+        self.sessions: Dict[int, requests.Session] = {}
+
+    async def request(self, user: int, method: str, path: str, **kwargs):
+        session = self.sessions.setdefault(user, requests.Session())
+        resp = await asyncio.get_running_loop().run_in_executor(
+            self.pool, lambda: session.request(method, self.base_url + path, timeout=30, **kwargs))
+        return resp.status_code, resp.content
+
+    async def close(self):
+        for session in self.sessions.values():
+            session.close()
+        self.pool.shutdown(wait=False)
+
+
+class _AiohttpTransport:
+    name = "aiohttp"
+
+    def __init__(self, base_url: str, users: int):
+        self.base_url = base_url.rstrip("/")
+        self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=max(1, users)),
+                                             timeout=aiohttp.ClientTimeout(total=30))
+
+    async def request(self, user: int, method: str, path: str, **kwargs):
+        async with self.session.request(method, self.base_url + path, **kwargs) as resp:
+            return resp.status, await resp.read()
+
+    async def close(self):
+        await self.session.close()
+
+
+def _forwarded_for() -> str:
+    return f"10.{random.randint(0, 255)}.{random.randint(0, 255)}.{random.randint(1, 254)}"
+
+
+async def _timed(stats: Stats, transport, user: int, endpoint: str, method: str, path: str,
+                 headers: dict, rotate_ip: bool, **kwargs):
+    if rotate_ip:
+        # Backend trusts one proxy hop: a fresh client address per request keeps the
+        # per-IP rate limiters from turning the run into a 429 benchmark
+        headers = {**headers, "X-Forwarded-For": _forwarded_for()}
+    started = time.perf_counter()
+    try:
+        status, body = await transport.request(user, method, path, headers=headers, **kwargs)
+    except Exception:
+        stats.record(endpoint, (time.perf_counter() - started) * 1e6, None)
+        return None, b""
+    stats.record(endpoint, (time.perf_counter() - started) * 1e6, status)
+    return status, body
+
+
+async def virtual_user(user: int, transport, fixture: Fixture, stats: Stats, deadline: float,
+                       think: float = 0.0, rotate_ip: bool = True) -> Optional[str]:
+    """Log in, then list projects and fetch a random blog by id until `deadline`; returns the JWT."""
+    account = fixture.users[user % len(fixture.users)]
+    status, body = await _timed(stats, transport, user, "login", "POST", "/api/users/login", {}, rotate_ip,
+                                json={"email": account["email"], "password": fixture.password})
+    try:
+        token = json.loads(body)["data"]["token"] if status == 200 else None
+    except (ValueError, KeyError, TypeError):
+        token = None
+    if not token:
+        return None
+    auth = {"Authorization": f"Bearer {token}"}
+    while time.perf_counter() < deadline:
+        await _timed(stats, transport, user, "projects", "GET", "/api/projects/all", auth, rotate_ip)
+        if fixture.blogs:
+            await _timed(stats, transport, user, "blog", "GET", f"/api/blogs/{random.choice(fixture.blogs)}",
+                         {}, rotate_ip)
+        if think:
+            await asyncio.sleep(think)
+    return token
+
+
+async def socket_fanout(base_url: str, fixture: Fixture, tokens: Dict[int, str], stats: Stats,
+                        messages: int = 50, interval: float = 0.05) -> dict:
+    """Join every logged-in user to its project room and time each message's delivery to all members."""
+    if socketio is None:
+        return {"skipped": "python-socketio is not installed (pip install \"python-socketio[asyncio_client]\")"}
+    if not tokens:
+        return {"skipped": "no virtual user logged in"}
+    run_id = secrets.token_hex(4)
+    delivered = Counter()
+    clients = {}
+
+    def on_message(data):
+        parts = str((data or {}).get("message", "")).split()
+        if len(parts) == 4 and parts[0] == "loadtest" and parts[1] == run_id:
+            stats.record("socket_fanout", (time.perf_counter_ns() - int(parts[3])) / 1000, 200)
+            delivered[parts[2]] += 1
+
+    async def connect(user: int, token: str):
+        client = socketio.AsyncClient(reconnection=False)
+        client.on("project-message", on_message)
+        project = fixture.users[user % len(fixture.users)]["project"]
+        started = time.perf_counter()
+        try:
+            await client.connect(f"{base_url}?projectId={project}", auth={"token": token},
+                                 transports=["websocket"], wait_timeout=10)
+        except Exception:
+            stats.record("socket_connect", (time.perf_counter() - started) * 1e6, None)
+            return
+        stats.record("socket_connect", (time.perf_counter() - started) * 1e6, 200)
+        clients[user] = (client, project)
+
+    await asyncio.gather(*(connect(user, token) for user, token in tokens.items()))
+    rooms = Counter(project for _, project in clients.values())
+    senders = {}
+    for user, (client, project) in clients.items():
+        senders.setdefault(project, (user, client))
+    expected, sent = 0, 0
+    for i in range(messages if senders else 0):
+        project = list(senders)[i % len(senders)]
+        user, client = senders[project]
+        await client.emit("project-message", {
+            "message": f"loadtest {run_id} {i} {time.perf_counter_ns()}",
+            "sender": {"_id": fixture.users[user % len(fixture.users)]["id"], "email": "loadtest"}})
+        expected += rooms[project]
+        sent += 1
+        await asyncio.sleep(interval)
+    drain_until = time.perf_counter() + 5
+    while sum(delivered.values()) < expected and time.perf_counter() < drain_until:
+        await asyncio.sleep(0.05)
+    await asyncio.gather(*(client.disconnect() for client, _ in clients.values()), return_exceptions=True)
+    return {"connected": len(clients), "rooms": len(rooms), "messages": sent,
+            "expected_deliveries": expected, "deliveries": sum(delivered.values())}
+
+
+async def run_load(base_url: str, fixture: Fixture, users: int = 20, duration: float = 30.0,
+                   ramp_up: float = 0.0, think: float = 0.0, messages: int = 50,
+                   rotate_ip: bool = True) -> dict:
+    """Drive `users` virtual users against `base_url` for `duration` seconds, then the Socket.IO fan-out."""
+    transport = (_AiohttpTransport if aiohttp is not None else _RequestsTransport)(base_url, users)
+    stats = Stats()
+    started = time.perf_counter()
+    deadline = started + ramp_up + duration
+
+    async def start(user: int):
+        if ramp_up:
+            await asyncio.sleep(ramp_up * user / users)
+        return user, await virtual_user(user, transport, fixture, stats, deadline, think, rotate_ip)
+
+    try:
+        results = await asyncio.gather(*(start(user) for user in range(users)))
+    finally:
+        await transport.close()
+    seconds = time.perf_counter() - started
+    tokens = {user: token for user, token in results if token}
+    http = stats.report(seconds)
+    socket_report = await socket_fanout(base_url, fixture, tokens, stats, messages=messages) if messages else \
+        {"skipped": "--messages 0"}
+    for endpoint in ("socket_connect", "socket_fanout"):
+        if endpoint in stats.histograms:
+            socket_report[f"{endpoint}_ms"] = stats.histograms[endpoint].summary()
+    total = sum(r["requests"] for r in http.values())
+    return {
+        "target": base_url, "users": users, "duration_s": round(seconds, 3), "transport": transport.name,
+        "logged_in": len(tokens), "requests": total, "throughput_rps": round(total / seconds, 2),
+        "endpoints": http, "socket": socket_report, "histograms": stats.histograms,
+    }
+
+
+# -- local Backend and its services ------------------------------------------------
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port: int, proc: subprocess.Popen, timeout: float = 30.0, name: str = "process"):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{name} exited with code {proc.returncode} during startup")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{name} did not accept connections on port {port} within {timeout:.0f}s")
+
+
+@contextmanager
+def _process(argv, name: str, port: int, **kwargs):
+    kwargs.setdefault("env", environ())
+    proc = subprocess.Popen(argv, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **kwargs)
+    try:
+        wait_for_port(port, proc, name=name)
+        yield proc
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def mongodb_hosts(uri: str) -> List[str]:
+    """Host names in a MongoDB connection string (without credentials or ports)."""
+    if uri.startswith("mongodb+srv://"):
+        return [urlsplit(uri).hostname or ""]
+    hosts = []
+    for host in uri.split("://", 1)[-1].split("/", 1)[0].rsplit("@", 1)[-1].split(","):
+        hosts.append(host[1:host.index("]")] if host.startswith("[") else host.rsplit(":", 1)[0])
+    return hosts
+
+
+def is_local_uri(uri: str) -> bool:
+    return not uri.startswith("mongodb+srv://") and all(h.lower() in LOCAL_HOSTS for h in mongodb_hosts(uri))
+
+
+@contextmanager
+def local_mongodb(uri: Optional[str] = None, allow_remote: bool = False):
+    """Yield (uri, description): `uri` as given, else a throwaway `mongod` in a temp dir.
+
+    The seeded users share a known password, so a `uri` that is not on this
+    machine is refused unless `allow_remote` is set.
+    """
+    if uri:
+        if not allow_remote and not is_local_uri(uri):
+            raise RuntimeError(f"Refusing to seed load-test users into MongoDB on {', '.join(mongodb_hosts(uri))}; "
+                               "pass --allow-remote-mongodb if this database is meant for load tests")
+        yield uri, "external"
+        return
+    if not shutil.which("mongod", path=environ().get("PATH")):
+        raise RuntimeError("MongoDB is required: install mongod or pass --mongodb-uri")
+    port = free_port()
+    with tempfile.TemporaryDirectory(prefix="chatraj-loadtest-mongo-") as dbpath, \
+            _process(["mongod", "--dbpath", dbpath, "--port", str(port), "--bind_ip", "127.0.0.1", "--quiet"],
+                     "mongod", port):
+        yield f"mongodb://127.0.0.1:{port}/chatraj_loadtest", "local mongod"
+
+
+@contextmanager
+def local_redis(url: Optional[str] = None):
+    """Yield (url, description): `url`, a throwaway `redis-server`, or None for Backend's in-memory stand-in."""
+    if url:
+        yield url, "external"
+        return
+    if not shutil.which("redis-server", path=environ().get("PATH")):
+        yield None, "in-memory stand-in (REDIS_URL unset)"
+        return
+    port = free_port()
+    with _process(["redis-server", "--port", str(port), "--bind", "127.0.0.1", "--save", "", "--appendonly", "no"],
+                  "redis-server", port):
+        yield f"redis://127.0.0.1:{port}", "local redis-server"
+
+
+def _seed_script(backend_dir: str, mongodb_uri: str, *args: str, **env) -> dict:
+    env = dict(environ(), MONGODB_URI=mongodb_uri, **{k: str(v) for k, v in env.items()})
+    out = subprocess.run(["node", SEED_SCRIPT, *args], cwd=backend_dir, env=env, capture_output=True, text=True)
+    if out.returncode != 0:
+        raise RuntimeError(f"{SEED_SCRIPT} {' '.join(args)} failed: {out.stderr.strip() or out.stdout.strip()}")
+    return json.loads(next(line for line in reversed(out.stdout.splitlines()) if line.startswith("{")))
+
+
+def seed(backend_dir: str, mongodb_uri: str, users: int, projects: int, blogs: int) -> Fixture:
+    return Fixture(**_seed_script(backend_dir, mongodb_uri, LOADTEST_USERS=users, LOADTEST_PROJECTS=projects,
+                                  LOADTEST_BLOGS=blogs))
+
+
+def cleanup(backend_dir: str, mongodb_uri: str) -> dict:
+    """Delete the seeded users, projects, blogs and the messages sent to the seeded rooms."""
+    return _seed_script(backend_dir, mongodb_uri, "--cleanup")
+
+
+@contextmanager
+def local_backend(backend_dir: str, mongodb_uri: str, redis_url: Optional[str]):
+    """Start `node server.js` on a free port (NODE_ENV=test, so no CSRF) and yield its base URL."""
+    port = free_port()
+    env = dict(environ(), PORT=str(port), NODE_ENV="test", MONGODB_URI=mongodb_uri,
+               JWT_SECRET=environ().get("JWT_SECRET") or secrets.token_hex(32))
+    env.pop("REDIS_URL", None)
+    if redis_url:
+        env["REDIS_URL"] = redis_url
+    with _process(["node", "server.js"], "Backend", port, cwd=backend_dir, env=env):
+        yield f"http://127.0.0.1:{port}"
+
+
+def write_histograms(histograms: Dict[str, Histogram], out_dir: str) -> List[str]:
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for endpoint, hist in sorted(histograms.items()):
+        path = os.path.join(out_dir, f"{endpoint}.hgrm")
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(hist.percentile_distribution())
+        paths.append(path)
+    return paths
+
+
+def run_loadtest(repo_root: str, users: int = 20, duration: float = 30.0, ramp_up: float = 0.0,
+                 think: float = 0.0, messages: int = 50, rooms: int = 5, blogs: int = 20,
+                 url: Optional[str] = None, mongodb_uri: Optional[str] = None, redis_url: Optional[str] = None,
+                 rotate_ip: bool = True, out_dir: Optional[str] = None, allow_remote: bool = False) -> dict:
+    """Seed MongoDB, start the Backend unless `url` is given, run the load and write `.hgrm` files.
+
+    Without `mongodb_uri` a temporary `mongod` is used; in a given database
+    the seeded records are deleted again when the run ends. A running
+    Backend at `url` only sees the fixtures in its own database, so `url`
+    needs `mongodb_uri`. Raises RuntimeError when no virtual user logs in.
+    """
+    if url and not mongodb_uri:
+        raise ValueError("--url needs --mongodb-uri: the fixtures must be seeded into the database "
+                         "that Backend reads")
+    backend_dir = os.path.join(repo_root, "Backend")
+    services = {}
+    with ExitStack() as stack:
+        mongodb_uri, services["mongodb"] = stack.enter_context(local_mongodb(mongodb_uri, allow_remote))
+        if services["mongodb"] == "external":
+            @stack.callback
+            def _cleanup():
+                services["cleaned_up"] = cleanup(backend_dir, mongodb_uri)
+        fixture = seed(backend_dir, mongodb_uri, users, rooms, blogs)
+        if not url:
+            redis_url, services["redis"] = stack.enter_context(local_redis(redis_url))
+            url = stack.enter_context(local_backend(backend_dir, mongodb_uri, redis_url))
+        report = asyncio.run(run_load(url, fixture, users=users, duration=duration, ramp_up=ramp_up,
+                                      think=think, messages=messages, rotate_ip=rotate_ip))
+    if users and not report["logged_in"]:
+        statuses = report["endpoints"].get("login", {}).get("statuses", {})
+        raise RuntimeError(f"No virtual user could log in to {report['target']} (login statuses: {statuses}); "
+                           "is it serving from the seeded database?")
+    report["services"] = services
+    histograms = report.pop("histograms")
+    if out_dir:
+        report["histogram_files"] = write_histograms(histograms, out_dir)
+    return report
@@ -0,0 +1,260 @@
+import errno
+import hashlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+import uuid
+from typing import Dict, List, Optional, Sequence
+
+from .daemon import environ
+
+DEFAULT_MAX_BYTES = 5 * 1024 ** 3
+ENTRY_DIR = "entries"
+STATS_FILE = "stats.json"
+META_FILE = "meta.json"
+
+
+def node_version(project_dir: str, repo_root: Optional[str] = None) -> str:
+    """Node version from the nearest `.nvmrc` (project, then repo root, then Backend/), else `node --version`."""
+    candidates = [project_dir]
+    if repo_root:
+        candidates += [repo_root, os.path.join(repo_root, "Backend")]
+    for directory in candidates:
+        try:
+            with open(os.path.join(directory, ".nvmrc"), "r", encoding="utf-8") as fh:
+                version = fh.read().strip()
+        except OSError:
+            continue
+        if version:
+            return version.lstrip("v")
+    try:
+        return subprocess.check_output(["node", "--version"], text=True, env=environ()).strip().lstrip("v")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def cache_key(project_dir: str, node: str, command: Sequence[str]) -> str:
+    """SHA-256 over package-lock.json, the Node version, the platform and the install command.
+
+    The platform is part of the key because native addons built on one OS or
+    CPU architecture cannot be reused on another.
+    """
+    lock = os.path.join(project_dir, "package-lock.json")
+    if not os.path.isfile(lock):
+        raise FileNotFoundError(f"{lock} not found; the npm cache needs a lockfile")
+    h = hashlib.sha256()
+    with open(lock, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    h.update(f"\0node={node}\0platform={sys.platform}-{platform.machine()}\0cmd={' '.join(command)}".encode())
+    return h.hexdigest()
+
+
+def tree_size(path: str) -> Dict[str, int]:
+    files = size = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                st = os.lstat(os.path.join(dirpath, name))
+            except OSError:
+                continue
+            files += 1
+            size += st.st_size
+    return {"files": files, "bytes": size}
+
+
+def _reflink_copy(src: str, dst: str):
+    """Copy a tree using copy-on-write clones where the filesystem supports them."""
+    if sys.platform.startswith("linux") and shutil.which("cp"):
+        subprocess.run(["cp", "-a", "--reflink=auto", src, dst], check=True)
+    elif sys.platform == "darwin":
+        subprocess.run(["cp", "-Rc", src, dst], check=True)  # APFS clonefile
+    else:
+        shutil.copytree(src, dst, symlinks=True)
+
+
+def link_tree(src: str, dst: str) -> str:
+    """Materialise `src` at `dst` with hardlinks, falling back to a reflink/copy across devices.
+
+    Symlinks (e.g. node_modules/.bin) are recreated rather than followed.
+    Returns the method used.
+    """
+    try:
+        os.makedirs(dst)
+        for dirpath, dirnames, filenames in os.walk(src):
+            rel = os.path.relpath(dirpath, src)
+            target_dir = dst if rel == "." else os.path.join(dst, rel)
+            for name in dirnames:
+                s = os.path.join(dirpath, name)
+                if os.path.islink(s):
+                    os.symlink(os.readlink(s), os.path.join(target_dir, name))
+                else:
+                    os.mkdir(os.path.join(target_dir, name))
+            for name in filenames:
+                s = os.path.join(dirpath, name)
+                if os.path.islink(s):
+                    os.symlink(os.readlink(s), os.path.join(target_dir, name))
+                else:
+                    os.link(s, os.path.join(target_dir, name))
+        return "hardlink"
+    except OSError as e:
+        if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+            raise
+    shutil.rmtree(dst, ignore_errors=True)
+    _reflink_copy(src, dst)
+    return "copy"
+
+
+def _remove_tree(path: str):
+    """Move `path` aside before deleting it so a crash never leaves a half-deleted tree in place."""
+    if not os.path.lexists(path):
+        return
+    trash = f"{path}.{uuid.uuid4().hex}.old"
+    os.rename(path, trash)
+    shutil.rmtree(trash, ignore_errors=True)
+
+
+class NodeModulesCache:
+    """Content-addressed store of `node_modules` snapshots.
+
+    Each entry lives in `entries/<key>/` with the snapshot under
+    `node_modules/` and a `meta.json` recording its size and how long the
+    install took. Entries are created in a temporary directory and renamed
+    into place, so a concurrent or interrupted run never sees a partial
+    snapshot. Restores hardlink the files, so a restored tree must not be
+    edited in place; npm replaces files rather than rewriting them.
+    """
+
+    def __init__(self, root: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(root, ENTRY_DIR), exist_ok=True)
+
+    def entry_path(self, key: str) -> str:
+        return os.path.join(self.root, ENTRY_DIR, key)
+
+    def _meta(self, key: str) -> Optional[dict]:
+        try:
+            with open(os.path.join(self.entry_path(key), META_FILE), "r", encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def _write_json(self, path: str, data: dict):
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, indent=2)
+        os.replace(tmp, path)
+
+    def entries(self) -> List[dict]:
+        result = []
+        for key in os.listdir(os.path.join(self.root, ENTRY_DIR)):
+            meta = self._meta(key)
+            if meta is not None:
+                result.append(dict(meta, key=key))
+        return result
+
+    def restore(self, key: str, dest: str) -> Optional[dict]:
+        """Replace `dest` with the snapshot for `key`; returns its metadata, or None on a miss."""
+        meta = self._meta(key)
+        if meta is None:
+            return None
+        staged = f"{dest}.{uuid.uuid4().hex}.tmp"
+        method = link_tree(os.path.join(self.entry_path(key), "node_modules"), staged)
+        _remove_tree(dest)
+        os.rename(staged, dest)
+        meta["last_used"] = time.time()
+        self._write_json(os.path.join(self.entry_path(key), META_FILE), meta)
+        return dict(meta, method=method)
+
+    def populate(self, key: str, source: str, project: str, install_seconds: float) -> dict:
+        """Snapshot `source` (a freshly installed node_modules) under `key`, then evict to the size cap."""
+        staging = os.path.join(self.root, f"tmp-{uuid.uuid4().hex}")
+        os.makedirs(staging)
+        try:
+            # copied, not linked: install scripts such as patch-package rewrite files in place
+            _reflink_copy(source, os.path.join(staging, "node_modules"))
+            meta = dict(tree_size(source), project=project, created=time.time(), last_used=time.time(),
+                        install_seconds=round(install_seconds, 2))
+            self._write_json(os.path.join(staging, META_FILE), meta)
+            try:
+                os.rename(staging, self.entry_path(key))
+            except OSError:
+                if self._meta(key) is None:
+                    raise
+                # another run stored the same key first; keep theirs
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        self.evict(keep=key)
+        return meta
+
+    def evict(self, keep: Optional[str] = None) -> List[str]:
+        """Drop least recently used entries until the cache fits in `max_bytes`."""
+        entries = sorted(self.entries(), key=lambda e: e.get("last_used", 0))
+        total = sum(e["bytes"] for e in entries)
+        evicted = []
+        for e in entries:
+            if total <= self.max_bytes:
+                break
+            if e["key"] == keep:
+                continue
+            _remove_tree(self.entry_path(e["key"]))
+            total -= e["bytes"]
+            evicted.append(e["key"])
+        return evicted
+
+    def load_stats(self) -> dict:
+        try:
+            with open(os.path.join(self.root, STATS_FILE), "r", encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {}
+
+    def record(self, project: str, hit: bool, bytes_saved: int = 0, seconds_saved: float = 0.0):
+        stats = self.load_stats()
+        s = stats.setdefault(project, {"hits": 0, "misses": 0, "bytes_saved": 0, "seconds_saved": 0.0})
+        s["hits" if hit else "misses"] += 1
+        s["bytes_saved"] += bytes_saved
+        s["seconds_saved"] = round(s["seconds_saved"] + seconds_saved, 2)
+        self._write_json(os.path.join(self.root, STATS_FILE), stats)
+
+    def summary(self) -> dict:
+        entries = self.entries()
+        projects = {}
+        for project, s in self.load_stats().items():
+            lookups = s["hits"] + s["misses"]
+            projects[project] = dict(s, hit_rate=round(s["hits"] / lookups, 3) if lookups else 0.0)
+        return {"root": self.root, "entries": len(entries), "bytes": sum(e["bytes"] for e in entries),
+                "max_bytes": self.max_bytes, "projects": projects}
+
+
+def install(cache: NodeModulesCache, project_dir: str, command: Sequence[str], node: str,
+            use_cache: bool = True) -> dict:
+    """Restore `project_dir/node_modules` from the cache, or run `command` and snapshot the result."""
+    from .suites import resolve_executable
+
+    project = os.path.basename(os.path.normpath(project_dir))
+    key = cache_key(project_dir, node, command)
+    dest = os.path.join(project_dir, "node_modules")
+    started = time.perf_counter()
+    if use_cache:
+        meta = cache.restore(key, dest)
+        if meta is not None:
+            cache.record(project, True, meta["bytes"], meta.get("install_seconds", 0.0))
+            return {"project": project, "key": key, "hit": True, "method": meta["method"],
+                    "files": meta["files"], "bytes": meta["bytes"],
+                    "seconds": round(time.perf_counter() - started, 2)}
+    result = subprocess.run(resolve_executable(command), cwd=project_dir, env=environ())
+    if result.returncode != 0:
+        raise RuntimeError(f"Command failed ({result.returncode}): {' '.join(command)}")
+    seconds = time.perf_counter() - started
+    summary = {"project": project, "key": key, "hit": False, "seconds": round(seconds, 2)}
+    if use_cache and os.path.isdir(dest):
+        meta = cache.populate(key, dest, project, seconds)
+        cache.record(project, False)
+        summary.update(files=meta["files"], bytes=meta["bytes"])
+    return summary
@@ -0,0 +1,196 @@
+import json
+import os
+import sqlite3
+import statistics
+import subprocess
+import time
+from statistics import NormalDist
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .daemon import environ
+
+# Metrics compared by `perf-compare` unless others are requested; higher is worse for all of them.
+DEFAULT_METRICS = ("wall", "cpu", "children_cpu", "children_peak_rss_mb", "http_requests")
+# Numeric span attributes that are identifiers or outcomes rather than sizes
+NON_SIZE_ATTRS = {"status", "returncode", "batch_size"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    commit_sha TEXT NOT NULL,
+    command TEXT NOT NULL,
+    recorded_at REAL NOT NULL,
+    ok INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_commit ON runs (commit_sha);
+CREATE TABLE IF NOT EXISTS samples (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    op TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (run_id, op, metric)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS samples_op ON samples (op, metric);
+"""
+
+
+def current_commit(repo_root: str) -> str:
+    """HEAD of `repo_root` (GITHUB_SHA in Actions), or "unknown" outside git."""
+    sha = environ().get("GITHUB_SHA")
+    if sha:
+        return sha
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=repo_root, text=True,
+                                       stderr=subprocess.DEVNULL, env=environ()).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def aggregate_spans(spans: Iterable[dict]) -> Dict[str, Dict[str, float]]:
+    """Fold a trace into {op: {metric: value}}; repeated spans of one op are summed."""
+    ops: Dict[str, Dict[str, float]] = {}
+    for s in spans:
+        m = ops.setdefault(s["name"], {"count": 0})
+        m["count"] += 1
+        for key in ("wall", "cpu", "children_cpu"):
+            m[key] = m.get(key, 0.0) + s.get(key, 0.0)
+        if s.get("children_peak_rss_mb") is not None:
+            m["children_peak_rss_mb"] = max(m.get("children_peak_rss_mb", 0.0), s["children_peak_rss_mb"])
+        values = dict(s.get("counters") or {})
+        values.update({k: v for k, v in (s.get("attrs") or {}).items()
+                       if k not in NON_SIZE_ATTRS and isinstance(v, (int, float)) and not isinstance(v, bool)})
+        for key, value in values.items():
+            m[key] = m.get(key, 0) + value
+    return ops
+
+
+class PerfHistory:
+    """Append-only SQLite ledger of per-operation metrics, one run per agent invocation."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def record(self, commit: str, command: str, spans: Iterable[dict], ok: bool = True,
+               recorded_at: Optional[float] = None) -> int:
+        ops = aggregate_spans(spans)
+        with self.db:
+            cur = self.db.execute("INSERT INTO runs (commit_sha, command, recorded_at, ok) VALUES (?, ?, ?, ?)",
+                                  (commit, command, recorded_at or time.time(), int(ok)))
+            run_id = cur.lastrowid
+            self.db.executemany("INSERT INTO samples (run_id, op, metric, value) VALUES (?, ?, ?, ?)",
+                                [(run_id, op, metric, float(value))
+                                 for op, metrics in ops.items() for metric, value in metrics.items()])
+        return run_id
+
+    def import_trace(self, path: str, commit: str, command: Optional[str] = None) -> int:
+        """Record a JSON trace written with --trace / CHATRAJ_TRACE (not the chrome format)."""
+        with open(path, "r", encoding="utf-8") as fh:
+            spans = json.load(fh).get("spans", [])
+        if command is None:
+            roots = [s["name"] for s in spans if s.get("parent") is None]
+            command = roots[-1] if roots else os.path.basename(path)
+        return self.record(commit, command, spans, ok=not any(s.get("error") for s in spans
+                                                               if s.get("parent") is None))
+
+    def runs(self, limit: int = 20) -> List[dict]:
+        rows = self.db.execute("SELECT id, commit_sha, command, recorded_at, ok FROM runs "
+                               "ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [{"id": r[0], "commit": r[1], "command": r[2], "recorded_at": r[3], "ok": bool(r[4])}
+                for r in rows]
+
+    def samples(self, run_id: int) -> Dict[str, Dict[str, float]]:
+        ops: Dict[str, Dict[str, float]] = {}
+        for op, metric, value in self.db.execute(
+                "SELECT op, metric, value FROM samples WHERE run_id = ?", (run_id,)):
+            ops.setdefault(op, {})[metric] = value
+        return ops
+
+    def latest_commit(self) -> Optional[str]:
+        row = self.db.execute("SELECT commit_sha FROM runs WHERE ok = 1 ORDER BY id DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    def series(self, command: str, op: str, metric: str, commit: str, window: int):
+        """Values of `op.metric` in `command` runs at `commit`, and from the last `window` successful
+        `command` runs before it (an op such as `agent.run_command` means different work per command)."""
+        current = [r[0] for r in self.db.execute(
+            "SELECT s.value FROM samples s JOIN runs r ON r.id = s.run_id "
+            "WHERE r.command = ? AND s.op = ? AND s.metric = ? AND r.commit_sha = ? AND r.ok = 1",
+            (command, op, metric, commit))]
+        first = self.db.execute("SELECT MIN(id) FROM runs WHERE commit_sha = ?", (commit,)).fetchone()[0]
+        baseline = [r[0] for r in self.db.execute(
+            "SELECT s.value FROM samples s JOIN runs r ON r.id = s.run_id "
+            "WHERE r.command = ? AND s.op = ? AND s.metric = ? AND r.commit_sha != ? AND r.ok = 1 "
+            "AND r.id < ? ORDER BY r.id DESC LIMIT ?", (command, op, metric, commit, first or 0, window))]
+        return current, baseline
+
+    def ops_at(self, commit: str, command: Optional[str] = None) -> List[Tuple[str, str]]:
+        """(command, op) pairs recorded by successful runs at `commit`, optionally for one command."""
+        return [(r[0], r[1]) for r in self.db.execute(
+            "SELECT DISTINCT r.command, s.op FROM samples s JOIN runs r ON r.id = s.run_id "
+            "WHERE r.commit_sha = ? AND r.ok = 1 AND (? IS NULL OR r.command = ?) ORDER BY r.command, s.op",
+            (commit, command, command))]
+
+
+def detect_regression(current: Sequence[float], baseline: Sequence[float], alpha: float = 0.01,
+                      min_change: float = 0.10, min_baseline: int = 5) -> Optional[dict]:
+    """Compare the mean of `current` with a robust model of `baseline`.
+
+    The baseline is summarised by its median and MAD (scaled to a standard
+    deviation), so one slow outlier run does not widen it. A result is a
+    regression when the robust z-score exceeds the one-sided critical value
+    for `alpha` and the increase over the median is at least `min_change`;
+    the second condition keeps very stable, tiny metrics from flagging noise.
+    Returns None when there is not enough baseline data.
+    """
+    if not current or len(baseline) < min_baseline:
+        return None
+    value = statistics.fmean(current)
+    median = statistics.median(baseline)
+    mad = statistics.median(abs(b - median) for b in baseline) * 1.4826
+    # floor the spread so a perfectly flat baseline does not divide by zero
+    spread = max(mad, abs(median) * 0.01, 1e-9)
+    z = (value - median) / spread
+    change = (value - median) / median if median else (float("inf") if value > 0 else 0.0)
+    critical = NormalDist().inv_cdf(1 - alpha)
+    return {"value": value, "baseline_median": median, "baseline_n": len(baseline),
+            "change": change, "z": z, "regression": z > critical and change >= min_change}
+
+
+def compare(history: PerfHistory, commit: Optional[str] = None, metrics: Sequence[str] = DEFAULT_METRICS,
+            window: int = 20, alpha: float = 0.01, min_change: float = 0.10,
+            min_baseline: int = 5, command: Optional[str] = None) -> dict:
+    commit = commit or history.latest_commit()
+    result = {"commit": commit, "command": command, "window": window, "alpha": alpha, "min_change": min_change,
+              "checks": [], "regressions": 0, "insufficient": 0}
+    if commit is None:
+        return result
+    for run_command, op in history.ops_at(commit, command):
+        for metric in metrics:
+            current, baseline = history.series(run_command, op, metric, commit, window)
+            if not current:
+                continue
+            check = detect_regression(current, baseline, alpha, min_change, min_baseline)
+            if check is None:
+                result["insufficient"] += 1
+                continue
+            result["checks"].append({"command": run_command, "op": op, "metric": metric, **check})
+            result["regressions"] += int(check["regression"])
+    return result
+
+
+def format_comparison(result: dict) -> str:
+    lines = [f"perf-compare {(result['commit'] or 'n/a')[:12]} vs previous {result['window']} runs "
+             f"(alpha={result['alpha']}, min change {result['min_change']:.0%})",
+             f"{'command':<16}{'op':<34}{'metric':<22}{'value':>10}{'median':>10}{'change':>9}{'z':>7}"]
+    for c in sorted(result["checks"], key=lambda c: (not c["regression"], -c["z"])):
+        lines.append(f"{c['command'][:15]:<16}{c['op'][:33]:<34}{c['metric'][:21]:<22}{c['value']:>10.3f}{c['baseline_median']:>10.3f}"
+                     f"{c['change']:>+9.1%}{c['z']:>7.1f}" + ("  REGRESSION" if c["regression"] else ""))
+    if result["insufficient"]:
+        lines.append(f"{result['insufficient']} command/op/metric checks skipped: not enough baseline runs yet")
+    lines.append(f"{result['regressions']} regression(s)")
+    return "\n".join(lines)
@@ -0,0 +1,257 @@
+import fnmatch
+import hashlib
+import heapq
+import json
+import os
+import re
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Directory (relative to the repo root) holding the agent's on-disk state.
+STATE_DIR = ".chatraj-agent"
+INDEX_VERSION = 2
+IGNORE_FILES = (".gitignore", ".dockerignore")
+ALWAYS_IGNORED = {".git", STATE_DIR}
+
+
+def state_path(repo_root: str, *parts: str) -> str:
+    """Return a path inside the agent state directory, creating it if needed."""
+    base = os.path.join(repo_root, STATE_DIR)
+    os.makedirs(base, exist_ok=True)
+    return os.path.join(base, *parts)
+
+
+def _translate(pattern: str) -> str:
+    """Translate a gitignore glob (without leading '!' or trailing '/') to a regex."""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == n:
+            out.append("/.*")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        elif pattern[i] == "[":
+            j = pattern.find("]", i + 1)
+            if j == -1:
+                out.append(re.escape(pattern[i]))
+                i += 1
+            else:
+                out.append(fnmatch.translate(pattern[i:j + 1])[4:-3])
+                i = j + 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(out)
+
+
+class IgnoreRules:
+    """Gitignore-style patterns read from one ignore file, relative to its directory."""
+
+    def __init__(self, base: str, lines: Sequence[str]):
+        self.base = base
+        # identifies the rule set in the scan index, so editing it invalidates every directory below
+        self.digest = hashlib.sha1("\0".join([base, *lines]).encode("utf-8", "replace")).hexdigest()
+        self.rules: List[Tuple[re.Pattern, bool, bool]] = []
+        for raw in lines:
+            line = raw.rstrip("\n").rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            anchored = "/" in line
+            line = line.lstrip("/")
+            regex = _translate(line)
+            if not anchored:
+                regex = "(?:.*/)?" + regex
+            self.rules.append((re.compile(regex + r"\Z"), negate, dir_only))
+
+    @classmethod
+    def load(cls, base: str, path: str) -> Optional["IgnoreRules"]:
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as fh:
+                rules = cls(base, fh.readlines())
+        except OSError:
+            return None
+        return rules if rules.rules else None
+
+    def match(self, relpath: str, is_dir: bool) -> Optional[bool]:
+        """Return True/False if a rule decides `relpath` (repo-relative), else None."""
+        if self.base:
+            if not relpath.startswith(self.base + "/"):
+                return None
+            relpath = relpath[len(self.base) + 1:]
+        decision = None
+        for regex, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(relpath):
+                decision = not negate
+        return decision
+
+
+def is_ignored(rules: Sequence[IgnoreRules], relpath: str, is_dir: bool) -> bool:
+    ignored = False
+    for r in rules:
+        decision = r.match(relpath, is_dir)
+        if decision is not None:
+            ignored = decision
+    return ignored
+
+
+def _ignore_stamp(path: str, names: Sequence[str]) -> List[int]:
+    stamp = []
+    for name in names:
+        try:
+            st = os.stat(os.path.join(path, name))
+            stamp += [st.st_mtime_ns, st.st_size]
+        except OSError:
+            stamp += [0, 0]
+    return stamp
+
+
+class RepoScanner:
+    """Parallel repository scanner with a persistent per-directory mtime index.
+
+    Each directory is listed with `os.scandir` on a thread pool. The index maps
+    a directory to its mtime, a digest of the ignore rules in effect there (its
+    own and its ancestors') and the files/subdirs found in it; a later run
+    reuses that listing whenever both are unchanged instead of listing the
+    directory and matching ignore rules again. File sizes are still re-read
+    with one `stat` each, since an in-place edit leaves the directory's mtime
+    alone.
+    """
+
+    def __init__(self, repo_root: str, workers: Optional[int] = None, top: int = 10,
+                 use_index: bool = True, ignore_files: Sequence[str] = IGNORE_FILES):
+        self.repo_root = os.path.abspath(repo_root)
+        self.workers = workers or min(32, (os.cpu_count() or 1) * 4)
+        self.top = top
+        self.use_index = use_index
+        self.ignore_files = tuple(ignore_files)
+        self.index_path = os.path.join(self.repo_root, STATE_DIR, "scan-index.json")
+
+    def _load_index(self) -> Dict[str, dict]:
+        if not self.use_index:
+            return {}
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != INDEX_VERSION or data.get("ignore_files") != list(self.ignore_files):
+            return {}
+        return data.get("dirs", {})
+
+    def _save_index(self, dirs: Dict[str, dict]):
+        if not self.use_index:
+            return
+        path = state_path(self.repo_root, "scan-index.json")
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"version": INDEX_VERSION, "ignore_files": list(self.ignore_files),
+                       "dirs": dirs}, fh, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    def _scan_dir(self, rel: str, parent_rules: Tuple[IgnoreRules, ...], cached: Optional[dict]):
+        path = os.path.join(self.repo_root, rel) if rel else self.repo_root
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return rel, None, parent_rules, False
+        stamp = _ignore_stamp(path, self.ignore_files)
+        rules = parent_rules
+        for i, name in enumerate(self.ignore_files):
+            if not stamp[2 * i]:
+                continue
+            loaded = IgnoreRules.load(rel, os.path.join(path, name))
+            if loaded is not None:
+                rules = rules + (loaded,)
+        rules_digest = hashlib.sha1("\0".join(r.digest for r in rules).encode()).hexdigest()
+        if cached and cached.get("mtime") == mtime and cached.get("rules") == rules_digest:
+            files = []
+            for name, _ in cached["files"]:
+                try:
+                    files.append([name, os.stat(os.path.join(path, name), follow_symlinks=False).st_size])
+                except OSError:
+                    continue
+            return rel, {**cached, "files": files}, rules, True
+
+        files: List[list] = []
+        subdirs: List[str] = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if entry.name in ALWAYS_IGNORED:
+                        continue
+                    child = f"{rel}/{entry.name}" if rel else entry.name
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        if is_ignored(rules, child, is_dir):
+                            continue
+                        if is_dir:
+                            subdirs.append(entry.name)
+                        elif entry.is_file(follow_symlinks=False):
+                            files.append([entry.name, entry.stat(follow_symlinks=False).st_size])
+                    except OSError:
+                        continue
+        except OSError:
+            return rel, None, rules, False
+        record = {"mtime": mtime, "rules": rules_digest, "files": files, "dirs": subdirs}
+        return rel, record, rules, False
+
+    def scan(self) -> dict:
+        old_index = self._load_index()
+        if self.use_index:
+            # create the state dir up front so it does not bump the root mtime
+            state_path(self.repo_root)
+        new_index: Dict[str, dict] = {}
+        summary = {"files": 0, "dirs": 0, "bytes": 0, "extensions": {},
+                   "largest": [], "dirs_rescanned": 0, "dirs_cached": 0}
+        largest: List[Tuple[int, str]] = []
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = {pool.submit(self._scan_dir, "", (), old_index.get(""))}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    rel, record, rules, hit = fut.result()
+                    if record is None:
+                        continue
+                    new_index[rel] = record
+                    summary["dirs_cached" if hit else "dirs_rescanned"] += 1
+                    for name, size in record["files"]:
+                        summary["files"] += 1
+                        summary["bytes"] += size
+                        ext = os.path.splitext(name)[1].lower() or "<none>"
+                        summary["extensions"][ext] = summary["extensions"].get(ext, 0) + 1
+                        item = (size, f"{rel}/{name}" if rel else name)
+                        if len(largest) < self.top:
+                            heapq.heappush(largest, item)
+                        elif self.top:
+                            heapq.heappushpop(largest, item)
+                    summary["dirs"] += len(record["dirs"])
+                    for name in record["dirs"]:
+                        child = f"{rel}/{name}" if rel else name
+                        pending.add(pool.submit(self._scan_dir, child, rules, old_index.get(child)))
+
+        summary["largest"] = [{"path": p, "size": s} for s, p in sorted(largest, reverse=True)]
+        summary["extensions"] = dict(sorted(summary["extensions"].items(), key=lambda kv: -kv[1]))
+        self._save_index(new_index)
+        return summary
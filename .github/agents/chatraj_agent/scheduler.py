@@ -0,0 +1,191 @@
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import requests
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+RETRYABLE_ERRORS = (requests.ConnectionError, requests.Timeout)
+MUTATING_METHODS = {"POST", "PATCH", "PUT", "DELETE"}
+
+
+class DeadlineExceeded(RuntimeError):
+    """Raised when a call cannot complete before its deadline."""
+
+
+def failed_before_sending(error: Exception) -> bool:
+    """Whether `error` happened while connecting, so the server cannot have seen the request."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", error.args[0]) if error.args else None
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+
+class TokenBucket:
+    """Thread-safe token bucket; `reserve` returns how long the caller must wait."""
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.clock = clock
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class RequestScheduler:
+    """Schedules GitHub requests around the live rate-limit headers.
+
+    The primary limit is tracked from `X-RateLimit-Remaining`/`X-RateLimit-Reset`:
+    once fewer than `low_water` requests remain, calls are spread evenly until
+    the window resets, and with none left they wait for the reset. Mutating
+    calls additionally draw from a token bucket sized for GitHub's secondary
+    (content creation) limit. Only connection errors and retryable statuses
+    are retried, with full-jitter backoff or the server's `Retry-After`, and
+    never past the per-call deadline.
+    """
+
+    def __init__(self, max_attempts: int = 4, base_delay: float = 0.5, max_delay: float = 30.0,
+                 deadline: float = 120.0, low_water: int = 100,
+                 mutation_rate: float = 80 / 60, mutation_burst: int = 80,
+                 sleep: Callable[[float], None] = time.sleep,
+                 clock: Callable[[], float] = time.monotonic,
+                 wall: Callable[[], float] = time.time):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.low_water = low_water
+        self.sleep = sleep
+        self.clock = clock
+        self.wall = wall
+        self.mutations = TokenBucket(mutation_rate, mutation_burst, clock)
+        self.remaining: Optional[int] = None
+        self.reset_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self.metrics: Dict[str, float] = {"calls": 0, "attempts": 0, "retries": 0, "throttled": 0,
+                                          "wait_seconds": 0.0, "work_seconds": 0.0}
+
+    def _count(self, key: str, value: float = 1):
+        with self._lock:
+            self.metrics[key] += value
+
+    def _throttle_delay(self) -> float:
+        with self._lock:
+            if self.remaining is None or self.reset_at is None:
+                return 0.0
+            until_reset = self.reset_at - self.wall()
+            if until_reset <= 0:
+                self.remaining = None
+                return 0.0
+            if self.remaining <= 0:
+                return until_reset
+            self.remaining -= 1
+            if self.remaining < self.low_water:
+                return until_reset / (self.remaining + 1)
+            return 0.0
+
+    def observe(self, resp) -> None:
+        headers = getattr(resp, "headers", None) or {}
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        if remaining is None or reset is None:
+            return
+        try:
+            with self._lock:
+                self.remaining = int(remaining)
+                self.reset_at = float(reset)
+        except ValueError:
+            pass
+
+    def _retry_delay(self, resp, attempt: int, method: str = "GET") -> Optional[float]:
+        """Return the wait before retrying `resp`, or None if it is not retryable.
+
+        A mutation answered with 500/502/504 may still have been applied, so
+        it is only retried on 429, a rate-limited 403 or a 503 with `Retry-After`.
+        """
+        headers = getattr(resp, "headers", None) or {}
+        retry_after = headers.get("Retry-After")
+        rate_limited = resp.status_code in (403, 429) and (
+            retry_after is not None or headers.get("X-RateLimit-Remaining") == "0")
+        if method in MUTATING_METHODS:
+            if not (rate_limited or resp.status_code == 429 or (resp.status_code == 503 and retry_after is not None)):
+                return None
+        elif resp.status_code not in RETRYABLE_STATUSES and not rate_limited:
+            return None
+        if retry_after is not None:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        if headers.get("X-RateLimit-Remaining") == "0" and headers.get("X-RateLimit-Reset"):
+            try:
+                return max(0.0, float(headers["X-RateLimit-Reset"]) - self.wall())
+            except ValueError:
+                pass
+        return self._backoff(attempt)
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _wait(self, seconds: float, end: float, what: str):
+        if seconds <= 0:
+            return
+        if self.clock() + seconds > end:
+            raise DeadlineExceeded(f"{what} would wait {seconds:.1f}s past the call deadline")
+        self._count("wait_seconds", seconds)
+        self.sleep(seconds)
+
+    def call(self, send: Callable[[Optional[float]], "requests.Response"], method: str = "GET",
+             deadline: Optional[float] = None):
+        """Run `send(timeout)` under the schedule and return the final response.
+
+        Non-retryable responses (e.g. 404, 422) are returned immediately; a
+        retryable one is returned as-is once attempts or time run out.
+        Mutating requests are not idempotent (a timed-out POST may still have
+        created the issue), so after a transport error they are only retried
+        when the connection was never made, and 5xx replies other than a 503
+        with `Retry-After` are returned to the caller.
+        """
+        self._count("calls")
+        end = self.clock() + (deadline if deadline is not None else self.deadline)
+        attempt = 0
+        while True:
+            delay = self._throttle_delay()
+            if method in MUTATING_METHODS:
+                delay = max(delay, self.mutations.reserve())
+            if delay:
+                self._count("throttled")
+            self._wait(delay, end, "rate limit")
+
+            started = self.clock()
+            self._count("attempts")
+            try:
+                resp = send(max(0.1, end - started))
+            except RETRYABLE_ERRORS as e:
+                self._count("work_seconds", self.clock() - started)
+                attempt += 1
+                if attempt >= self.max_attempts or (method in MUTATING_METHODS and not failed_before_sending(e)):
+                    raise
+                self._count("retries")
+                self._wait(self._backoff(attempt - 1), end, "retry")
+                continue
+            self._count("work_seconds", self.clock() - started)
+            self.observe(resp)
+
+            retry_in = self._retry_delay(resp, attempt, method)
+            attempt += 1
+            if retry_in is None or attempt >= self.max_attempts or self.clock() + retry_in > end:
+                return resp
+            self._count("retries")
+            self._wait(retry_in, end, "retry")
@@ -0,0 +1,191 @@
+import gzip
+import hashlib
+import io
+import json
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, Optional
+from xml.sax.saxutils import escape
+
+from .daemon import environ
+from .scanner import state_path
+
+SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+MAX_URLS_PER_SITEMAP = 50000
+DEFAULT_SITE_URL = "https://chatraj.vercel.app"
+# Same pages as frontend/scripts/generate-sitemap.js
+STATIC_PAGES = [
+    {"path": "/", "changefreq": "daily", "priority": "1.0"},
+    {"path": "/categories", "changefreq": "weekly", "priority": "0.8"},
+    {"path": "/register", "changefreq": "monthly", "priority": "0.6"},
+    {"path": "/login", "changefreq": "monthly", "priority": "0.6"},
+    {"path": "/blogs", "changefreq": "weekly", "priority": "0.7"},
+]
+# frontend routes blogs by id (`/blogs/:id` in src/routes); `{slug}` is also available
+BLOG_URL_TEMPLATE = "/blogs/{id}"
+
+
+def _lastmod(value) -> Optional[str]:
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return str(value) if value else None
+
+
+def url_element(loc: str, lastmod: Optional[str] = None, changefreq: Optional[str] = None,
+                priority: Optional[str] = None) -> str:
+    parts = [f"  <url>\n    <loc>{escape(loc)}</loc>\n"]
+    if lastmod:
+        parts.append(f"    <lastmod>{lastmod}</lastmod>\n")
+    if changefreq:
+        parts.append(f"    <changefreq>{changefreq}</changefreq>\n")
+    if priority:
+        parts.append(f"    <priority>{priority}</priority>\n")
+    parts.append("  </url>\n")
+    return "".join(parts)
+
+
+def iter_blog_urls(blogs, site_url: str, template: str = BLOG_URL_TEMPLATE,
+                   batch_size: int = 5000) -> Iterator[dict]:
+    """Stream blog URLs in `_id` order so part boundaries are stable between runs."""
+    cursor = blogs.find({}, {"_id": 1, "slug": 1, "createdAt": 1},
+                        sort=[("_id", 1)], batch_size=batch_size)
+    for doc in cursor:
+        path = template.format(id=doc["_id"], slug=doc.get("slug") or doc["_id"])
+        yield {"loc": site_url + path, "lastmod": _lastmod(doc.get("createdAt")),
+               "changefreq": "weekly", "priority": "0.6"}
+
+
+def iter_static_urls(site_url: str) -> Iterator[dict]:
+    for page in STATIC_PAGES:
+        yield {"loc": site_url + page["path"], "lastmod": None,
+               "changefreq": page["changefreq"], "priority": page["priority"]}
+
+
+class _Part:
+    """One sitemap file being streamed to a temp file while its content is hashed."""
+
+    def __init__(self, directory: str, name: str, compress: bool):
+        self.name = name
+        self.path = os.path.join(directory, name)
+        self.tmp = f"{self.path}.{uuid.uuid4().hex}.tmp"
+        self.raw = open(self.tmp, "wb")
+        # mtime=0 keeps the gzip bytes reproducible for unchanged content
+        self.stream = gzip.GzipFile(fileobj=self.raw, mode="wb", mtime=0) if compress else self.raw
+        self.text = io.TextIOWrapper(self.stream, encoding="utf-8", newline="\n")
+        self.digest = hashlib.sha256()
+        self.urls = 0
+        self.lastmod: Optional[str] = None
+        self.write(f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{SITEMAP_NS}">\n')
+
+    def write(self, chunk: str):
+        self.text.write(chunk)
+        self.digest.update(chunk.encode("utf-8"))
+
+    def add(self, url: dict):
+        self.write(url_element(url["loc"], url.get("lastmod"), url.get("changefreq"), url.get("priority")))
+        self.urls += 1
+        if url.get("lastmod") and (self.lastmod is None or url["lastmod"] > self.lastmod):
+            self.lastmod = url["lastmod"]
+
+    def close(self, previous: Optional[dict]) -> dict:
+        self.write("</urlset>\n")
+        self.text.close()
+        self.raw.close()  # GzipFile leaves a passed-in fileobj open
+        sha = self.digest.hexdigest()
+        if previous and previous.get("sha256") == sha and os.path.exists(self.path):
+            os.remove(self.tmp)
+            written = False
+        else:
+            os.replace(self.tmp, self.path)
+            written = True
+        return {"sha256": sha, "urls": self.urls, "lastmod": self.lastmod, "written": written}
+
+
+def write_sitemaps(urls: Iterable[dict], out_dir: str, site_url: str, manifest_path: str,
+                   max_urls: int = MAX_URLS_PER_SITEMAP, compress: bool = True,
+                   index_name: str = "sitemap-index.xml") -> dict:
+    """Stream `urls` into sitemap parts of at most `max_urls` entries plus a sitemap index.
+
+    Memory use is one URL at a time. Each part's content hash is compared with
+    the manifest from the previous run; unchanged parts are left untouched on
+    disk, and parts no longer needed are removed.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as fh:
+            old = json.load(fh)
+    except (OSError, ValueError):
+        old = {}
+    if old.get("out_dir") != os.path.abspath(out_dir):
+        old = {"parts": {}}
+    ext = ".xml.gz" if compress else ".xml"
+    parts: Dict[str, dict] = {}
+    part: Optional[_Part] = None
+    total = 0
+    for url in urls:
+        if part is None or part.urls >= max_urls:
+            if part is not None:
+                parts[part.name] = part.close(old["parts"].get(part.name))
+            part = _Part(out_dir, f"sitemap-{len(parts) + 1:05d}{ext}", compress)
+        part.add(url)
+        total += 1
+    if part is not None:
+        parts[part.name] = part.close(old["parts"].get(part.name))
+
+    for stale in set(old["parts"]) - set(parts):
+        try:
+            os.remove(os.path.join(out_dir, stale))
+        except OSError:
+            pass
+
+    index_lines = [f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{SITEMAP_NS}">\n']
+    for name, info in parts.items():
+        index_lines.append(f"  <sitemap>\n    <loc>{escape(site_url + '/' + name)}</loc>\n")
+        if info["lastmod"]:
+            index_lines.append(f"    <lastmod>{info['lastmod']}</lastmod>\n")
+        index_lines.append("  </sitemap>\n")
+    index_lines.append("</sitemapindex>\n")
+    index = "".join(index_lines)
+    index_sha = hashlib.sha256(index.encode("utf-8")).hexdigest()
+    index_path = os.path.join(out_dir, index_name)
+    if old.get("index_sha256") != index_sha or not os.path.exists(index_path):
+        tmp = f"{index_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "w", encoding="utf-8", newline="\n") as fh:
+            fh.write(index)
+        os.replace(tmp, index_path)
+
+    manifest = {"index_sha256": index_sha, "site_url": site_url, "out_dir": os.path.abspath(out_dir),
+                "parts": {n: {k: v for k, v in p.items() if k != "written"} for n, p in parts.items()}}
+    tmp = f"{manifest_path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2)
+    os.replace(tmp, manifest_path)
+    return {"urls": total, "parts": len(parts), "index": index_path,
+            "written": sorted(n for n, p in parts.items() if p["written"]),
+            "unchanged": sorted(n for n, p in parts.items() if not p["written"])}
+
+
+def generate_sitemap(repo_root: str, blogs=None, out_dir: Optional[str] = None,
+                     site_url: Optional[str] = None, max_urls: int = MAX_URLS_PER_SITEMAP,
+                     compress: bool = True, template: str = BLOG_URL_TEMPLATE) -> dict:
+    """Write the static pages plus (if `blogs` is given) one URL per blog.
+
+    Output defaults to `.chatraj-agent/sitemap/`: the frontend build still
+    ships `public/sitemap.xml` from `scripts/generate-sitemap.js`, and
+    publishing these files is left to the deployment.
+    """
+    site_url = (site_url or environ().get("VITE_SITE_URL") or environ().get("SITE_URL")
+                or DEFAULT_SITE_URL).rstrip("/")
+    out_dir = out_dir or state_path(repo_root, "sitemap")
+
+    def urls():
+        yield from iter_static_urls(site_url)
+        if blogs is not None:
+            yield from iter_blog_urls(blogs, site_url, template)
+
+    return write_sitemaps(urls(), out_dir, site_url, state_path(repo_root, "sitemap-manifest.json"),
+                          max_urls=max_urls, compress=compress)
+
@@ -0,0 +1,204 @@
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .loadtest import Histogram
+from .slugs import (DEFAULT_APPLY_BATCH, DEFAULT_BATCH_SIZE, MISSING_SLUG_FILTER, SlugRegistry, UpdateOne,
+                    _blog_id, iter_missing_slugs, load_existing_slugs, slugify)
+
+try:
+    from pymongo.errors import OperationFailure
+except Exception:
+    OperationFailure = None
+
+# Inserts, replacements and updates that touch the title or slug. Slug updates
+# are watched so slugs set elsewhere (or by our own writes) join the registry.
+CHANGE_PIPELINE = [
+    {"$match": {"$or": [
+        {"operationType": {"$in": ["insert", "replace"]}},
+        {"operationType": "update", "updateDescription.updatedFields.title": {"$exists": True}},
+        {"operationType": "update", "updateDescription.updatedFields.slug": {"$exists": True}},
+    ]}},
+    {"$project": {"operationType": 1, "documentKey": 1, "clusterTime": 1, "wallTime": 1,
+                  "fullDocument._id": 1, "fullDocument.title": 1, "fullDocument.slug": 1}},
+]
+DEFAULT_FLUSH_INTERVAL = 1.0
+# Idle resume tokens (the stream's post-batch token) are persisted at most this often
+IDLE_SAVE_INTERVAL = 10.0
+# ChangeStreamHistoryLost / ChangeStreamFatalError: the resume point has left the oplog
+HISTORY_LOST = {286, 280}
+# "The $changeStream stage is only supported on replica sets"
+NOT_REPLICA_SET = 40573
+
+
+def load_state(path: Path) -> Optional[dict]:
+    if not path.exists():
+        return None
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except ValueError:
+        return None
+
+
+def save_state(path: Path, token: dict, metrics: dict):
+    tmp = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp.write_text(json.dumps({"resume_token": dict(token),
+                               "saved_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                               "metrics": metrics}), encoding="utf-8")
+    tmp.replace(path)
+
+
+def event_time(change: dict) -> Optional[float]:
+    """When the change happened (epoch seconds): `wallTime` on MongoDB 6.0+, else the cluster time."""
+    wall = change.get("wallTime")
+    if isinstance(wall, datetime):
+        return wall.replace(tzinfo=wall.tzinfo or timezone.utc).timestamp()
+    cluster = change.get("clusterTime")
+    return float(cluster.time) if cluster is not None else None
+
+
+def plan_updates(changes: List[dict], registry: SlugRegistry) -> Dict[str, object]:
+    """Slugs to write for a micro-batch of change events.
+
+    Events are folded per blog (the last one wins). Blogs that already have
+    a slug only add it to `registry`, so a title edit never changes a
+    published URL. Blogs without one claim the slug of their title.
+    """
+    latest = {}
+    for change in changes:
+        latest[change["documentKey"]["_id"]] = change
+    updates, skipped = [], 0
+    for _id, change in latest.items():
+        doc = change.get("fullDocument")
+        if doc is None:  # deleted before the update lookup
+            skipped += 1
+            continue
+        slug = doc.get("slug")
+        if isinstance(slug, str) and slug:
+            registry.add(slug)
+            skipped += 1
+            continue
+        updates.append((_id, registry.claim(slugify(doc.get("title") or "") or str(_id))))
+    return {"updates": updates, "skipped": skipped}
+
+
+class SlugWatcher:
+    """Keep `blogs.slug` filled from a change stream, in micro-batches.
+
+    Each batch is written with one unordered `bulk_write` whose filters
+    only match blogs still lacking a slug, so replaying events after a
+    crash is harmless. The resume token is persisted once a batch is
+    written, and a restart resumes right after the last written event.
+    Without a saved token, the stream is opened first and then the missing
+    slugs already in the collection are filled, so nothing falls in between.
+    """
+
+    def __init__(self, blogs, state_file: Path, batch_size: int = DEFAULT_APPLY_BATCH,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL, scan_batch_size: int = DEFAULT_BATCH_SIZE):
+        if UpdateOne is None:
+            raise RuntimeError("pymongo is required to watch slugs")
+        self.blogs = blogs
+        self.state_file = Path(state_file)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.scan_batch_size = scan_batch_size
+        self.lag = Histogram()
+        self.counts = {"events": 0, "batches": 0, "updated": 0, "skipped": 0, "caught_up": 0}
+        self.started = time.monotonic()
+        self.last_lag_s = None
+        self.registry = None
+
+    def metrics(self) -> dict:
+        seconds = time.monotonic() - self.started
+        return {**self.counts, "seconds": round(seconds, 3),
+                "events_per_s": round(self.counts["events"] / seconds, 2) if seconds else 0.0,
+                "last_lag_s": self.last_lag_s, "lag_ms": self.lag.summary()}
+
+    def _write(self, updates) -> int:
+        if not updates:
+            return 0
+        ops = [UpdateOne({"_id": _id, **MISSING_SLUG_FILTER}, {"$set": {"slug": slug}}) for _id, slug in updates]
+        return self.blogs.bulk_write(ops, ordered=False).modified_count
+
+    def catch_up(self):
+        """Fill the slugs already missing (the one-off full scan, done only without a resume token)."""
+        batch = []
+        for item in iter_missing_slugs(self.blogs, self.registry, self.scan_batch_size):
+            batch.append((_blog_id(item["_id"]), item["slug"]))
+            if len(batch) >= self.batch_size:
+                self.counts["caught_up"] += self._write(batch)
+                batch = []
+        self.counts["caught_up"] += self._write(batch)
+
+    def flush(self, changes: List[dict]):
+        plan = plan_updates(changes, self.registry)
+        self.counts["updated"] += self._write(plan["updates"])
+        self.counts["skipped"] += plan["skipped"]
+        self.counts["batches"] += 1
+        now = time.time()
+        for change in changes:
+            happened = event_time(change)
+            if happened is not None:
+                self.last_lag_s = round(max(0.0, now - happened), 3)
+                self.lag.record(self.last_lag_s * 1e6)
+
+    def run(self, duration: Optional[float] = None, max_events: Optional[int] = None, reset: bool = False,
+            on_metrics: Optional[Callable[[dict], None]] = None, metrics_every: float = 10.0) -> dict:
+        """Watch until `duration` seconds pass, `max_events` are handled or KeyboardInterrupt."""
+        state = None if reset else load_state(self.state_file)
+        token = state and state.get("resume_token")
+        deadline = time.monotonic() + duration if duration else None
+        self.registry = load_existing_slugs(self.blogs, self.scan_batch_size)
+        try:
+            stream = self.blogs.watch(CHANGE_PIPELINE, full_document="updateLookup", resume_after=token,
+                                      max_await_time_ms=int(self.flush_interval * 1000), batch_size=self.batch_size)
+        except OperationFailure as e:
+            if e.code == NOT_REPLICA_SET:
+                raise RuntimeError("Change streams need a replica set; for a local database start "
+                                   "`mongod --replSet rs0` and run `rs.initiate()` once") from e
+            raise self._history_lost(e) if e.code in HISTORY_LOST else e
+        pending: List[dict] = []
+        first_at = saved_at = next_report = time.monotonic()
+        saved_token = token
+        with stream:
+            if token is None:
+                self.catch_up()
+            try:
+                while (deadline is None or time.monotonic() < deadline) and \
+                        (max_events is None or self.counts["events"] < max_events):
+                    try:
+                        change = stream.try_next()
+                    except OperationFailure as e:
+                        raise self._history_lost(e) if e.code in HISTORY_LOST else e
+                    now = time.monotonic()
+                    if change is not None:
+                        if not pending:
+                            first_at = now
+                        pending.append(change)
+                        self.counts["events"] += 1
+                    if pending and (change is None or len(pending) >= self.batch_size
+                                    or now - first_at >= self.flush_interval):
+                        self.flush(pending)
+                        pending = []
+                        saved_token, saved_at = stream.resume_token, now
+                        save_state(self.state_file, saved_token, self.metrics())
+                    elif not pending and stream.resume_token != saved_token and now - saved_at >= IDLE_SAVE_INTERVAL:
+                        saved_token, saved_at = stream.resume_token, now
+                        save_state(self.state_file, saved_token, self.metrics())
+                    if on_metrics is not None and now >= next_report:
+                        on_metrics(self.metrics())
+                        next_report = now + metrics_every
+            except KeyboardInterrupt:
+                pass
+            if pending:
+                self.flush(pending)
+            if stream.resume_token is not None:
+                save_state(self.state_file, stream.resume_token, self.metrics())
+        return self.metrics()
+
+    def _history_lost(self, error) -> RuntimeError:
+        return RuntimeError(f"Cannot resume the blogs change stream ({error}); "
+                            "rerun with --reset to rescan for missing slugs and start a new stream")
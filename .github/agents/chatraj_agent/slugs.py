@@ -0,0 +1,248 @@
+import hashlib
+import json
+import re
+import sys
+import time
+import unicodedata
+import uuid
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+try:
+    from bson import ObjectId
+    from pymongo import UpdateOne
+except Exception:
+    ObjectId = UpdateOne = None
+
+# Matches both a null and a missing `slug` (`{slug: null}` covers both) plus
+# empty strings; each branch is an equality predicate an index on `slug` serves.
+MISSING_SLUG_FILTER = {"$or": [{"slug": None}, {"slug": ""}]}
+EXISTING_SLUG_FILTER = {"slug": {"$type": "string", "$gt": ""}}
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_CHUNK_LINES = 50000
+DEFAULT_APPLY_BATCH = 1000
+MAPPING_DIR = "Backend/scripts/auto_populate_slugs"
+LEGACY_MAPPING_FILE = "Backend/scripts/auto_populate_slugs.json"
+
+
+def slugify(text: str) -> str:
+    """Python port of `slugify` in Backend/scripts/generate-auto-populate-slugs.mjs."""
+    text = unicodedata.normalize("NFKD", str(text).lower())
+    text = re.sub(r"[^a-z0-9\s-]", "", text).strip()
+    text = re.sub(r"\s+", "-", text)
+    return re.sub(r"-+", "-", text)
+
+
+class SlugRegistry:
+    """Compact set of used slugs.
+
+    Stores an 8-byte BLAKE2 digest per slug rather than the string itself. A
+    digest collision can only make a free slug look taken, which costs an
+    extra numeric suffix, never a duplicate.
+    """
+
+    def __init__(self, slugs: Iterable[str] = ()):
+        self._seen = set()
+        for slug in slugs:
+            self.add(slug)
+
+    @staticmethod
+    def _key(slug: str) -> int:
+        return int.from_bytes(hashlib.blake2b(slug.encode("utf-8"), digest_size=8).digest(), "big")
+
+    def __contains__(self, slug: str) -> bool:
+        return self._key(slug) in self._seen
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def add(self, slug: str):
+        self._seen.add(self._key(slug))
+
+    def claim(self, base: str) -> str:
+        """Return `base`, or `base-1`, `base-2`, ... whichever is free, and mark it used."""
+        candidate, suffix = base, 1
+        while candidate in self:
+            candidate = f"{base}-{suffix}"
+            suffix += 1
+        self.add(candidate)
+        return candidate
+
+
+def load_existing_slugs(blogs, batch_size: int = DEFAULT_BATCH_SIZE) -> SlugRegistry:
+    cursor = blogs.find(EXISTING_SLUG_FILTER, {"_id": 0, "slug": 1}, batch_size=batch_size)
+    return SlugRegistry(doc["slug"] for doc in cursor if doc.get("slug"))
+
+
+def iter_missing_slugs(blogs, registry: SlugRegistry, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[dict]:
+    """Yield {_id, title, slug} mappings for blogs without a slug, resolving collisions."""
+    cursor = blogs.find(MISSING_SLUG_FILTER, {"_id": 1, "title": 1}, batch_size=batch_size)
+    for doc in cursor:
+        _id = str(doc.get("_id"))
+        title = doc.get("title") or ""
+        base = slugify(title) or _id
+        yield {"_id": _id, "title": title, "slug": registry.claim(base)}
+
+
+def write_chunks(items: Iterable[dict], out_dir: Path, chunk_lines: int = DEFAULT_CHUNK_LINES) -> List[Path]:
+    """Stream `items` into out_dir/part-NNNNN.ndjson files of at most `chunk_lines` lines."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for old in out_dir.glob("part-*.ndjson"):
+        old.unlink()
+    parts: List[Path] = []
+    fh = None
+    written = 0
+    try:
+        for item in items:
+            if fh is None or written >= chunk_lines:
+                if fh is not None:
+                    fh.close()
+                parts.append(out_dir / f"part-{len(parts):05d}.ndjson")
+                fh = open(parts[-1], "w", encoding="utf-8")
+                written = 0
+            fh.write(json.dumps(item, ensure_ascii=False) + "\n")
+            written += 1
+    finally:
+        if fh is not None:
+            fh.close()
+    return parts
+
+
+def iter_mapping(paths: Iterable[Path]) -> Iterator[dict]:
+    """Stream mappings back from NDJSON chunks (or a legacy JSON array file)."""
+    for path in paths:
+        path = Path(path)
+        if path.suffix == ".json":
+            with open(path, "r", encoding="utf-8") as fh:
+                yield from json.load(fh)
+            continue
+        with open(path, "r", encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return rss / (1024.0 * 1024.0) if sys.platform == "darwin" else rss / 1024.0
+
+
+def detect_missing_slugs(db, out_dir: Path, batch_size: int = DEFAULT_BATCH_SIZE,
+                         chunk_lines: int = DEFAULT_CHUNK_LINES) -> Dict[str, object]:
+    """Scan `db.blogs` for missing slugs and write the mapping as NDJSON chunks.
+
+    Memory stays bounded by the slug registry (8 bytes of digest per existing
+    slug) and one cursor batch, whatever the size of the collection.
+    """
+    started = time.perf_counter()
+    blogs = db.get_collection("blogs")
+    registry = load_existing_slugs(blogs, batch_size)
+    existing = len(registry)
+    counter = {"missing": 0}
+
+    def counted(items):
+        for item in items:
+            counter["missing"] += 1
+            yield item
+
+    parts = write_chunks(counted(iter_missing_slugs(blogs, registry, batch_size)), out_dir, chunk_lines)
+    return {"missing": counter["missing"], "existing_slugs": existing, "parts": parts,
+            "seconds": round(time.perf_counter() - started, 3), "peak_rss_mb": peak_rss_mb()}
+
+
+def resolve_mapping_paths(paths: Iterable[str]) -> List[Path]:
+    """Expand directories to their sorted part-*.ndjson chunks."""
+    resolved: List[Path] = []
+    for p in paths:
+        p = Path(p)
+        if p.is_dir():
+            resolved.extend(sorted(p.glob("part-*.ndjson")))
+        elif p.exists():
+            resolved.append(p)
+        else:
+            raise FileNotFoundError(f"Mapping file not found: {p}")
+    return resolved
+
+
+def _source_fingerprint(paths: List[Path]) -> List[list]:
+    return [[str(p), p.stat().st_size, p.stat().st_mtime_ns] for p in paths]
+
+
+def _load_checkpoint(path: Optional[Path], fingerprint: List[list]) -> int:
+    if path is None or not path.exists():
+        return 0
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except ValueError:
+        return 0
+    return data.get("applied", 0) if data.get("source") == fingerprint else 0
+
+
+def _save_checkpoint(path: Path, fingerprint: List[list], applied: int, batches: int):
+    tmp = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp.write_text(json.dumps({"source": fingerprint, "applied": applied, "batches": batches}),
+                   encoding="utf-8")
+    tmp.replace(path)
+
+
+def _blog_id(value):
+    if ObjectId is not None and isinstance(value, str) and ObjectId.is_valid(value):
+        return ObjectId(value)
+    return value
+
+
+def _batches(items: Iterator[dict], size: int) -> Iterator[List[dict]]:
+    batch: List[dict] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def apply_slugs(blogs, paths: List[Path], batch_size: int = DEFAULT_APPLY_BATCH, dry_run: bool = False,
+                checkpoint: Optional[Path] = None) -> Dict[str, object]:
+    """Apply {_id, slug} mappings with unordered `bulk_write` batches of `batch_size`.
+
+    After each batch the number of applied mappings is written to `checkpoint`
+    together with the size/mtime of the inputs, so a rerun over the same files
+    skips what was already applied instead of starting over.
+    """
+    if UpdateOne is None:
+        raise RuntimeError("pymongo is required to apply slugs")
+    started = time.perf_counter()
+    fingerprint = _source_fingerprint(paths)
+    skip = 0 if dry_run else _load_checkpoint(checkpoint, fingerprint)
+    stats = {"items": 0, "resumed": skip, "batches": 0, "matched": 0, "modified": 0, "dry_run": dry_run}
+
+    items = iter_mapping(paths)
+    for _ in range(skip):
+        next(items, None)
+
+    applied = skip
+    for batch in _batches(items, batch_size):
+        stats["batches"] += 1
+        stats["items"] += len(batch)
+        if dry_run:
+            for it in batch[:3]:
+                print("[dry-run] Would update", it["_id"], "->", it["slug"])
+            continue
+        ops = [UpdateOne({"_id": _blog_id(it["_id"])}, {"$set": {"slug": it["slug"]}}) for it in batch]
+        result = blogs.bulk_write(ops, ordered=False)
+        stats["matched"] += result.matched_count
+        stats["modified"] += result.modified_count
+        applied += len(batch)
+        if checkpoint is not None:
+            _save_checkpoint(checkpoint, fingerprint, applied, stats["batches"])
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    return stats
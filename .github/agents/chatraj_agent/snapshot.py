@@ -0,0 +1,324 @@
+import contextvars
+import gzip
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from . import tracing
+
+try:
+    from bson import json_util
+    from pymongo.errors import BulkWriteError
+except Exception:
+    json_util = BulkWriteError = None
+
+NOT_CONSISTENT = ("Server is a standalone mongod, which has no snapshot reads: each range was read "
+                  "at a different time, so writes made during the export may be partly included")
+
+DEFAULT_COLLECTIONS = ("blogs", "projects", "messages", "users")
+DEFAULT_PARTITIONS = 8
+DEFAULT_WORKERS = 8
+DEFAULT_BATCH_SIZE = 1000
+MANIFEST = "manifest.json"
+MANIFEST_VERSION = 1
+# Ranges smaller than this are not worth a cursor of their own
+MIN_PARTITION_DOCS = 1000
+DUPLICATE_KEY = 11000
+
+
+def _dumps(value) -> str:
+    # Canonical Extended JSON keeps BSON types (ObjectId, dates, Int64, Decimal128, ...) exact
+    return json_util.dumps(value, json_options=json_util.CANONICAL_JSON_OPTIONS)
+
+
+def _loads(text: str):
+    return json_util.loads(text, json_options=json_util.CANONICAL_JSON_OPTIONS)
+
+
+def _require_bson():
+    if json_util is None:
+        raise RuntimeError("pymongo is required for export/import (pip install pymongo)")
+
+
+def split_ranges(collection, partitions: int) -> List[Tuple[object, object]]:
+    """Split `collection` into up to `partitions` half-open `_id` ranges of similar size.
+
+    Boundaries are read from the `_id` index (a covered, sorted skip), the
+    first range is open below and the last open above. Collections whose
+    `_id`s mix BSON types get a single unbounded range, since a range
+    predicate only matches `_id`s of the bound's own type.
+    """
+    total = collection.estimated_document_count()
+    partitions = max(1, min(partitions, total // MIN_PARTITION_DOCS))
+    if partitions == 1:
+        return [(None, None)]
+    first = collection.find_one({}, {"_id": 1}, sort=[("_id", 1)])
+    last = collection.find_one({}, {"_id": 1}, sort=[("_id", -1)])
+    if first is None or last is None or _type_bracket(first["_id"]) != _type_bracket(last["_id"]):
+        return [(None, None)]
+    bounds = []
+    for i in range(1, partitions):
+        doc = next(iter(collection.find({}, {"_id": 1}, sort=[("_id", 1)],
+                                        skip=total * i // partitions, limit=1)), None)
+        if doc is not None and (not bounds or doc["_id"] != bounds[-1]):
+            bounds.append(doc["_id"])
+    edges = [None] + bounds + [None]
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def _type_bracket(value) -> str:
+    return "number" if isinstance(value, (int, float)) and not isinstance(value, bool) else type(value).__name__
+
+
+def range_filter(lo, hi) -> dict:
+    bounds = {}
+    if lo is not None:
+        bounds["$gte"] = lo
+    if hi is not None:
+        bounds["$lt"] = hi
+    return {"_id": bounds} if bounds else {}
+
+
+def _sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def snapshot_time(db, collection: str):
+    """A cluster time every range can be read at, or None when the server has no snapshot reads.
+
+    Replica sets and sharded clusters answer a `readConcern: snapshot` read
+    with the `atClusterTime` it used; a standalone mongod supports neither.
+    """
+    hello = db.client.admin.command("hello")
+    if "setName" not in hello and hello.get("msg") != "isdbgrid":
+        return None
+    reply = db.command({"find": collection, "filter": {}, "projection": {"_id": 1}, "limit": 1,
+                        "readConcern": {"level": "snapshot"}})
+    return reply["cursor"]["atClusterTime"]
+
+
+def export_range(collection, lo, hi, path: str, batch_size: int = DEFAULT_BATCH_SIZE,
+                 compresslevel: int = 6, at_cluster_time=None) -> dict:
+    """Stream one `_id` range into a gzipped NDJSON shard; return its manifest entry.
+
+    With `at_cluster_time`, the range is read with `readConcern: snapshot` at
+    that time, so shards read by different cursors agree with each other.
+    """
+    count = 0
+    if at_cluster_time is None:
+        cursor = collection.find(range_filter(lo, hi), sort=[("_id", 1)], batch_size=batch_size)
+    else:
+        cursor = collection.database.cursor_command({
+            "find": collection.name, "filter": range_filter(lo, hi), "sort": {"_id": 1}, "batchSize": batch_size,
+            "readConcern": {"level": "snapshot", "atClusterTime": at_cluster_time}})
+    with gzip.open(path, "wt", encoding="utf-8", compresslevel=compresslevel) as fh:
+        for doc in cursor:
+            fh.write(_dumps(doc) + "\n")
+            count += 1
+    return {"file": os.path.basename(path), "count": count, "bytes": os.path.getsize(path),
+            "sha256": _sha256(path), "range": [_dumps(lo), _dumps(hi)]}
+
+
+def _finished(func, *args):
+    """Run `func(*args)`, returning its result with the time it finished."""
+    result = func(*args)
+    return result, time.perf_counter()
+
+
+def _rates(count: int, compressed_bytes: int, seconds: float) -> dict:
+    return {"seconds": round(seconds, 3),
+            "docs_per_s": round(count / seconds, 1) if seconds else 0.0,
+            "compressed_mb_per_s": round(compressed_bytes / seconds / 1e6, 2) if seconds else 0.0}
+
+
+def export_snapshot(db, out_dir: str, collections: Iterable[str] = DEFAULT_COLLECTIONS,
+                    partitions: int = DEFAULT_PARTITIONS, workers: int = DEFAULT_WORKERS,
+                    batch_size: int = DEFAULT_BATCH_SIZE, compresslevel: int = 6) -> dict:
+    """Export `collections` of `db` to `out_dir` as range-partitioned shards plus a manifest.
+
+    Every range of every collection is streamed by its own cursor on a shared
+    worker pool. On a replica set or sharded cluster all cursors read at one
+    shared `atClusterTime` with `readConcern: snapshot`, so the snapshot is
+    consistent across ranges and collections (the export must then finish
+    within the server's `minSnapshotHistoryWindowInSeconds`, 300 s by
+    default). A standalone server falls back to plain reads, with a warning
+    in the summary and manifest. The manifest records per-shard document
+    counts and SHA-256 checksums and each collection's indexes, so
+    `import_snapshot` can verify and fully restore it.
+    """
+    _require_bson()
+    collections = list(collections)
+    os.makedirs(out_dir, exist_ok=True)
+    started = time.perf_counter()
+    at = snapshot_time(db, collections[0]) if collections else None
+    manifest = {"version": MANIFEST_VERSION, "database": db.name,
+                "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "at_cluster_time": None if at is None else _dumps(at),
+                "warning": NOT_CONSISTENT if at is None else None, "collections": {}}
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="export") as pool:
+        jobs = {}
+        for name in collections:
+            collection = db[name]
+            os.makedirs(os.path.join(out_dir, name), exist_ok=True)
+            ranges = split_ranges(collection, partitions)
+            jobs[name] = (time.perf_counter(), [
+                pool.submit(contextvars.copy_context().run, _finished, export_range, collection, lo, hi,
+                            os.path.join(out_dir, name, f"part-{i:05d}.ndjson.gz"), batch_size, compresslevel, at)
+                for i, (lo, hi) in enumerate(ranges)])
+            manifest["collections"][name] = {"indexes": _dumps(collection.index_information())}
+        for name, (queued, futures) in jobs.items():
+            done = [f.result() for f in futures]
+            shards = [shard for shard, _ in done]
+            entry = manifest["collections"][name]
+            count = sum(s["count"] for s in shards)
+            size = sum(s["bytes"] for s in shards)
+            entry.update(count=count, bytes=size, shards=shards,
+                         **_rates(count, size, max(end for _, end in done) - queued))
+            tracing.count("export.documents", count)
+    with open(os.path.join(out_dir, MANIFEST), "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2)
+    return _summary(manifest, out_dir, time.perf_counter() - started)
+
+
+def _summary(manifest: dict, path: str, seconds: float) -> dict:
+    keys = ("count", "bytes", "seconds", "docs_per_s", "compressed_mb_per_s")
+    cols = manifest["collections"]
+    summary = {
+        "path": path,
+        "database": manifest["database"],
+        "collections": {name: {**{k: c[k] for k in keys}, "shards": len(c["shards"])}
+                        for name, c in cols.items()},
+        "documents": sum(c["count"] for c in cols.values()),
+        "seconds": round(seconds, 3),
+        "consistent": manifest["at_cluster_time"] is not None,
+    }
+    if manifest["warning"]:
+        summary["warning"] = manifest["warning"]
+    return summary
+
+
+def read_manifest(src: str) -> dict:
+    path = os.path.join(src, MANIFEST)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} not found; is {src} an export directory?")
+    with open(path, "r", encoding="utf-8") as fh:
+        manifest = json.load(fh)
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported snapshot manifest version {manifest.get('version')!r}")
+    return manifest
+
+
+def iter_shard(path: str, shard: dict) -> Iterator[dict]:
+    """Verify a shard against its manifest entry, then yield its documents."""
+    if _sha256(path) != shard["sha256"]:
+        raise ValueError(f"{path}: checksum does not match the manifest")
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                yield _loads(line)
+
+
+def _batches(docs: Iterator[dict], size: int) -> Iterator[List[dict]]:
+    batch = []
+    for doc in docs:
+        batch.append(doc)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _duplicate_id(error: dict) -> bool:
+    """Whether a write error is a duplicate `_id` (the document is there already)."""
+    if error.get("code") != DUPLICATE_KEY:
+        return False
+    if "keyPattern" in error:
+        return dict(error["keyPattern"]) == {"_id": 1}
+    return "index: _id_ " in error.get("errmsg", "")
+
+
+def import_shard(collection, path: str, shard: dict, batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, int]:
+    """Insert one shard with unordered batches; documents whose `_id` exists already are counted, not fatal.
+
+    A clash on any other unique index (e.g. a user's email taken by a
+    different `_id`) would lose the document, so it fails the import.
+    """
+    inserted = duplicates = read = 0
+    for batch in _batches(iter_shard(path, shard), batch_size):
+        read += len(batch)
+        try:
+            inserted += len(collection.insert_many(batch, ordered=False).inserted_ids)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            conflicts = [err for err in errors if not _duplicate_id(err)]
+            if any(err.get("code") != DUPLICATE_KEY for err in conflicts):
+                raise
+            if conflicts:
+                raise ValueError(f"{path}: {len(conflicts)} documents clash with existing ones on a unique "
+                                 f"index other than _id ({conflicts[0].get('errmsg')})") from e
+            inserted += e.details.get("nInserted", 0)
+            duplicates += len(errors)
+    if read != shard["count"]:
+        raise ValueError(f"{path}: read {read} documents, manifest says {shard['count']}")
+    return {"inserted": inserted, "duplicates": duplicates}
+
+
+def _restore_indexes(collection, indexes: Dict[str, dict]) -> List[str]:
+    created = []
+    for name, info in indexes.items():
+        if name == "_id_":
+            continue
+        options = {k: v for k, v in info.items() if k not in ("key", "v", "ns")}
+        keys = [(field, direction) for field, direction in info["key"]]
+        created.append(collection.create_index(keys, name=name, **options))
+    return created
+
+
+def import_snapshot(db, src: str, collections: Optional[Iterable[str]] = None, workers: int = DEFAULT_WORKERS,
+                    batch_size: int = DEFAULT_BATCH_SIZE, drop: bool = False) -> dict:
+    """Restore an `export_snapshot` directory into `db`, shards in parallel, then rebuild indexes.
+
+    Indexes are created after the data, which is cheaper than maintaining
+    them during the inserts. With `drop`, each collection is emptied first.
+    """
+    _require_bson()
+    manifest = read_manifest(src)
+    names = list(collections or manifest["collections"])
+    unknown = set(names) - set(manifest["collections"])
+    if unknown:
+        raise ValueError(f"Not in snapshot: {', '.join(sorted(unknown))}")
+    started = time.perf_counter()
+    report = {"path": src, "database": db.name, "collections": {}}
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="import") as pool:
+        jobs = {}
+        for name in names:
+            collection, entry = db[name], manifest["collections"][name]
+            if drop:
+                collection.drop()
+            jobs[name] = (time.perf_counter(), [
+                pool.submit(contextvars.copy_context().run, _finished, import_shard, collection,
+                            os.path.join(src, name, shard["file"]), shard, batch_size)
+                for shard in entry["shards"]])
+        for name, (queued, futures) in jobs.items():
+            done = [f.result() for f in futures]
+            entry = manifest["collections"][name]
+            inserted = sum(r["inserted"] for r, _ in done)
+            duplicates = sum(r["duplicates"] for r, _ in done)
+            seconds = max((end for _, end in done), default=queued) - queued
+            indexes = _restore_indexes(db[name], _loads(entry["indexes"]))
+            report["collections"][name] = {"count": entry["count"], "inserted": inserted,
+                                           "duplicates": duplicates, "indexes": indexes,
+                                           **_rates(inserted, entry["bytes"], seconds)}
+            tracing.count("import.documents", inserted)
+    report["documents"] = sum(c["inserted"] for c in report["collections"].values())
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    return report
@@ -0,0 +1,138 @@
+import contextvars
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, NamedTuple, Optional, Sequence
+
+from .daemon import environ
+from .scanner import state_path
+
+SUITES = ("backend", "frontend")
+
+
+class Shard(NamedTuple):
+    suite: str
+    index: int
+    total: int
+    cwd: str
+    argv: List[str]
+    report: str
+
+    @property
+    def label(self) -> str:
+        return f"{self.suite} {self.index}/{self.total}"
+
+
+def resolve_executable(argv: Sequence[str]) -> List[str]:
+    """Resolve argv[0] on PATH so `npx`/`npm` also work on Windows (npx.cmd)."""
+    argv = list(argv)
+    argv[0] = shutil.which(argv[0], path=environ().get("PATH")) or argv[0]
+    return argv
+
+
+def shard_argv(suite: str, index: int, total: int, report: str, workers: int) -> List[str]:
+    if suite == "backend":
+        # same runner as Backend's `npm test`, plus sharding and a JSON report
+        return ["npx", "jest", "--config", "jest.config.cjs", f"--shard={index}/{total}",
+                "--json", f"--outputFile={report}", f"--maxWorkers={workers}", "--passWithNoTests"]
+    if suite == "frontend":
+        # same reporter as frontend's `npm run test:ci`
+        return ["npx", "vitest", "run", f"--shard={index}/{total}", "--reporter=json",
+                f"--outputFile={report}", f"--maxWorkers={workers}", "--passWithNoTests"]
+    raise ValueError(f"Unknown test suite: {suite}")
+
+
+def build_shards(repo_root: str, shards: Optional[int] = None,
+                 suites: Sequence[str] = SUITES) -> List[Shard]:
+    """Split each suite into `shards` parts (default: spread the CPU cores across suites)."""
+    cpus = os.cpu_count() or 1
+    per_suite = shards or max(1, cpus // len(suites))
+    workers = max(1, cpus // (per_suite * len(suites)))
+    report_dir = state_path(repo_root, "test-reports")
+    plan = []
+    for suite in suites:
+        cwd = os.path.join(repo_root, "Backend" if suite == "backend" else "frontend")
+        if not os.path.isdir(cwd):
+            raise FileNotFoundError(f"{os.path.basename(cwd)} directory not found")
+        for i in range(1, per_suite + 1):
+            report = os.path.join(report_dir, f"{suite}-{i}-of-{per_suite}.json")
+            plan.append(Shard(suite, i, per_suite, cwd,
+                              shard_argv(suite, i, per_suite, report, workers), report))
+    return plan
+
+
+def _stream(proc: subprocess.Popen, prefix: str, lock: threading.Lock, out=None):
+    out = out or sys.stdout
+    for line in proc.stdout:
+        with lock:
+            out.write(f"[{prefix}] {line.rstrip()}\n")
+            out.flush()
+
+
+def run_shard(shard: Shard, lock: threading.Lock, out=None) -> dict:
+    if os.path.exists(shard.report):
+        os.remove(shard.report)
+    started = time.perf_counter()
+    proc = subprocess.Popen(resolve_executable(shard.argv), cwd=shard.cwd, stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT, text=True, errors="replace", env=environ())
+    _stream(proc, shard.label, lock, out)
+    returncode = proc.wait()
+    result = {"suite": shard.suite, "shard": f"{shard.index}/{shard.total}", "returncode": returncode,
+              "seconds": round(time.perf_counter() - started, 2),
+              "total": 0, "passed": 0, "failed": 0, "skipped": 0, "report": shard.report}
+    try:
+        with open(shard.report, "r", encoding="utf-8") as fh:
+            report = json.load(fh)
+    except (OSError, ValueError):
+        result["error"] = "no JSON report written"
+        return result
+    # Jest's --json and Vitest's json reporter share these counters
+    result["total"] = report.get("numTotalTests", 0)
+    result["passed"] = report.get("numPassedTests", 0)
+    result["failed"] = report.get("numFailedTests", 0)
+    result["skipped"] = report.get("numPendingTests", 0) + report.get("numTodoTests", 0)
+    result["failed_files"] = [os.path.relpath(r.get("name", ""), shard.cwd)
+                              for r in report.get("testResults", []) if r.get("status") == "failed"]
+    return result
+
+
+def merge_results(results: List[dict], wall_seconds: float) -> dict:
+    summary = {"success": True, "wall_seconds": round(wall_seconds, 2), "suites": {}, "shards": results}
+    for r in results:
+        s = summary["suites"].setdefault(r["suite"], {"total": 0, "passed": 0, "failed": 0,
+                                                      "skipped": 0, "shard_seconds": 0.0})
+        for key in ("total", "passed", "failed", "skipped"):
+            s[key] += r[key]
+        s["shard_seconds"] = round(s["shard_seconds"] + r["seconds"], 2)
+        if r["returncode"] != 0 or r["failed"] or r.get("error"):
+            summary["success"] = False
+    return summary
+
+
+def run_shards(plan: List[Shard], out=None) -> dict:
+    """Run all shards at once, streaming prefixed output, and merge their reports."""
+    lock = threading.Lock()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, len(plan))) as pool:
+        # each shard runs in a copy of the caller's context so output routing and tracing follow it
+        futures = [pool.submit(contextvars.copy_context().run, run_shard, s, lock, out) for s in plan]
+        results = [f.result() for f in futures]
+    return merge_results(results, time.perf_counter() - started)
+
+
+def format_summary(summary: dict) -> str:
+    lines = [f"{'shard':<16}{'rc':>4}{'tests':>7}{'pass':>6}{'fail':>6}{'skip':>6}{'secs':>8}"]
+    for r in summary["shards"]:
+        lines.append(f"{r['suite'] + ' ' + r['shard']:<16}{r['returncode']:>4}{r['total']:>7}"
+                     f"{r['passed']:>6}{r['failed']:>6}{r['skipped']:>6}{r['seconds']:>8.2f}"
+                     + (f"  ({r['error']})" if r.get("error") else ""))
+    for name, s in summary["suites"].items():
+        lines.append(f"{name:<16}{'':>4}{s['total']:>7}{s['passed']:>6}{s['failed']:>6}{s['skipped']:>6}"
+                     f"{s['shard_seconds']:>8.2f}")
+    lines.append(f"{'PASS' if summary['success'] else 'FAIL'} in {summary['wall_seconds']:.2f}s wall")
+    return "\n".join(lines)
@@ -0,0 +1,277 @@
+"""A local stand-in for the slice of GitHub's REST and GraphQL APIs the agent uses.
+
+Keeps refs, commits, pull requests and comments in memory for one repo
+(`o/r`) and counts requests per endpoint, so tests and benchmarks can compare
+how many round trips each transport needs. GraphQL documents are not parsed
+in general: the stand-in recognises the agent's own operations by their
+fields and reads every input from `variables`.
+"""
+import base64
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+REPO = "o/r"
+REPO_ID = "R_1"
+LOGIN = "chatraj-bot"
+
+
+def blob_sha(data: bytes) -> str:
+    h = hashlib.sha1(b"blob %d\0" % len(data))
+    h.update(data)
+    return h.hexdigest()
+
+
+class GitHubStandIn(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, base_files=None, latency: float = 0.0, graphql: bool = True):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.latency = latency
+        self.graphql_enabled = graphql
+        self.failing_mutations = set()
+        self.counts = Counter()
+        self.lock = threading.Lock()
+        self.trees = {}
+        self.commits = {}
+        self.refs = {}
+        self.pulls = []
+        self.comments = []
+        base = self.make_commit({p: blob_sha(c.encode()) for p, c in (base_files or {}).items()}, None)
+        self.refs["main"] = base
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    # -- object store -------------------------------------------------------
+
+    def make_tree(self, files: dict) -> str:
+        tree = "tree-" + hashlib.sha1(json.dumps(sorted(files.items())).encode()).hexdigest()
+        self.trees[tree] = dict(files)
+        return tree
+
+    def make_commit(self, files: dict, parent) -> str:
+        tree = self.make_tree(files)
+        oid = hashlib.sha1(f"{tree} {parent} {len(self.commits)}".encode()).hexdigest()
+        self.commits[oid] = {"tree": tree, "parent": parent}
+        return oid
+
+    def files_at(self, rev: str) -> dict:
+        oid = self.refs.get(rev, rev)
+        return self.trees[self.commits[oid]["tree"]] if oid in self.commits else {}
+
+    def pull(self, number: int):
+        return next((p for p in self.pulls if p["number"] == number), None)
+
+    def pull_by_id(self, node_id: str):
+        return next((p for p in self.pulls if p["id"] == node_id), None)
+
+    def create_pull(self, base: str, head: str, title: str, body: str) -> dict:
+        number = len(self.pulls) + 1
+        pr = {"id": f"PR_{number}", "number": number, "url": f"{self.url}/o/r/pull/{number}",
+              "baseRefName": base, "headRefName": head, "title": title, "body": body}
+        self.pulls.append(pr)
+        return pr
+
+    def add_comment(self, pr: dict, body: str, author: str = LOGIN) -> dict:
+        cid = len(self.comments) + 1
+        comment = {"id": cid, "node_id": f"IC_{cid}", "pr": pr["number"], "body": body, "author": author,
+                   "url": f"{pr['url']}#issuecomment-{cid}"}
+        self.comments.append(comment)
+        return comment
+
+    def pr_comments(self, pr: dict) -> list:
+        return [c for c in self.comments if c["pr"] == pr["number"]]
+
+    # -- GraphQL ------------------------------------------------------------
+
+    def graphql_pull(self, pr: dict) -> dict:
+        return {"id": pr["id"], "number": pr["number"], "url": pr["url"], "baseRefName": pr["baseRefName"],
+                "comments": {"nodes": [{"id": c["node_id"], "url": c["url"], "body": c["body"],
+                                        "viewerDidAuthor": c["author"] == LOGIN}
+                                       for c in self.pr_comments(pr)]}}
+
+    def graphql(self, document: str, variables: dict) -> dict:
+        if document.startswith("query"):
+            return {"data": {"repository": self.graphql_query(document, variables)}}
+        data = {}
+        for field, var in re.findall(r"(\w+)\(input: \$(\w+)\)", document):
+            try:
+                if field in self.failing_mutations:
+                    self.graphql_mutation(field, variables[var])
+                    raise ValueError(f"{field} timed out")  # applied, but reported as failed
+                data[field] = self.graphql_mutation(field, variables[var])
+            except ValueError as e:
+                data[field] = None
+                return {"data": data, "errors": [{"message": str(e), "path": [field]}]}
+        return {"data": data}
+
+    def graphql_query(self, document: str, variables: dict) -> dict:
+        if "pullRequest(number:" in document:
+            pr = self.pull(variables["number"])
+            return {"pullRequest": self.graphql_pull(pr) if pr else None}
+        result = {"id": REPO_ID}
+        for alias, var in (("base", "base"), ("head", "head")):
+            name = variables[var][len("refs/heads/"):]
+            if name not in self.refs:
+                result[alias] = None
+                continue
+            result[alias] = {"target": {"oid": self.refs[name]}}
+            if alias == "head":
+                result[alias]["associatedPullRequests"] = {"nodes": [
+                    self.graphql_pull(p) for p in self.pulls if p["headRefName"] == name]}
+        for alias, var in re.findall(r"(\w+): object\(expression: \$(\w+)\)", document):
+            rev, _, path = variables[var].partition(":")
+            oid = self.files_at(rev).get(path) if rev in self.refs else None
+            result[alias] = {"oid": oid} if oid else None
+        return result
+
+    def graphql_mutation(self, field: str, data: dict) -> dict:
+        if field == "createRef":
+            name = data["name"][len("refs/heads/"):]
+            if name in self.refs:
+                raise ValueError(f"A ref named {name} already exists")
+            self.refs[name] = data["oid"]
+            return {"ref": {"name": name}}
+        if field == "createCommitOnBranch":
+            name = data["branch"]["branchName"]
+            if self.refs.get(name) != data["expectedHeadOid"]:
+                raise ValueError("Expected branch to point to a different commit")
+            files = dict(self.files_at(name))
+            for addition in data["fileChanges"].get("additions", []):
+                files[addition["path"]] = blob_sha(base64.b64decode(addition["contents"]))
+            self.refs[name] = self.make_commit(files, self.refs[name])
+            return {"commit": {"oid": self.refs[name], "url": f"{self.url}/o/r/commit/{self.refs[name]}"}}
+        if field == "createPullRequest":
+            return {"pullRequest": self.graphql_pull(self.create_pull(
+                data["baseRefName"], data["headRefName"], data["title"], data.get("body", "")))}
+        if field == "updatePullRequest":
+            pr = self.pull_by_id(data["pullRequestId"])
+            pr.update(title=data["title"], body=data["body"])
+            return {"pullRequest": self.graphql_pull(pr)}
+        if field == "addComment":
+            comment = self.add_comment(self.pull_by_id(data["subjectId"]), data["body"])
+            return {"commentEdge": {"node": {"id": comment["node_id"], "url": comment["url"]}}}
+        if field == "updateIssueComment":
+            comment = next(c for c in self.comments if c["node_id"] == data["id"])
+            comment["body"] = data["body"]
+            return {"issueComment": {"id": comment["node_id"], "url": comment["url"]}}
+        raise ValueError(f"Unsupported mutation {field}")
+
+    # -- REST ---------------------------------------------------------------
+
+    def rest(self, method: str, path: str, payload: dict, query: dict):
+        if method == "GET" and path == "/user":
+            return 200, {"login": LOGIN}
+        path = path.split("/repos/" + REPO, 1)[-1]
+        if method == "GET" and path.startswith("/git/ref/heads/"):
+            name = path[len("/git/ref/heads/"):]
+            return (200, {"object": {"sha": self.refs[name]}}) if name in self.refs else (404, {})
+        if method == "GET" and path.startswith("/git/commits/"):
+            commit = self.commits.get(path.rsplit("/", 1)[1])
+            return (200, {"tree": {"sha": commit["tree"]}}) if commit else (404, {})
+        if method == "GET" and path.startswith("/git/trees/"):
+            files = self.trees.get(path.rsplit("/", 1)[1], {})
+            return 200, {"tree": [{"path": p, "type": "blob", "sha": s} for p, s in files.items()]}
+        if method == "POST" and path == "/git/blobs":
+            return 201, {"sha": blob_sha(payload["content"].encode())}
+        if method == "POST" and path == "/git/trees":
+            files = dict(self.files_at(payload.get("base_tree", "")))
+            for entry in payload["tree"]:
+                files[entry["path"]] = entry.get("sha") or blob_sha(entry["content"].encode())
+            return 201, {"sha": self.make_tree(files)}
+        if method == "POST" and path == "/git/commits":
+            parent = payload["parents"][0]
+            oid = hashlib.sha1(f"{payload['tree']} {parent} {len(self.commits)}".encode()).hexdigest()
+            self.commits[oid] = {"tree": payload["tree"], "parent": parent}
+            return 201, {"sha": oid}
+        if method == "POST" and path == "/git/refs":
+            name = payload["ref"][len("refs/heads/"):]
+            if name in self.refs:
+                return 422, {"message": "Reference already exists"}
+            self.refs[name] = payload["sha"]
+            return 201, {"ref": payload["ref"]}
+        if method == "POST" and path == "/pulls":
+            pr = self.create_pull(payload["base"], payload["head"], payload["title"], payload.get("body", ""))
+            return 201, {"number": pr["number"], "html_url": pr["url"], "node_id": pr["id"]}
+        match = re.fullmatch(r"/issues/(\d+)/comments", path)
+        if match and method == "GET":
+            comments = [{"id": c["id"], "body": c["body"], "html_url": c["url"],
+                         "user": {"login": c["author"], "type": "Bot" if c["author"] == LOGIN else "User"}}
+                        for c in self.pr_comments(self.pull(int(match.group(1))))]
+            return self.page(f"/repos/{REPO}{path}", comments, query)
+        if match and method == "POST":
+            comment = self.add_comment(self.pull(int(match.group(1))), payload["body"])
+            return 201, {"id": comment["id"], "html_url": comment["url"]}
+        match = re.fullmatch(r"/issues/comments/(\d+)", path)
+        if match and method == "PATCH":
+            comment = next(c for c in self.comments if c["id"] == int(match.group(1)))
+            comment["body"] = payload["body"]
+            return 200, {"id": comment["id"], "html_url": comment["url"]}
+        return 404, {"message": "Not Found"}
+
+    def page(self, path: str, items: list, query: dict):
+        """One page of `items` with GitHub's Link header (first/prev/next/last)."""
+        per_page = int(query.get("per_page", ["30"])[0])
+        page = int(query.get("page", ["1"])[0])
+        last = max(1, -(-len(items) // per_page))
+        links = {"first": 1, "prev": page - 1} if page > 1 else {}
+        if page < last:
+            links.update(next=page + 1, last=last)
+        header = ", ".join(f'<{self.url}{path}?per_page={per_page}&page={n}>; rel="{rel}"' for rel, n in links.items())
+        return 200, items[(page - 1) * per_page:page * per_page], {"Link": header} if header else {}
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _serve(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        url = urlparse(self.path)
+        path = url.path
+        server = self.server
+        headers = {}
+        with server.lock:
+            if path == "/graphql":
+                kind = "graphql " + payload["query"].split("(", 1)[0]
+                server.counts[kind] += 1
+                if server.graphql_enabled:
+                    status, reply = 200, server.graphql(payload["query"], payload.get("variables") or {})
+                else:
+                    status, reply = 404, {"message": "Not Found"}
+            else:
+                server.counts[f"{self.command} {re.sub(r'/[0-9a-f]{40}$|/tree-[0-9a-f]+$', '/*', path)}"] += 1
+                status, reply, *extra = server.rest(self.command, path, payload, parse_qs(url.query))
+                headers = extra[0] if extra else {}
+        time.sleep(server.latency)
+        body = json.dumps(reply).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PATCH = _serve
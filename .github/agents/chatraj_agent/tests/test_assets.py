@@ -0,0 +1,47 @@
+from chatraj_agent.assets import AssetIndex, analyze_assets
+
+
+def write_script(path, lines, extra=()):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("\n".join([f"const step{i} = run({i});" for i in range(lines)] + list(extra)) + "\n")
+
+
+def test_duplicates_near_duplicates_and_largest(tmp_path):
+    write_script(tmp_path / "Backend" / "scripts" / "a.js", 40)
+    write_script(tmp_path / "Backend" / "archived-scripts" / "a.js", 40)
+    write_script(tmp_path / "Backend" / "scripts" / "b.js", 40, ["console.log('done');"])
+    write_script(tmp_path / "Backend" / "scripts" / "other.js", 3)
+    (tmp_path / "frontend").mkdir()
+    (tmp_path / "frontend" / "shot.png").write_bytes(b"\x89PNG\0" + bytes(range(256)) * 64)
+    (tmp_path / "empty.txt").write_text("")
+
+    summary = analyze_assets(str(tmp_path), workers=1, top=2)
+    assert summary["files"] == 6 and summary["hashed"] == 6
+    assert [g["paths"] for g in summary["duplicates"]] == [
+        ["Backend/archived-scripts/a.js", "Backend/scripts/a.js"]]
+    near = {tuple(p["paths"]) for p in summary["near_duplicates"]}
+    assert ("Backend/archived-scripts/a.js", "Backend/scripts/b.js") in near
+    assert ("Backend/archived-scripts/a.js", "Backend/scripts/a.js") not in near
+    assert not any("other.js" in p for pair in near for p in pair)
+    assert summary["largest"][0]["path"] == "frontend/shot.png"
+
+
+def test_hash_cache_keyed_by_inode_size_mtime(tmp_path):
+    write_script(tmp_path / "a.js", 10)
+    write_script(tmp_path / "b.js", 10)
+    AssetIndex(str(tmp_path), workers=1).build()
+    (tmp_path / "b.js").write_text("changed\n")
+    index = AssetIndex(str(tmp_path), workers=1).build()
+    assert index.stats["cached"] == 1 and index.stats["hashed"] == 1
+    assert index.duplicates() == []
+
+
+def test_process_pool_matches_inline_hashing(tmp_path, monkeypatch):
+    from chatraj_agent import assets
+
+    for i in range(6):
+        write_script(tmp_path / f"f{i}.js", 8 + i)
+    inline = AssetIndex(str(tmp_path), workers=1, use_cache=False).build().entries
+    monkeypatch.setattr(assets, "POOL_THRESHOLD", 0)
+    pooled = AssetIndex(str(tmp_path), workers=2, use_cache=False).build().entries
+    assert pooled == inline
@@ -11,9 +11,11 @@ class DummyCollection:
     def __init__(self, docs):
         self._docs = docs
 
-    def find(self, *args, **kwargs):
+    def find(self, filter=None, projection=None, **kwargs):
+        wants_existing = "$or" not in (filter or {})
         for d in self._docs:
-            yield d
+            if bool(d.get("slug")) == wants_existing:
+                yield d
 
 
 class DummyDB:
@@ -41,21 +43,72 @@ def test_auto_pr_skips_without_mongo_env(monkeypatch, capsys):
 
 
 def test_auto_pr_detects_missing_slugs(monkeypatch, tmp_path):
-    docs = [{"_id": 1, "title": "Hello World"}, {"_id": 2, "title": "No Slug"}]
+    docs = [{"_id": 1, "title": "Hello World"}, {"_id": 2, "title": "No Slug"},
+            {"_id": 3, "title": "Hello, World!"}, {"_id": 4, "title": "x", "slug": "no-slug"}]
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("AUTO_PR_ENABLE", "true")
+    monkeypatch.setenv("GITHUB_TOKEN", "ghp_testtoken")
     monkeypatch.setenv("MONGODB_URI", "mongodb://fake")
     monkeypatch.setattr(auto_pr, "MongoClient", lambda uri,
                         serverSelectionTimeoutMS=5000: DummyClient(docs))
     # prevent actual GitHub calls by mocking ChatrajAgent methods
 
-    class DummyAgent:
-        def create_branch_with_changes(self, branch, files, commit_message=None):
-            assert "/auto_populate_slugs.json" in files
-            return {"ref": f"refs/heads/{branch}"}
+    captured = {}
 
-        def create_pull_request(self, title, head, base, body=None):
-            return {"html_url": "https://example.com/pr/1"}
+    class DummyAgent:
+        def publish_pull_request(self, branch, files, commit_message, title, body="", base="main"):
+            captured.update(files)
+            return {"ref": f"refs/heads/{branch}", "transport": "graphql", "requests": 2,
+                    "pull_request": {"html_url": "https://example.com/pr/1", "created": True}}
 
     monkeypatch.setattr(auto_pr, "ChatrajAgent", lambda: DummyAgent())
 
     res = auto_pr.main()
     assert res == 0
+    chunk = captured["Backend/scripts/auto_populate_slugs/part-00000.ndjson"]
+    rows = [json.loads(line) for line in chunk.read_text().splitlines()]
+    assert [r["slug"] for r in rows] == ["hello-world", "no-slug-1", "hello-world-1"]
+
+
+def test_slug_registry_resolves_collisions():
+    from chatraj_agent.slugs import SlugRegistry, slugify
+
+    assert slugify("  Café au Lait -- Recipes ") == "cafe-au-lait-recipes"
+    reg = SlugRegistry(["intro", "intro-1"])
+    assert reg.claim("intro") == "intro-2"
+    assert reg.claim("intro") == "intro-3"
+    assert reg.claim("other") == "other"
+
+
+def test_apply_slugs_batches_and_resumes_from_checkpoint(tmp_path):
+    from chatraj_agent.slugs import apply_slugs, write_chunks
+
+    items = [{"_id": f"id{i}", "title": "t", "slug": f"s{i}"} for i in range(5)]
+    parts = write_chunks(iter(items), tmp_path / "chunks", chunk_lines=3)
+    checkpoint = tmp_path / "ckpt.json"
+
+    class Collection:
+        def __init__(self, fail_on=None):
+            self.calls = []
+            self.fail_on = fail_on
+
+        def bulk_write(self, ops, ordered=True):
+            assert ordered is False
+            if len(self.calls) == self.fail_on:
+                raise RuntimeError("connection lost")
+            self.calls.append([op._doc["$set"]["slug"] for op in ops])
+            return SimpleNamespace(matched_count=len(ops), modified_count=len(ops))
+
+    dry = Collection()
+    stats = apply_slugs(dry, parts, batch_size=2, dry_run=True, checkpoint=checkpoint)
+    assert stats["items"] == 5 and dry.calls == [] and not checkpoint.exists()
+
+    crashing = Collection(fail_on=1)
+    with pytest.raises(RuntimeError):
+        apply_slugs(crashing, parts, batch_size=2, checkpoint=checkpoint)
+    assert crashing.calls == [["s0", "s1"]]
+
+    resumed = Collection()
+    stats = apply_slugs(resumed, parts, batch_size=2, checkpoint=checkpoint)
+    assert resumed.calls == [["s2", "s3"], ["s4"]]
+    assert stats["resumed"] == 2 and stats["modified"] == 3
@@ -0,0 +1,88 @@
+import json
+
+from chatraj_agent.agent import ChatrajAgent
+from chatraj_agent.bundle_report import check_budgets, diff, format_comment, package_of, summarize
+
+
+def _stats(chakra=40000):
+    def mod(id, raw):
+        return {"id": id, "raw": raw, "gzip": raw // 4, "brotli": raw // 5}
+
+    return {
+        "root": "/repo/frontend",
+        "chunks": [
+            {"file": "assets/index-Ab12Cd34.js", "name": "index", "isEntry": True, "facade": "index.html",
+             "imports": ["assets/vendor-Zz99Yy88.js"], "dynamicImports": ["assets/Blog-Qq11Ww22.js"],
+             "css": ["assets/index-Ee55Rr66.css"], "raw": 20000, "gzip": 6000, "brotli": 5000,
+             "modules": [mod("src/main.jsx", 8000), mod("src/App.jsx", 12000)]},
+            {"file": "assets/vendor-Zz99Yy88.js", "name": "vendor", "isEntry": False, "facade": None,
+             "imports": [], "dynamicImports": [], "css": [], "raw": 50000 + chakra,
+             "gzip": (50000 + chakra) // 4, "brotli": (50000 + chakra) // 5,
+             "modules": [mod("node_modules/react/index.js", 50000),
+                         mod("node_modules/@chakra-ui/react/dist/esm/index.js", chakra)]},
+            {"file": "assets/Blog-Qq11Ww22.js", "name": "Blog", "isEntry": False, "isDynamicEntry": True,
+             "facade": "src/screens/Blog.jsx", "imports": ["assets/vendor-Zz99Yy88.js"], "dynamicImports": [],
+             "css": [], "raw": 4000, "gzip": 1000, "brotli": 800, "modules": [mod("src/screens/Blog.jsx", 4000)]},
+        ],
+        "assets": [{"file": "assets/index-Ee55Rr66.css", "name": "index.css", "raw": 8000, "gzip": 2000,
+                    "brotli": 1600},
+                   {"file": "assets/logo-Tt77Uu88.png", "name": None, "raw": 3000, "gzip": 2900, "brotli": 2900}],
+    }
+
+
+def test_summarize_entries_packages_and_hash_free_keys():
+    summary = summarize(_stats(), build_seconds=12.345)
+    assert set(summary["chunks"]) == {"index.html", "vendor.js", "src/screens/Blog.jsx"}
+    assert set(summary["assets"]) == {"index.css", "logo.png"}
+    # first load: entry chunk, its static import and its CSS, not the lazy Blog chunk
+    assert summary["entries"]["index.html"] == {"raw": 20000 + 90000 + 8000, "gzip": 6000 + 22500 + 2000,
+                                                "brotli": 5000 + 18000 + 1600, "files": 3}
+    assert summary["totals"]["css"]["raw"] == 8000 and summary["totals"]["all"]["raw"] == 114000 + 8000
+    assert list(summary["packages"])[:2] == ["react", "@chakra-ui/react"]
+    assert summary["build_seconds"] == 12.35
+    assert package_of("node_modules/a/node_modules/@b/c/x.js") == "@b/c"
+    assert package_of("\0vite/preload-helper") == "(other)"
+
+
+def test_budgets_diff_and_comment():
+    before, after = summarize(_stats(), 10.0), summarize(_stats(chakra=120000), 14.0)
+    over = check_budgets(after, {"build_seconds": 12, "packages": {"@chakra-ui/react": {"gzip_kb": 20}},
+                                 "entries": {"index.html": {"raw_kb": 500}}})
+    assert [(o["what"], o["metric"]) for o in over] == [("build time", "seconds"),
+                                                        ("package @chakra-ui/react", "gzip")]
+
+    changes = diff(before, after, threshold=1024)
+    assert [r["name"] for r in changes["packages"]] == ["@chakra-ui/react"]
+    assert [r["name"] for r in changes["chunks"]] == ["vendor.js"]
+    assert "assets" not in changes  # unchanged rows are left out
+    text = format_comment(after, changes, over, {"commit": "abcdef123", "summary": before})
+    assert "Build time 14.0s (+4.0s vs `abcdef1`)" in text
+    assert "| `@chakra-ui/react` | 117.2 kB (+78.1 kB, +200.0%) |" in text
+    assert "`react`" not in text and "Over budget" in text
+
+    assert "No gzip size change" in format_comment(after, {}, [], {"commit": "abcdef123", "summary": after})
+    assert "No earlier build recorded" in format_comment(after, None, [])
+
+
+def test_agent_bundle_report_compares_with_last_build(tmp_path, monkeypatch):
+    monkeypatch.setenv("GITHUB_SHA", "1111111")
+    (tmp_path / "a.json").write_text(json.dumps(_stats()))
+    (tmp_path / "b.json").write_text(json.dumps(_stats(chakra=90000)))
+    (tmp_path / "budgets.json").write_text(json.dumps({"chunk": {"gzip_kb": 30}}))
+    agent = ChatrajAgent(repo_root=str(tmp_path))
+
+    first = agent.bundle_report(stats="a.json", budgets="budgets.json")
+    assert first["baseline"] is None and first["over_budget"] == []
+    monkeypatch.setenv("GITHUB_SHA", "2222222")
+    second = agent.bundle_report(stats="b.json", budgets="budgets.json", comment_out="comment.md")
+    assert second["baseline"] == "1111111"
+    assert [o["what"] for o in second["over_budget"]] == ["chunk vendor.js"]
+    comment = (tmp_path / "comment.md").read_text()
+    assert "vs `1111111`" in comment and "`vendor.js`" in comment and "`index.css`" not in comment
+    history = json.loads((tmp_path / ".chatraj-agent" / "bundle-history.json").read_text())
+    assert [h["commit"] for h in history] == ["1111111", "2222222"]
+
+    monkeypatch.setenv("GITHUB_SHA", "3333333")
+    pr = agent.bundle_report(stats="b.json", budgets="budgets.json", base="1111111", record=False)
+    assert pr["baseline"] == "1111111" and pr["changes"]
+    assert agent.bundle_report(stats="b.json", base="9999999", record=False)["baseline"] == "2222222"
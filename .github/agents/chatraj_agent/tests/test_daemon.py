@@ -0,0 +1,114 @@
+import io
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+from chatraj_agent import daemon
+
+pytestmark = pytest.mark.skipif(not hasattr(daemon.socket, "AF_UNIX"), reason="needs Unix sockets")
+
+
+def route_output(monkeypatch):
+    # done inside the test: pytest re-installs its own capture streams between setup and call
+    monkeypatch.setattr(sys, "stdout", daemon.OutputRouter(sys.stdout, "out"))
+    monkeypatch.setattr(sys, "stderr", daemon.OutputRouter(sys.stderr, "err"))
+
+
+@pytest.fixture
+def running_daemon(tmp_path):
+    (tmp_path / "a.txt").write_text("hello")
+    server = daemon.AgentDaemon(str(tmp_path), workers=2)
+    server.bind()
+    thread = threading.Thread(target=server.serve_forever, kwargs={"route_output": False}, daemon=True)
+    thread.start()
+    yield server
+    server.stop()
+    thread.join(timeout=5)
+
+
+def test_commands_stream_through_warm_daemon(running_daemon, tmp_path, monkeypatch):
+    route_output(monkeypatch)
+    assert daemon.ping(running_daemon.path)["repo_root"] == str(tmp_path)
+    outputs = [io.StringIO() for _ in range(8)]
+    codes = [None] * 8
+
+    def call(i):
+        codes[i] = daemon.request(str(tmp_path), ["scan"], out=outputs[i])
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=10)
+    assert codes == [0] * 8
+    for out in outputs:
+        assert out.getvalue().count('"files"') == 1  # each client only sees its own output
+
+    err = io.StringIO()
+    assert daemon.request(str(tmp_path), ["scan", "--bogus"], out=io.StringIO(), err=err) == 2
+    assert "unrecognized arguments" in err.getvalue()
+
+
+def test_commands_run_with_the_clients_environment(running_daemon, tmp_path, monkeypatch):
+    route_output(monkeypatch)
+    monkeypatch.delenv("AUTO_PR_ENABLE", raising=False)
+    env = {k: v for k, v in os.environ.items() if k != "GITHUB_TOKEN"}
+    sock, reader = daemon._exchange(running_daemon.path, {"op": "run", "argv": ["auto-pr"], "cwd": str(tmp_path),
+                                                          "env": {**env, "AUTO_PR_ENABLE": "true"}})
+    with sock, reader:
+        messages = [json.loads(line) for line in reader]
+    assert "GITHUB_TOKEN not set" in "".join(m.get("out", "") for m in messages)
+    assert "AUTO_PR_ENABLE" not in os.environ
+
+    probe = tmp_path / "probe.txt"
+    with daemon.request_environ({**env, "CHATRAJ_PROBE": "1"}):
+        assert daemon.environ()["CHATRAJ_PROBE"] == "1"
+        assert "CHATRAJ_PROBE" not in os.environ
+        running_daemon.agent.run_command(
+            [sys.executable, "-c", f"import os; open({str(probe)!r}, 'w').write(os.environ['CHATRAJ_PROBE'])"])
+    assert probe.read_text() == "1"
+    assert daemon.environ() is os.environ
+
+
+def test_mismatched_environment_falls_back(running_daemon, tmp_path, monkeypatch):
+    monkeypatch.setenv("GITHUB_API_URL", "https://github.example.com/api/v3")
+    assert daemon.request(str(tmp_path), ["scan"], out=io.StringIO()) is None
+    monkeypatch.chdir(tmp_path)
+    assert daemon.request(str(tmp_path / "sub"), ["scan"]) is None  # no daemon for that directory
+
+
+def test_stop_removes_socket(running_daemon, tmp_path):
+    assert daemon.stop(str(tmp_path))
+    running_daemon.stop()
+    for _ in range(50):
+        if not os.path.exists(running_daemon.path):
+            break
+        threading.Event().wait(0.1)
+    assert not os.path.exists(running_daemon.path)
+    assert daemon.request(str(tmp_path), ["scan"]) is None
+
+
+def test_client_refuses_sockets_other_users_could_reach(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path / "run"))
+    repo = tmp_path / ("r" * 100)  # too long for .chatraj-agent/agent.sock
+    repo.mkdir()
+    path = daemon.socket_path(str(repo))
+    assert os.path.dirname(path) == daemon.private_dir()
+    server = daemon.AgentDaemon(str(repo), workers=1)
+    server.bind()
+    try:
+        assert os.stat(daemon.private_dir()).st_mode & 0o777 == 0o700
+        daemon.check_socket(path)
+        os.chmod(daemon.private_dir(), 0o755)
+        with pytest.raises(PermissionError):
+            daemon.check_socket(path)
+        assert daemon.request(str(repo), ["scan"]) is None
+        os.chmod(daemon.private_dir(), 0o700)
+        os.chmod(path, 0o666)
+        with pytest.raises(PermissionError):
+            daemon.check_socket(path)
+    finally:
+        server._server.close()
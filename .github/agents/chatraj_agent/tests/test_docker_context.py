@@ -0,0 +1,68 @@
+from chatraj_agent.docker_context import (DockerIgnore, analyze_context, parse_dockerfile,
+                                         predict_rebuilds, source_matches)
+
+DOCKERFILE = """FROM node:lts-alpine AS build
+WORKDIR /app
+# install dependencies first
+COPY package*.json ./
+RUN npm ci \\
+    --silent
+COPY . .
+RUN chown -R node /app
+
+FROM node:lts-alpine
+COPY --from=build /app/dist ./dist
+"""
+
+
+def test_dockerignore_semantics_differ_from_gitignore():
+    ig = DockerIgnore(["# comment", "node_modules", "**/*.log", "/docs/", "tests", "!tests/keep.js",
+                       "*.md", "!README.md"])
+    assert ig.matches("node_modules/pkg/index.js")
+    assert not ig.matches("src/node_modules/x.js")  # anchored at the root, unlike .gitignore
+    assert ig.matches("a/b/error.log") and ig.matches("error.log")
+    assert ig.matches("docs/guide.txt")
+    assert ig.matches("tests/unit.test.js") and not ig.matches("tests/keep.js")
+    assert ig.matches("CHANGELOG.md") and not ig.matches("README.md")
+    assert not ig.matches("sub/CHANGELOG.md")
+
+
+def test_parse_and_predict_rebuilds():
+    stages = parse_dockerfile(DOCKERFILE)
+    assert [(s.name, len(s.instructions)) for s in stages] == [("build", 5), (None, 1)]
+    run = stages[0].instructions[2]
+    assert run.line == 5 and "--silent" in run.args
+    assert stages[0].instructions[1].sources == ["package*.json"]
+    assert source_matches("package*.json", "package-lock.json")
+    assert not source_matches("package*.json", "sub/package.json")
+
+    src_only = predict_rebuilds(stages, {"src/app.js"})
+    assert src_only[0]["first_invalidated_line"] == 7
+    assert src_only[0]["cached_lines"] == [2, 4, 5]
+    assert src_only[1]["rebuilt_lines"] == [11]
+    lock = predict_rebuilds(stages, {"package-lock.json"})
+    assert lock[0]["first_invalidated_line"] == 4
+    assert predict_rebuilds(stages, set())[1]["first_invalidated_line"] is None
+
+
+def test_analyze_context_reports_size_and_suggestions(tmp_path):
+    ctx = tmp_path / "Backend"
+    (ctx / "tests").mkdir(parents=True)
+    (ctx / "node_modules" / "x").mkdir(parents=True)
+    (ctx / "Dockerfile").write_text("FROM node\nCOPY . .\nRUN npm install\nRUN chown -R node .\n")
+    (ctx / ".dockerignore").write_text("**/node_modules\n**/Dockerfile*\n")
+    (ctx / "package.json").write_text("{}")
+    (ctx / "server.js").write_text("x" * 100)
+    (ctx / "tests" / "a.test.js").write_text("t" * 50)
+    (ctx / "node_modules" / "x" / "i.js").write_text("n" * 1000)
+
+    report = analyze_context(str(tmp_path), "Backend", changed=["Backend/tests/a.test.js",
+                                                                "Backend/node_modules/x/i.js"], history=0)
+    assert report["files"] == 4  # .dockerignore, package.json, server.js, tests/a.test.js
+    assert report["ignored_files"] == 2 and "Dockerfile" in report["always_sent"]
+    assert report["rebuild"]["changed_in_context"] == 1
+    assert report["rebuild"]["changed_but_ignored"] == ["node_modules/x/i.js"]
+    kinds = {(s["kind"], s.get("entry")) for s in report["suggestions"]}
+    assert ("dockerignore", "**/tests") in kinds
+    assert ("reorder", None) in kinds and ("chown", None) in kinds
+    assert ("dockerignore", "**/*.test.*") not in kinds  # same files as **/tests
@@ -0,0 +1,70 @@
+import json
+import threading
+import time
+
+import pytest
+
+from chatraj_agent import fanout
+from chatraj_agent.fanout import RepoSpec, read_repos, run_fanout
+
+
+def test_read_repos(tmp_path):
+    (tmp_path / "repos.txt").write_text(
+        "# fork and mirrors\n"
+        "fork\n"
+        "mirrors/eu  acme/chatraj-eu   # deployment mirror\n"
+        "../ghe  api=https://ghe.example/api/v3/ acme/chatraj\n\n")
+    specs = read_repos(str(tmp_path / "repos.txt"))
+    assert specs == [RepoSpec(str(tmp_path / "fork")),
+                     RepoSpec(str(tmp_path / "mirrors" / "eu"), "acme/chatraj-eu"),
+                     RepoSpec(str(tmp_path.parent / "ghe"), "acme/chatraj", "https://ghe.example/api/v3")]
+    assert specs[2].host("https://api.github.com") == "ghe.example"
+    assert specs[0].host("https://api.github.com") == "api.github.com"
+
+    (tmp_path / "bad.txt").write_text("fork\nfork\n")
+    with pytest.raises(ValueError, match="listed twice"):
+        read_repos(str(tmp_path / "bad.txt"))
+
+
+def test_fanout_streams_report_and_isolates_failures(tmp_path, capsys):
+    for name in ("a", "b"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / f"{name}.txt").write_text(name)
+    (tmp_path / "repos.txt").write_text("a\nmissing\nb\n")
+    report = tmp_path / "report.ndjson"
+
+    summary = run_fanout(str(tmp_path / "repos.txt"), ["scan", "--no-index"], concurrency=2,
+                         report=str(report))
+
+    assert summary["repos"] == 3 and summary["ok"] == 2
+    assert summary["failed"] == [str(tmp_path / "missing")]
+    records = {r["repo"]: r for r in map(json.loads, report.read_text().splitlines())}
+    assert '"files"' in records[str(tmp_path / "a")]["output"]
+    assert "a.txt" not in records[str(tmp_path / "b")]["output"]  # output is kept per repository
+    assert "is not a directory" in records[str(tmp_path / "missing")]["output"]
+    assert "[failed (exit 1)]" in capsys.readouterr().out
+
+
+def test_per_host_limit_and_shared_scheduler(tmp_path, monkeypatch):
+    specs = [RepoSpec(str(tmp_path), f"o/r{i}", "https://ghe.example/api/v3" if i % 2 else None)
+             for i in range(8)]
+    lock = threading.Lock()
+    active, peak, schedulers = {}, {}, {}
+
+    def fake_run(agent, argv, refused=()):
+        host = "ghe" if agent.api_url.startswith("https://ghe") else "github"
+        with lock:
+            active[host] = active.get(host, 0) + 1
+            peak[host] = max(peak.get(host, 0), active[host])
+            schedulers.setdefault(host, set()).add(id(agent.scheduler))
+        time.sleep(0.05)
+        with lock:
+            active[host] -= 1
+        return 0
+
+    monkeypatch.setattr(fanout, "run_isolated", fake_run)
+    records = fanout.asyncio.run(fanout.fanout(specs, ["scan"], concurrency=8, per_host=2))
+    assert len(records) == 8 and all(r["ok"] for r in records)
+    assert peak == {"github": 2, "ghe": 2}
+    assert all(len(ids) == 1 for ids in schedulers.values())
+    assert schedulers["github"] != schedulers["ghe"]
@@ -10,11 +10,24 @@ class DummyResp:
     def __init__(self, status_code=200, json_data=None):
         self.status_code = status_code
         self._json = json_data or {}
+        self.headers = {}
+        self.content = json.dumps(self._json).encode()
+        self.request = None
 
     def json(self):
         return self._json
 
 
+def patch_session(monkeypatch, fake_get, fake_post):
+    """Route the agent's pooled requests.Session through the fakes."""
+    def fake_request(self, method, url, json=None, headers=None, **kwargs):
+        if method == "GET":
+            return fake_get(url, headers=headers)
+        return fake_post(url, json=json, headers=headers)
+
+    monkeypatch.setattr("requests.Session.request", fake_request)
+
+
 def test_create_pr_and_branch_flow(monkeypatch, tmp_path):
     # Provide a fake token to skip token checks
     os.environ["GITHUB_TOKEN"] = "ghp_testtoken"
@@ -41,8 +54,7 @@ def test_create_pr_and_branch_flow(monkeypatch, tmp_path):
             return DummyResp(201, {"html_url": "https://example.com/pr/1"})
         return DummyResp(200, {})
 
-    monkeypatch.setattr("requests.get", fake_get)
-    monkeypatch.setattr("requests.post", fake_post)
+    patch_session(monkeypatch, fake_get, fake_post)
 
     # Run create_branch_with_changes (should use patched requests)
     ref = agent.create_branch_with_changes(
@@ -52,3 +64,86 @@ def test_create_pr_and_branch_flow(monkeypatch, tmp_path):
     pr = agent.create_pull_request(
         "title", head="test-branch", repo="owner/repo")
     assert pr.get("html_url") == "https://example.com/pr/1"
+
+
+def test_branch_skips_unchanged_and_inlines_small_files(monkeypatch, tmp_path):
+    from chatraj_agent.agent import git_blob_sha
+
+    assert git_blob_sha(b"hello\n") == "ce013625030ba8dba906f756967f9e9ca394464a"
+
+    os.environ["GITHUB_TOKEN"] = "ghp_testtoken"
+    agent = ChatrajAgent(repo_root=str(tmp_path))
+    big = "x" * 100
+
+    def fake_get(url, headers=None):
+        if "/git/ref/heads/" in url:
+            return DummyResp(200, {"object": {"sha": "base-sha"}})
+        if url.endswith("/git/commits/base-sha"):
+            return DummyResp(200, {"tree": {"sha": "base-tree"}})
+        if "/git/trees/base-tree" in url:
+            return DummyResp(200, {"tree": [
+                {"path": "same.txt", "type": "blob", "sha": git_blob_sha(b"same")}]})
+        return DummyResp(404, {})
+
+    posts = []
+
+    def fake_post(url, json=None, headers=None):
+        posts.append((url, json))
+        if url.endswith('/git/blobs'):
+            return DummyResp(201, {"sha": "blob-sha"})
+        if url.endswith('/git/refs'):
+            return DummyResp(201, {"ref": "refs/heads/b"})
+        return DummyResp(201, {"sha": "sha"})
+
+    patch_session(monkeypatch, fake_get, fake_post)
+
+    icon = tmp_path / "icon.png"
+    icon.write_bytes(b"\x89PNG\r\n\x1a\n\xff\x00")
+    agent.create_branch_with_changes(
+        "b", {"same.txt": "same", "small.txt": "hi", "big.txt": big, "icon.png": icon},
+        repo="owner/repo", inline_limit=10)
+
+    blob_posts = {p[1]["content"]: p[1]["encoding"] for p in posts if p[0].endswith('/git/blobs')}
+    # binary files are uploaded base64-encoded even when small enough to inline
+    assert blob_posts == {big: "utf-8", "iVBORw0KGgr/AA==": "base64"}
+    tree = next(p[1]["tree"] for p in posts if p[0].endswith('/git/trees'))
+    by_path = {e["path"]: e for e in tree}
+    assert "same.txt" not in by_path
+    assert by_path["small.txt"]["content"] == "hi"
+    assert by_path["big.txt"]["sha"] == by_path["icon.png"]["sha"] == "blob-sha"
+
+
+def test_create_issues_bulk_skips_existing_and_resumes(monkeypatch, tmp_path):
+    os.environ["GITHUB_TOKEN"] = "ghp_testtoken"
+    agent = ChatrajAgent(repo_root=str(tmp_path))
+    source = tmp_path / "issues.jsonl"
+    source.write_text("\n".join(json.dumps(x) for x in [
+        {"title": "Already open", "body": "x"},
+        {"title": "New one", "body": "y", "labels": ["bug"]},
+        {"title": "New one", "body": "dup"},
+        {"body": "no title"},
+        {"title": "Another", "body": "z"},
+    ]) + "\n")
+    posted = []
+
+    def fake_get(url, headers=None):
+        return DummyResp(200, [{"title": "Already open"}, {"title": "Another", "pull_request": {}}])
+
+    def fake_post(url, json=None, headers=None):
+        posted.append(json)
+        return DummyResp(201, {"number": len(posted), "html_url": f"https://x/{len(posted)}"})
+
+    patch_session(monkeypatch, fake_get, fake_post)
+
+    counts = agent.create_github_issues(str(source), concurrency=2, repo="owner/repo")
+    assert counts == {"created": 2, "exists": 2, "resumed": 0, "failed": 0, "invalid": 1}
+    assert sorted(p["title"] for p in posted) == ["Another", "New one"]
+    assert posted[0].get("labels") == ["bug"] or posted[1].get("labels") == ["bug"]
+
+    results = [json.loads(line) for line in (tmp_path / "issues.results.ndjson").read_text().splitlines()]
+    assert {r["status"] for r in results} == {"created", "exists", "invalid"}
+
+    posted.clear()
+    again = agent.create_github_issues(str(source), repo="owner/repo")
+    assert posted == []
+    assert again["resumed"] == 4
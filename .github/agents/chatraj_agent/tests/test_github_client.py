@@ -0,0 +1,53 @@
+import json
+
+from requests.structures import CaseInsensitiveDict
+
+from chatraj_agent.github_client import GitHubClient, ResponseCache
+
+
+class FakeResp:
+    def __init__(self, status_code, payload=None, headers=None):
+        self.status_code = status_code
+        self.content = json.dumps(payload).encode() if payload is not None else b""
+        self.headers = CaseInsensitiveDict(headers or {})
+        self.request = None
+
+    def json(self):
+        return json.loads(self.content)
+
+
+def test_conditional_get_served_from_cache(tmp_path, monkeypatch):
+    client = GitHubClient("tok", api_url="https://api.example", cache_dir=str(tmp_path))
+    seen = []
+
+    def fake_request(method, url, json=None, headers=None, **kwargs):
+        seen.append(dict(headers or {}))
+        if "If-None-Match" in (headers or {}):
+            return FakeResp(304)
+        return FakeResp(200, {"object": {"sha": "abc"}}, {"ETag": '"v1"'})
+
+    monkeypatch.setattr(client.session, "request", fake_request)
+
+    first = client.get("/repos/o/r/git/ref/heads/main")
+    second = client.get("/repos/o/r/git/ref/heads/main")
+
+    assert first.json() == second.json() == {"object": {"sha": "abc"}}
+    assert seen[1]["If-None-Match"] == '"v1"'
+    assert getattr(second, "from_cache", False)
+    assert client.stats["requests"] == 2
+    assert client.stats["cache_hits"] == 1
+    assert client.session.headers["Authorization"] == "token tok"
+
+
+def test_response_cache_evicts_least_recently_used(tmp_path):
+    import os
+
+    cache = ResponseCache(str(tmp_path), max_entries=2)
+    cache.put("a", {"v": 1})
+    cache.put("b", {"v": 2})
+    os.utime(tmp_path / "a.json", ns=(0, 10))
+    os.utime(tmp_path / "b.json", ns=(0, 20))
+    cache.put("c", {"v": 3})
+    assert cache.get("a") is None
+    assert cache.get("b") == {"v": 2}
+    assert cache.get("c") == {"v": 3}
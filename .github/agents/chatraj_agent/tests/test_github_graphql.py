@@ -0,0 +1,81 @@
+import pytest
+
+from chatraj_agent.agent import ChatrajAgent
+from chatraj_agent.github_graphql import GraphQLError, comment_marker, graphql_url
+from github_standin import GitHubStandIn
+
+
+@pytest.fixture
+def standin(monkeypatch):
+    server = GitHubStandIn({"README.md": "hello\n", "keep.txt": "same\n"}).start()
+    monkeypatch.setenv("GITHUB_TOKEN", "ghp_testtoken")
+    monkeypatch.setenv("GITHUB_API_URL", server.url)
+    monkeypatch.delenv("CHATRAJ_GITHUB_TRANSPORT", raising=False)
+    yield server
+    server.stop()
+
+
+def test_graphql_url_for_enterprise():
+    assert graphql_url("https://api.github.com/") == "https://api.github.com/graphql"
+    assert graphql_url("https://ghe.example/api/v3") == "https://ghe.example/api/graphql"
+
+
+def test_graphql_publish_batches_commit_pr_and_comment(standin, tmp_path):
+    agent = ChatrajAgent(repo_root=str(tmp_path))
+    files = {"keep.txt": "same\n", "new.txt": "new\n", "data/big.json": "x" * 100_000}
+
+    first = agent.publish_pull_request("auto", files, "chore: add files\n\ndetails", "Add files",
+                                       body="b", comment="results v1", marker="run", repo="o/r",
+                                       transport="graphql")
+    assert first["transport"] == "graphql" and first["requests"] == 3
+    assert first["files"] == {"changed": 2, "unchanged": 1}
+    assert first["pull_request"]["created"] and first["branch_created"]
+    assert set(standin.files_at("auto")) == {"README.md", "keep.txt", "new.txt", "data/big.json"}
+
+    files["new.txt"] = "changed\n"
+    second = agent.publish_pull_request("auto", files, "chore: update", "Add files (v2)",
+                                        comment="results v2", marker="run", repo="o/r", transport="graphql")
+    assert second["requests"] == 2  # lookup + one mutation document
+    assert second["files"]["changed"] == 1 and not second["pull_request"]["created"]
+    assert second["comment"]["updated"]
+    assert [c["body"] for c in standin.comments] == [f"results v2\n\n{comment_marker('run')}"]
+    assert standin.pulls[0]["title"] == "Add files (v2)" and len(standin.pulls) == 1
+
+
+def test_auto_falls_back_to_rest_without_graphql(standin, tmp_path):
+    standin.graphql_enabled = False
+    agent = ChatrajAgent(repo_root=str(tmp_path))
+    result = agent.publish_pull_request("auto", {"new.txt": "new\n"}, "chore: add", "Add",
+                                        comment="results", repo="o/r")
+    assert result["transport"] == "rest"
+    assert standin.files_at("auto")["new.txt"] and len(standin.comments) == 1
+
+    agent.upsert_pull_request_comment(result["pull_request"]["number"], "again", repo="o/r")
+    assert len(standin.comments) == 1 and standin.comments[0]["body"].startswith("again")
+
+    with pytest.raises(GraphQLError):
+        agent.upsert_pull_request_comment(1, "x", repo="o/r", transport="graphql")
+
+
+def test_failed_comment_mutation_is_not_retried_over_rest(standin, tmp_path):
+    agent = ChatrajAgent(repo_root=str(tmp_path))
+    pr = standin.create_pull("main", "auto", "Add", "")
+    standin.failing_mutations.add("addComment")
+    with pytest.raises(GraphQLError):
+        agent.upsert_pull_request_comment(pr["number"], "results", repo="o/r")
+    assert len(standin.comments) == 1  # applied once, no duplicate from a REST fallback
+
+
+def test_rest_upsert_pages_to_the_agents_own_comment(standin, tmp_path):
+    agent = ChatrajAgent(repo_root=str(tmp_path))
+    pr = standin.create_pull("main", "auto", "Add", "")
+    tag = comment_marker("pr")
+    mine = standin.add_comment(pr, f"results v1\n\n{tag}")
+    for i in range(150):
+        standin.add_comment(pr, f"review {i}", author="someone")
+    standin.add_comment(pr, f"> quoting {tag}", author="someone")
+
+    result = agent.upsert_pull_request_comment(pr["number"], "results v2", repo="o/r", transport="rest")
+    assert result["updated"] and result["id"] == mine["id"]
+    assert mine["body"].startswith("results v2") and len(standin.comments) == 152
+    assert standin.counts["GET /repos/o/r/issues/1/comments"] == 2  # page 1 is not fetched twice
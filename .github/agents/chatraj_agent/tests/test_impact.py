@@ -0,0 +1,87 @@
+import os
+
+from chatraj_agent.impact import ImportGraph, parse_imports, select_tests
+
+
+def write(root, rel, text):
+    path = root / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def test_parse_imports_covers_esm_cjs_and_mocks():
+    src = """
+    import a from './a.js';
+    import {
+      b,
+    } from "../b";
+    export * from './c.js';
+    const d = require('./d');
+    jest.mock('../../services/e.js');
+    await import('./f.js');
+    import 'g-package';
+    """
+    assert parse_imports(src) == ["../../services/e.js", "../b", "./a.js", "./c.js", "./d", "./f.js", "g-package"]
+
+
+def test_select_tests_follows_reverse_imports_and_caches(tmp_path):
+    write(tmp_path, "Backend/models/blog.model.js", "export default {}")
+    write(tmp_path, "Backend/services/blog.service.js", "import Blog from '../models/blog.model.js'")
+    write(tmp_path, "Backend/services/user.service.js", "export const u = 1")
+    write(tmp_path, "Backend/tests/unit/blog.test.js", "import s from '../../services/blog.service.js'")
+    write(tmp_path, "Backend/tests/unit/user.test.js", "jest.mock('../../services/user.service.js')")
+    write(tmp_path, "frontend/src/App.jsx", "export default 1")
+    write(tmp_path, "frontend/__tests__/App.test.jsx", "import App from '../src/App'")
+
+    graph = ImportGraph(str(tmp_path)).build()
+    assert graph.stats["parsed"] == 7
+
+    sel = select_tests(graph, ["Backend/models/blog.model.js"])
+    assert sel["backend"]["selected"] == {
+        "Backend/tests/unit/blog.test.js":
+            "imports Backend/services/blog.service.js -> Backend/models/blog.model.js (changed)"}
+    assert list(sel["backend"]["skipped"]) == ["Backend/tests/unit/user.test.js"]
+    assert sel["frontend"]["selected"] == {}
+
+    sel = select_tests(graph, ["frontend/package.json"])
+    assert list(sel["frontend"]["selected"]) == ["frontend/__tests__/App.test.jsx"]
+
+    os.utime(tmp_path / "Backend/services/user.service.js", ns=(0, 1))
+    warm = ImportGraph(str(tmp_path)).build()
+    assert warm.stats == {"files": 7, "stat_hits": 6, "hash_hits": 1, "parsed": 0}
+
+
+def test_unresolvable_changes_select_every_test(tmp_path):
+    write(tmp_path, "Backend/services/a.js", "export const a = 1")
+    write(tmp_path, "Backend/tests/unit/a.test.js", "import fixture from './fixtures/a.json'")
+    write(tmp_path, "Backend/tests/unit/b.test.js", "export {}")
+    write(tmp_path, "frontend/__tests__/App.test.jsx", "export {}")
+    graph = ImportGraph(str(tmp_path)).build()
+
+    # a deleted module and a non-JS fixture are not in the graph
+    for changed in ("Backend/services/deleted.js", "Backend/tests/unit/fixtures/a.json"):
+        sel = select_tests(graph, [changed])
+        assert sorted(sel["backend"]["selected"]) == ["Backend/tests/unit/a.test.js", "Backend/tests/unit/b.test.js"]
+        assert "outside the import graph" in sel["backend"]["selected"]["Backend/tests/unit/a.test.js"]
+        assert sel["backend"]["skipped"] == {} and sel["frontend"]["selected"] == {}
+
+    for changed in ("Backend/tests/__snapshots__/b.test.js.snap", "Backend/jest.setup.cjs",
+                    "frontend/.babelrc"):
+        sel = select_tests(graph, [changed])
+        project = changed.split("/")[0].lower()
+        assert sel[project]["skipped"] == {} and sel[project]["ignored"] == {}
+
+
+def test_docs_and_assets_do_not_force_every_test(tmp_path):
+    write(tmp_path, "Backend/services/a.js", "export const a = 1")
+    write(tmp_path, "Backend/tests/unit/a.test.js", "import { a } from '../../services/a.js'")
+    write(tmp_path, "Backend/tests/unit/b.test.js", "export {}")
+    write(tmp_path, "frontend/__tests__/App.test.jsx", "export {}")
+    graph = ImportGraph(str(tmp_path)).build()
+
+    docs = ["Backend/README.md", "Backend/Dockerfile", "frontend/public/logo.png", "frontend/public/robots.txt"]
+    sel = select_tests(graph, docs + ["Backend/services/a.js"])
+    assert list(sel["backend"]["selected"]) == ["Backend/tests/unit/a.test.js"]
+    assert list(sel["backend"]["skipped"]) == ["Backend/tests/unit/b.test.js"]
+    assert sorted(sel["backend"]["ignored"]) == sorted(docs[:2])
+    assert sel["frontend"]["selected"] == {} and sorted(sel["frontend"]["ignored"]) == docs[2:]
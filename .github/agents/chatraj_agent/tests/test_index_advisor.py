@@ -0,0 +1,113 @@
+from chatraj_agent.index_advisor import CATALOG, QueryShape, Sample, advise, covered_by, propose_index
+
+
+def _shape(name):
+    return next(shape for shape in CATALOG if shape.name == name)
+
+
+def test_propose_index_follows_equality_sort_range():
+    shape = QueryShape("q", "c", {"status": "open", "age": {"$gt": 3}, "tag": {"$in": [Sample("tag")]}}, "",
+                       sort=[("createdAt", -1)])
+    assert propose_index(shape) == [("status", 1), ("tag", 1), ("createdAt", -1), ("age", 1)]
+    assert propose_index(_shape("blogs.recent")) == [("createdAt", -1)]
+    assert propose_index(_shape("blogs.missing_slug")) == [("slug", 1)]
+    assert propose_index(QueryShape("q", "c", {}, "")) is None
+    assert propose_index(QueryShape("q", "c", {"$or": [{"a": 1}, {"b": 1}]}, "")) is None
+
+    indexes = {"_id_": {"key": [("_id", 1)]}, "users_1": {"key": [("users", 1.0), ("name", 1)]}}
+    assert covered_by([("users", -1)], indexes) == "users_1"
+    assert covered_by([("name", 1)], indexes) is None
+
+
+class FakeCollection:
+    """Plans a find as an IXSCAN when an index leads with its first filter or sort field."""
+
+    def __init__(self, name, docs):
+        self.name, self.docs = name, docs
+        self.indexes = {"_id_": {"key": [("_id", 1)]}}
+
+    def find_one(self, query, projection):
+        field = next(iter(query))
+        return next((d for d in self.docs if d.get(field) not in (None, [])), None)
+
+    def index_information(self):
+        return dict(self.indexes)
+
+    def create_index(self, keys):
+        name = "_".join(f"{f}_{d}" for f, d in keys)
+        self.indexes[name] = {"key": keys}
+        return name
+
+    def explain(self, find):
+        query = find["filter"]
+        field = next(iter(query["$or"][0] if "$or" in query else query), None) or \
+            next(iter(find.get("sort", {})), None)
+        index = next((n for n, i in self.indexes.items() if i["key"][0][0] == field), None)
+        returned = min(find.get("limit") or len(self.docs), 1 if query else len(self.docs))
+        if index:
+            plan = {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": index}}
+            examined = returned
+        else:
+            plan = {"stage": "COLLSCAN"}
+            if find.get("sort"):
+                plan = {"stage": "SORT", "inputStage": plan}
+            examined = len(self.docs)
+        return {"queryPlanner": {"winningPlan": {"stage": "PROJECTION_SIMPLE", "inputStage": plan}},
+                "executionStats": {"nReturned": returned, "totalDocsExamined": examined,
+                                   "totalKeysExamined": returned if index else 0, "executionTimeMillis": 1}}
+
+
+class FakeDatabase:
+    name = "chatraj"
+
+    def __init__(self, **collections):
+        self.collections = {n: FakeCollection(n, docs) for n, docs in collections.items()}
+        self.commands = []
+
+    def __getitem__(self, name):
+        return self.collections[name]
+
+    def command(self, command):
+        self.commands.append(command)
+        assert command["verbosity"] == "executionStats"
+        return self.collections[command["explain"]["find"]].explain(command["explain"])
+
+
+def _database():
+    users = [{"_id": i, "email": f"u{i}@x"} for i in range(50)]
+    db = FakeDatabase(users=users, blogs=[{"_id": i, "title": "t"} for i in range(200)],
+                      projects=[{"_id": i, "users": [i, i + 1]} for i in range(30)])
+    db["users"].indexes["email_1"] = {"key": [("email", 1)]}
+    return db
+
+
+def test_advise_proposes_then_applies_indexes():
+    db = _database()
+    report = advise(db, CATALOG)
+    by_name = {e["shape"]: e for e in report["shapes"]}
+    assert "users.by_email" not in report["flagged"]
+    assert by_name["users.by_email"]["before"]["indexes"] == ["email_1"]
+    assert by_name["blogs.recent"]["before"]["in_memory_sort"]
+    assert by_name["blogs.recent"]["create_index"] == "db.blogs.createIndex({ createdAt: -1 })"
+    # the member lookup and showcase sort share one index; both slug filters share another
+    assert sorted((p["collection"], p["keys"]) for p in report["proposed"]) == [
+        ("blogs", "{ createdAt: -1 }"), ("blogs", "{ slug: 1 }"), ("projects", "{ users: 1 }"),
+        ("users", "{ projects: -1 }")]
+    assert report["created"] == [] and "after" not in by_name["blogs.recent"]
+    assert len(db["blogs"].indexes) == 1
+
+    report = advise(db, CATALOG, apply=True)
+    by_name = {e["shape"]: e for e in report["shapes"]}
+    assert len(report["created"]) == 4 and report["unresolved"] == []
+    assert by_name["blogs.missing_slug"]["before"]["docs_examined"] == 200
+    assert by_name["blogs.missing_slug"]["after"]["docs_examined"] == 1
+    assert by_name["projects.showcase"]["after"]["indexes"] == ["users_1"]
+
+    report = advise(db, CATALOG)
+    assert report["flagged"] == [] and report["proposed"] == []
+
+
+def test_advise_skips_shapes_without_sample_data():
+    db = FakeDatabase(users=[], blogs=[], projects=[])
+    report = advise(db, [_shape("users.by_email"), _shape("blogs.recent")])
+    assert "skipped" in report["shapes"][0] and "before" in report["shapes"][1]
@@ -0,0 +1,64 @@
+import os
+import shutil
+import sys
+
+from chatraj_agent.npm_cache import NodeModulesCache, cache_key, install, node_version
+
+# Stands in for `npm ci`: writes a package and a .bin symlink into node_modules
+FAKE_INSTALL = [sys.executable, "-c",
+                "import os; os.makedirs('node_modules/pkg', exist_ok=True); "
+                "open('node_modules/pkg/index.js', 'w').write('module.exports = 1;' * 100); "
+                "os.makedirs('node_modules/.bin', exist_ok=True); "
+                "os.path.lexists('node_modules/.bin/pkg') or os.symlink('../pkg/index.js', 'node_modules/.bin/pkg')"]
+
+
+def make_project(root, name="Backend", lock='{"lockfileVersion": 3}'):
+    project = root / name
+    project.mkdir()
+    (project / "package-lock.json").write_text(lock)
+    return project
+
+
+def test_key_depends_on_lockfile_and_node_version(tmp_path):
+    (tmp_path / ".nvmrc").write_text("v22.18.0\n")
+    backend = make_project(tmp_path)
+    frontend = make_project(tmp_path, "frontend", '{"lockfileVersion": 2}')
+    assert node_version(str(frontend), str(tmp_path)) == "22.18.0"
+    key = cache_key(str(backend), "22.18.0", ["npm", "ci"])
+    assert key == cache_key(str(backend), "22.18.0", ["npm", "ci"])
+    assert key != cache_key(str(backend), "20.0.0", ["npm", "ci"])
+    assert key != cache_key(str(frontend), "22.18.0", ["npm", "ci"])
+
+
+def test_miss_then_hardlinked_hit_and_stats(tmp_path):
+    project = make_project(tmp_path)
+    cache = NodeModulesCache(str(tmp_path / "cache"))
+
+    first = install(cache, str(project), FAKE_INSTALL, "22.18.0")
+    assert not first["hit"] and first["files"] == 2
+    shutil.rmtree(project / "node_modules")
+
+    second = install(cache, str(project), FAKE_INSTALL, "22.18.0")
+    assert second["hit"] and second["method"] == "hardlink"
+    restored = project / "node_modules" / "pkg" / "index.js"
+    assert restored.read_text().startswith("module.exports")
+    assert os.stat(restored).st_nlink == 2
+    assert os.path.islink(project / "node_modules" / ".bin" / "pkg")
+    assert not any(p.name.endswith((".tmp", ".old")) for p in project.iterdir())
+
+    stats = cache.summary()
+    assert stats["entries"] == 1
+    assert stats["projects"]["Backend"]["hit_rate"] == 0.5
+    assert stats["projects"]["Backend"]["bytes_saved"] == second["bytes"]
+
+
+def test_lru_eviction_keeps_newest_entry(tmp_path):
+    cache = NodeModulesCache(str(tmp_path / "cache"), max_bytes=3000)
+    keys = []
+    for i in range(3):
+        project = make_project(tmp_path, f"p{i}", f'{{"v": {i}}}')
+        keys.append(install(cache, str(project), FAKE_INSTALL, "22")["key"])
+    remaining = {e["key"] for e in cache.entries()}
+    assert keys[-1] in remaining
+    assert keys[0] not in remaining
+    assert sum(e["bytes"] for e in cache.entries()) <= 3000
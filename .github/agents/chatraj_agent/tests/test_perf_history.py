@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from chatraj_agent.agent import main
+from chatraj_agent.perf_history import PerfHistory, aggregate_spans, compare, detect_regression
+
+
+def span(name, wall, **extra):
+    return {"name": name, "parent": None, "wall": wall, "cpu": wall / 2, "children_cpu": 0.0,
+            "children_peak_rss_mb": None, "counters": extra.pop("counters", {}), "attrs": extra,
+            "error": None}
+
+
+def test_aggregate_sums_repeated_spans_and_keeps_sizes():
+    ops = aggregate_spans([span("github.request", 0.2, status=200, counters={"http_requests": 1}),
+                           span("github.request", 0.3, status=201, counters={"http_requests": 1}),
+                           span("agent.scan", 1.0, files=120, bytes=4096)])
+    assert ops["github.request"]["count"] == 2
+    assert ops["github.request"]["wall"] == pytest.approx(0.5)
+    assert ops["github.request"]["http_requests"] == 2
+    assert "status" not in ops["github.request"]
+    assert ops["agent.scan"]["files"] == 120
+
+
+def test_detect_regression_is_robust_to_noise_and_outliers():
+    baseline = [1.0, 1.02, 0.98, 1.01, 0.99, 1.03, 5.0]  # one outlier run
+    assert not detect_regression([1.04], baseline)["regression"]
+    assert detect_regression([1.5], baseline)["regression"]
+    assert detect_regression([1.5], baseline[:3]) is None
+
+
+def test_compare_flags_only_slowed_operations(tmp_path):
+    history = PerfHistory(str(tmp_path / "perf.sqlite"))
+    for i in range(8):
+        history.record(f"c{i}", "test-all", [span("agent.test_all", 10 + i % 2 * 0.2),
+                                             span("agent.scan", 1.0)])
+    history.record("head", "test-all", [span("agent.test_all", 14.0), span("agent.scan", 1.01)])
+    result = compare(history, metrics=("wall",))
+    history.close()
+    flagged = {c["op"]: c["regression"] for c in result["checks"]}
+    assert result["commit"] == "head"
+    assert flagged == {"agent.test_all": True, "agent.scan": False}
+    assert result["regressions"] == 1
+
+
+def test_compare_keeps_each_commands_baseline_separate(tmp_path):
+    history = PerfHistory(str(tmp_path / "perf.sqlite"))
+    for i in range(8):
+        history.record(f"c{i}", "install", [span("agent.run_command", 30.0 + i % 2)])
+        history.record(f"c{i}", "test-backend", [span("agent.run_command", 2.0 + i % 2 * 0.05)])
+    history.record("head", "install", [span("agent.run_command", 30.5)])
+    history.record("head", "test-backend", [span("agent.run_command", 3.0)])
+    result = compare(history, metrics=("wall",))
+    only_install = compare(history, metrics=("wall",), command="install")
+    history.close()
+    flagged = {c["command"]: c["regression"] for c in result["checks"]}
+    assert flagged == {"install": False, "test-backend": True}
+    assert [c["command"] for c in only_install["checks"]] == ["install"]
+    assert only_install["regressions"] == 0
+
+
+def test_cli_records_runs_and_perf_compare_exit_code(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("GITHUB_SHA", "abc123")
+    (tmp_path / "app.js").write_text("console.log(1)\n")
+    main(["scan", "--no-index"])
+    history = PerfHistory(str(tmp_path / ".chatraj-agent" / "perf-history.sqlite"))
+    runs = history.runs()
+    assert [(r["commit"], r["command"], r["ok"]) for r in runs] == [("abc123", "scan", True)]
+    assert history.samples(runs[0]["id"])["agent.scan"]["files"] >= 1
+    for i in range(6):
+        history.record(f"old{i}", "scan", [span("agent.scan", 0.001)])
+    history.record("slow", "scan", [span("agent.scan", 5.0)])
+    history.close()
+
+    trace = tmp_path / "trace.json"
+    trace.write_text(json.dumps({"spans": [span("auto_pr.main", 2.0)]}))
+    main(["perf-history", "--import", str(trace), "--commit", "def456"])
+    with pytest.raises(SystemExit) as exc:
+        main(["perf-compare", "--commit", "slow", "--command", "scan", "--metric", "wall"])
+    assert exc.value.code == 1
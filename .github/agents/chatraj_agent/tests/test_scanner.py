@@ -0,0 +1,92 @@
+import os
+import threading
+
+from chatraj_agent.scanner import IgnoreRules, RepoScanner, is_ignored
+
+
+def test_ignore_rules_semantics():
+    rules = IgnoreRules("", ["node_modules", "*.log", "/build/", "!keep.log", "docs/**/*.png"])
+    assert is_ignored([rules], "node_modules", True)
+    assert is_ignored([rules], "frontend/node_modules", True)
+    assert is_ignored([rules], "a/b/error.log", False)
+    assert not is_ignored([rules], "keep.log", False)
+    assert is_ignored([rules], "build", True)
+    assert not is_ignored([rules], "build", False)
+    assert not is_ignored([rules], "src/build", True)
+    assert is_ignored([rules], "docs/x/y/z.png", False)
+
+
+def test_scan_skips_ignored_and_reuses_index(tmp_path):
+    (tmp_path / ".gitignore").write_text("node_modules/\n*.tmp\n")
+    (tmp_path / "node_modules" / "pkg").mkdir(parents=True)
+    (tmp_path / "node_modules" / "pkg" / "index.js").write_text("x")
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".git" / "HEAD").write_text("ref")
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "app.js").write_text("a" * 100)
+    (tmp_path / "src" / "scratch.tmp").write_text("t")
+    (tmp_path / "README.md").write_text("hi")
+
+    first = RepoScanner(str(tmp_path), top=1).scan()
+    assert first["files"] == 3  # .gitignore, README.md, src/app.js
+    assert first["dirs"] == 1
+    assert first["bytes"] == len("node_modules/\n*.tmp\n") + 100 + 2
+    assert first["extensions"][".js"] == 1
+    assert first["largest"] == [{"path": "src/app.js", "size": 100}]
+    assert first["dirs_cached"] == 0
+
+    second = RepoScanner(str(tmp_path)).scan()
+    assert second["dirs_cached"] == 2
+    assert second["files"] == first["files"]
+
+    (tmp_path / "src" / "new.py").write_text("print()")
+    os.utime(tmp_path / "src", ns=(0, 1))
+    third = RepoScanner(str(tmp_path)).scan()
+    assert third["files"] == 4
+    assert third["dirs_rescanned"] == 1
+    assert third["extensions"][".py"] == 1
+
+
+def test_concurrent_indexed_scans_do_not_race(tmp_path):
+    for i in range(20):
+        (tmp_path / f"d{i}").mkdir()
+        (tmp_path / f"d{i}" / "f.txt").write_text("x" * i)
+    errors = []
+
+    def scan():
+        for _ in range(10):
+            try:
+                assert RepoScanner(str(tmp_path)).scan()["files"] == 20
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=scan) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert not [p for p in os.listdir(tmp_path / ".chatraj-agent") if p.endswith(".tmp")]
+
+
+def test_index_follows_ancestor_ignore_rules_and_in_place_edits(tmp_path):
+    (tmp_path / ".gitignore").write_text("node_modules/\n")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "x.tmp").write_text("t")
+    (tmp_path / "sub" / "big.txt").write_text("a" * 10)
+    assert RepoScanner(str(tmp_path)).scan()["files"] == 3
+
+    (tmp_path / ".gitignore").write_text("node_modules/\n*.tmp\n")
+    os.utime(tmp_path, ns=(0, 1))  # the root is rescanned anyway; `sub` keeps its mtime
+    after_rule = RepoScanner(str(tmp_path)).scan()
+    assert after_rule["files"] == 2 == RepoScanner(str(tmp_path), use_index=False).scan()["files"]
+
+    (tmp_path / "sub" / "big.txt").write_text("a" * 5000)
+    os.utime(tmp_path / "sub", ns=(0, 1))
+    before = RepoScanner(str(tmp_path)).scan()
+    (tmp_path / "sub" / "big.txt").write_text("a" * 9000)
+    os.utime(tmp_path / "sub", ns=(0, 1))  # in-place edits leave the directory mtime unchanged
+    edited = RepoScanner(str(tmp_path)).scan()
+    assert edited["dirs_cached"] == 2
+    assert edited["bytes"] == before["bytes"] + 4000 == RepoScanner(str(tmp_path), use_index=False).scan()["bytes"]
+    assert edited["largest"][0] == {"path": "sub/big.txt", "size": 9000}
@@ -0,0 +1,112 @@
+import pytest
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+from chatraj_agent.scheduler import DeadlineExceeded, RequestScheduler
+
+
+class Resp:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def make_scheduler(t, **kwargs):
+    return RequestScheduler(sleep=t.sleep, clock=t.clock, wall=t.clock, **kwargs)
+
+
+def test_validation_errors_are_not_retried():
+    t = FakeTime()
+    sched = make_scheduler(t)
+    calls = []
+    resp = sched.call(lambda timeout: calls.append(1) or Resp(422), method="POST")
+    assert resp.status_code == 422
+    assert len(calls) == 1
+    assert sched.metrics["retries"] == 0
+
+
+def test_retry_after_and_connection_errors_are_retried():
+    t = FakeTime()
+    sched = make_scheduler(t)
+    replies = [requests.ConnectionError("reset"), Resp(429, {"Retry-After": "3"}), Resp(200)]
+
+    def send(timeout):
+        r = replies.pop(0)
+        if isinstance(r, Exception):
+            raise r
+        return r
+
+    assert sched.call(send).status_code == 200
+    assert sched.metrics["retries"] == 2
+    assert 3 in t.slept
+    assert sched.metrics["wait_seconds"] == pytest.approx(sum(t.slept))
+
+
+def test_exhausted_rate_limit_waits_for_reset_within_deadline():
+    t = FakeTime()
+    sched = make_scheduler(t, deadline=30)
+    sched.observe(Resp(200, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(t.now + 10)}))
+    assert sched.call(lambda timeout: Resp(200)).status_code == 200
+    assert t.slept == [10]
+    assert sched.metrics["throttled"] == 1
+
+    sched.observe(Resp(200, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(t.now + 60)}))
+    with pytest.raises(DeadlineExceeded):
+        sched.call(lambda timeout: Resp(200))
+
+
+def test_mutations_are_only_retried_when_never_sent():
+    t = FakeTime()
+    sched = make_scheduler(t)
+    for error in (requests.ReadTimeout("read timed out"), requests.ConnectionError("connection reset by peer")):
+        calls = []
+
+        def send(timeout):
+            calls.append(1)
+            raise error
+
+        with pytest.raises(type(error)):
+            sched.call(send, method="POST")
+        assert len(calls) == 1
+
+    refused = requests.ConnectionError(MaxRetryError(None, "/repos/o/r/issues",
+                                                     NewConnectionError(None, "connection refused")))
+    for error in (requests.ConnectTimeout("connect timed out"), refused):
+        replies = [error, Resp(201)]
+
+        def send(timeout):
+            r = replies.pop(0)
+            if isinstance(r, Exception):
+                raise r
+            return r
+
+        assert sched.call(send, method="POST").status_code == 201
+
+
+def test_mutations_are_not_retried_on_server_errors():
+    t = FakeTime()
+    sched = make_scheduler(t)
+    calls = []
+    resp = sched.call(lambda timeout: calls.append(1) or Resp(502), method="POST")
+    assert resp.status_code == 502
+    assert len(calls) == 1
+
+    replies = [Resp(503, {"Retry-After": "2"}), Resp(429), Resp(201)]
+    assert sched.call(lambda timeout: replies.pop(0), method="POST").status_code == 201
+    assert replies == []
+
+    replies = [Resp(502), Resp(200)]
+    assert sched.call(lambda timeout: replies.pop(0)).status_code == 200
@@ -0,0 +1,40 @@
+import gzip
+import os
+from datetime import datetime
+
+from chatraj_agent.sitemap import generate_sitemap
+
+
+class Blogs:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, filter=None, projection=None, sort=None, batch_size=None):
+        return iter(sorted(self.docs, key=lambda d: d["_id"]))
+
+
+def test_sitemap_splits_gzips_and_skips_unchanged_parts(tmp_path):
+    docs = [{"_id": f"id{i}", "createdAt": datetime(2026, 1, i + 1)} for i in range(6)]
+    out = tmp_path / "public"
+    summary = generate_sitemap(str(tmp_path), blogs=Blogs(docs), out_dir=str(out),
+                               site_url="https://x.test/", max_urls=4)
+
+    assert summary["urls"] == 11 and summary["parts"] == 3
+    index = (out / "sitemap-index.xml").read_text()
+    assert "<loc>https://x.test/sitemap-00003.xml.gz</loc>" in index
+    assert "<lastmod>2026-01-06T00:00:00Z</lastmod>" in index
+    part2 = gzip.decompress((out / "sitemap-00002.xml.gz").read_bytes()).decode()
+    assert part2.count("<url>") == 4 and "https://x.test/blogs/id0" in part2
+
+    mtimes = {p.name: p.stat().st_mtime_ns for p in out.iterdir()}
+    docs[5]["createdAt"] = datetime(2026, 2, 1)
+    again = generate_sitemap(str(tmp_path), blogs=Blogs(docs), out_dir=str(out),
+                             site_url="https://x.test", max_urls=4)
+    assert again["written"] == ["sitemap-00003.xml.gz"]
+    assert again["unchanged"] == ["sitemap-00001.xml.gz", "sitemap-00002.xml.gz"]
+    assert (out / "sitemap-00001.xml.gz").stat().st_mtime_ns == mtimes["sitemap-00001.xml.gz"]
+
+    fewer = generate_sitemap(str(tmp_path), blogs=None, out_dir=str(out),
+                             site_url="https://x.test", max_urls=4)
+    assert fewer["parts"] == 2
+    assert not os.path.exists(out / "sitemap-00003.xml.gz")
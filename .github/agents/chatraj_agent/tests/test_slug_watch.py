@@ -0,0 +1,163 @@
+import json
+import shutil
+import socket
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytest
+from bson import ObjectId
+
+from chatraj_agent.slug_watch import SlugWatcher, event_time, plan_updates
+from chatraj_agent.slugs import EXISTING_SLUG_FILTER, MISSING_SLUG_FILTER, SlugRegistry
+
+
+def _event(_id, title, slug=None, op="insert", n=0):
+    doc = {"_id": _id, "title": title, **({"slug": slug} if slug else {})}
+    return {"_id": {"_data": f"tok-{n}"}, "operationType": op, "documentKey": {"_id": _id},
+            "fullDocument": doc, "wallTime": datetime.now(timezone.utc).replace(tzinfo=None)}
+
+
+def test_plan_updates_folds_events_and_keeps_published_slugs():
+    registry = SlugRegistry(["hello-world"])
+    a, b, c = ObjectId(), ObjectId(), ObjectId()
+    events = [_event(a, "Draft"), _event(a, "Hello World", op="update"), _event(b, "Old", slug="kept"),
+              {**_event(c, "Gone"), "fullDocument": None}]
+    plan = plan_updates(events, registry)
+    assert plan == {"updates": [(a, "hello-world-1")], "skipped": 2}
+    assert "kept" in registry and plan_updates([_event(ObjectId(), "Kept")], registry)["updates"][0][1] == "kept-1"
+    assert event_time({"wallTime": datetime(2024, 1, 1)}) == datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+
+
+class FakeStream:
+    def __init__(self, events):
+        self.events = list(events)
+        self.token = None
+        self.polls = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    @property
+    def resume_token(self):
+        return self.token
+
+    def try_next(self):
+        self.polls += 1
+        if self.events:
+            change = self.events.pop(0)
+            self.token = change["_id"]
+            return change
+        self.token = {"_data": f"idle-{self.polls}"}
+        return None
+
+
+class FakeBlogs:
+    def __init__(self, docs, events):
+        self.docs = {d["_id"]: d for d in docs}
+        self.events = events
+        self.watched = []
+        self.writes = []
+
+    def find(self, query, projection, batch_size=None):
+        has_slug = query == EXISTING_SLUG_FILTER
+        assert has_slug or query == MISSING_SLUG_FILTER
+        return [dict(d) for d in self.docs.values() if bool(d.get("slug")) == has_slug]
+
+    def watch(self, pipeline, resume_after=None, **kwargs):
+        self.watched.append(resume_after)
+        return FakeStream(self.events.pop(0) if self.events else [])
+
+    def bulk_write(self, ops, ordered):
+        assert not ordered
+        self.writes.append(len(ops))
+        modified = 0
+        for op in ops:
+            doc = self.docs.setdefault(op._filter["_id"], {"_id": op._filter["_id"]})
+            if not doc.get("slug"):
+                doc["slug"] = op._doc["$set"]["slug"]
+                modified += 1
+        return type("BulkWriteResult", (), {"modified_count": modified})()
+
+
+def test_watcher_catches_up_batches_and_resumes(tmp_path):
+    old, new, renamed = ObjectId(), ObjectId(), ObjectId()
+    first_run = [_event(new, "Fresh Post", n=1), _event(renamed, "Fresh Post", n=2), _event(new, "Fresh Post", n=3)]
+    second_run = [_event(ObjectId(), "Later", n=4)]
+    blogs = FakeBlogs([{"_id": old, "title": "Fresh Post"}, {"_id": ObjectId(), "title": "X", "slug": "x"}],
+                      [first_run, second_run])
+    state = tmp_path / "slug-watch.json"
+
+    metrics = SlugWatcher(blogs, state, batch_size=2, flush_interval=60).run(max_events=3)
+    assert blogs.watched == [None]
+    assert metrics["caught_up"] == 1 and blogs.docs[old]["slug"] == "fresh-post"
+    assert metrics["events"] == 3 and metrics["batches"] == 2 and metrics["updated"] == 2
+    assert {blogs.docs[new]["slug"], blogs.docs[renamed]["slug"]} == {"fresh-post-1", "fresh-post-2"}
+    assert metrics["lag_ms"]["count"] == 3
+    saved = json.loads(state.read_text())
+    assert saved["resume_token"] == {"_data": "tok-3"} and saved["metrics"]["updated"] == 2
+
+    metrics = SlugWatcher(blogs, state, flush_interval=60).run(max_events=1)
+    assert blogs.watched == [None, {"_data": "tok-3"}]
+    assert metrics["caught_up"] == 0 and metrics["updated"] == 1
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def replica_set(tmp_path):
+    """A throwaway single-node replica set (change streams need one)."""
+    pymongo = pytest.importorskip("pymongo")
+    if shutil.which("mongod") is None:
+        pytest.skip("mongod is not installed")
+    port = _free_port()
+    (tmp_path / "db").mkdir()
+    proc = subprocess.Popen(["mongod", "--replSet", "rs0", "--port", str(port), "--bind_ip", "127.0.0.1",
+                             "--dbpath", str(tmp_path / "db"), "--quiet"],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        client = pymongo.MongoClient(f"mongodb://127.0.0.1:{port}/?directConnection=true",
+                                     serverSelectionTimeoutMS=20000)
+        client.admin.command("replSetInitiate", {"_id": "rs0", "members": [{"_id": 0, "host": f"127.0.0.1:{port}"}]})
+        deadline = time.monotonic() + 30
+        while not client.admin.command("hello").get("isWritablePrimary"):
+            assert time.monotonic() < deadline, "replica set did not elect a primary"
+            time.sleep(0.2)
+        yield client
+        client.close()
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+def test_watch_slugs_on_local_replica_set(replica_set, tmp_path):
+    blogs = replica_set.get_database("chatraj_test").get_collection("blogs")
+    blogs.insert_one({"title": "Before Watch"})
+    state = tmp_path / "slug-watch.json"
+    watcher = SlugWatcher(blogs, state, flush_interval=0.2)
+
+    def write():
+        time.sleep(1)
+        blogs.insert_many([{"title": "Live Post"}, {"title": "Live Post"}])
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    # our own slug writes come back as (skipped) update events, so stop on time rather than count
+    metrics = watcher.run(duration=4)
+    writer.join()
+    assert metrics["caught_up"] == 1 and metrics["updated"] == 2
+    assert sorted(d["slug"] for d in blogs.find({}, {"slug": 1})) == ["before-watch", "live-post", "live-post-1"]
+
+    token = json.loads(state.read_text())["resume_token"]
+    blogs.insert_one({"title": "While Stopped"})
+    metrics = SlugWatcher(blogs, state, flush_interval=0.2).run(duration=3)
+    assert metrics["updated"] == 1 and json.loads(state.read_text())["resume_token"] != token
+    assert blogs.find_one({"title": "While Stopped"})["slug"] == "while-stopped"
@@ -0,0 +1,170 @@
+import gzip
+import json
+import threading
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from bson import Decimal128, Int64, ObjectId, Timestamp
+from pymongo.errors import BulkWriteError
+
+from chatraj_agent import snapshot
+from chatraj_agent.snapshot import export_snapshot, import_snapshot, range_filter, split_ranges
+
+
+class FakeCollection:
+    """In-memory collection supporting the `_id`-range finds, inserts and index calls used by snapshots."""
+
+    def __init__(self, name, docs=(), database=None):
+        self.name = name
+        self.database = database
+        self.docs = {d["_id"]: d for d in docs}
+        self.indexes = {"_id_": {"v": 2, "key": [("_id", 1)]}}
+        self.lock = threading.Lock()
+        self.finds = []
+
+    def estimated_document_count(self):
+        return len(self.docs)
+
+    def _match(self, query):
+        bounds = query.get("_id", {})
+        return [d for _id, d in sorted(self.docs.items())
+                if ("$gte" not in bounds or _id >= bounds["$gte"]) and ("$lt" not in bounds or _id < bounds["$lt"])]
+
+    def find(self, query, projection=None, sort=None, skip=0, limit=0, batch_size=None):
+        if batch_size:
+            self.finds.append(query)
+        docs = self._match(query)
+        if sort and sort[0][1] < 0:
+            docs.reverse()
+        docs = docs[skip:skip + limit] if limit else docs[skip:]
+        return iter([{"_id": d["_id"]} for d in docs] if projection else [dict(d) for d in docs])
+
+    def find_one(self, query, projection=None, sort=None):
+        return next(self.find(query, projection, sort, limit=1), None)
+
+    def index_information(self):
+        return dict(self.indexes)
+
+    def create_index(self, keys, name, **options):
+        self.indexes[name] = {"v": 2, "key": keys, **options}
+        return name
+
+    def insert_many(self, docs, ordered=True):
+        errors, inserted = [], []
+        unique = [info["key"][0][0] for info in self.indexes.values() if info.get("unique")]
+        with self.lock:
+            for i, doc in enumerate(docs):
+                clash = next((f for f in ["_id"] + unique
+                              if f in doc and any(d.get(f) == doc[f] for d in self.docs.values())), None)
+                if clash:
+                    errors.append({"index": i, "code": 11000, "keyPattern": {clash: 1},
+                                   "errmsg": f"E11000 duplicate key error index: {clash}_1 dup key"})
+                else:
+                    self.docs[doc["_id"]] = doc
+                    inserted.append(doc["_id"])
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(inserted)})
+        return type("InsertManyResult", (), {"inserted_ids": inserted})()
+
+    def drop(self):
+        self.docs.clear()
+        self.indexes = {"_id_": {"v": 2, "key": [("_id", 1)]}}
+
+
+class FakeDatabase:
+    """Database whose `hello` reports a replica set unless `standalone`; records snapshot reads."""
+
+    def __init__(self, name, standalone=False, **collections):
+        self.name = name
+        self.collections = {n: FakeCollection(n, docs, self) for n, docs in collections.items()}
+        self.standalone = standalone
+        self.read_concerns = []
+        self.client = type("Client", (), {"admin": type("Admin", (), {"command": self._hello})()})()
+
+    def _hello(self, name):
+        return {"isWritablePrimary": True, **({} if self.standalone else {"setName": "rs0"})}
+
+    def command(self, cmd):
+        assert cmd["readConcern"] == {"level": "snapshot"}
+        return {"cursor": {"firstBatch": [], "id": 0, "atClusterTime": Timestamp(1700000000, 7)}}
+
+    def cursor_command(self, cmd):
+        collection = self[cmd["find"]]
+        self.read_concerns.append(cmd["readConcern"])
+        collection.finds.append(cmd["filter"])
+        return iter([dict(d) for d in collection._match(cmd["filter"])])
+
+    def __getitem__(self, name):
+        return self.collections.setdefault(name, FakeCollection(name, database=self))
+
+
+def _blogs(n):
+    return [{"_id": ObjectId(), "title": f"post {i}", "views": Int64(i), "score": Decimal128(Decimal("1.10")),
+             "createdAt": datetime(2024, 1, 1, 12, i % 60), "tags": ["a", i]} for i in range(n)]
+
+
+def test_split_ranges_cover_every_document(monkeypatch):
+    monkeypatch.setattr(snapshot, "MIN_PARTITION_DOCS", 10)
+    coll = FakeCollection("blogs", _blogs(95))
+    ranges = split_ranges(coll, 4)
+    assert len(ranges) == 4 and ranges[0][0] is None and ranges[-1][1] is None
+    sizes = [len(coll._match(range_filter(lo, hi))) for lo, hi in ranges]
+    assert sum(sizes) == 95 and max(sizes) - min(sizes) <= 1
+
+    assert split_ranges(FakeCollection("x", _blogs(5)), 4) == [(None, None)]
+    mixed = FakeCollection("x", [{"_id": i} for i in range(50)])
+    mixed.find_one = lambda query, projection, sort: {"_id": 0 if sort[0][1] > 0 else "zz"}
+    assert split_ranges(mixed, 4) == [(None, None)]
+
+
+def test_export_then_import_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot, "MIN_PARTITION_DOCS", 10)
+    blogs = _blogs(120)
+    src = FakeDatabase("chatraj", blogs=blogs, users=[{"_id": ObjectId(), "email": "a@x"}])
+    src["users"].indexes["email_1"] = {"v": 2, "key": [("email", 1)], "unique": True}
+
+    summary = export_snapshot(src, str(tmp_path / "snap"), collections=["blogs", "users"], partitions=4, workers=3)
+    assert summary["collections"]["blogs"]["shards"] == 4 and summary["documents"] == 121
+    assert summary["consistent"] and "warning" not in summary
+    # every range cursor of every collection reads at the same cluster time
+    assert src.read_concerns == [{"level": "snapshot", "atClusterTime": Timestamp(1700000000, 7)}] * 5
+    assert len(src["blogs"].finds) == 4 and {} not in src["blogs"].finds  # one bounded cursor per range
+    manifest = json.loads((tmp_path / "snap" / "manifest.json").read_text())
+    assert sum(s["count"] for s in manifest["collections"]["blogs"]["shards"]) == 120
+    first = (tmp_path / "snap" / "blogs" / "part-00000.ndjson.gz")
+    assert '"$oid"' in gzip.decompress(first.read_bytes()).decode().splitlines()[0]
+
+    dst = FakeDatabase("copy")
+    report = import_snapshot(dst, str(tmp_path / "snap"), workers=3, batch_size=7)
+    assert report["collections"]["blogs"]["inserted"] == 120 and report["documents"] == 121
+    assert dst["blogs"].docs == {b["_id"]: b for b in blogs}  # BSON types survive
+    assert dst["users"].indexes["email_1"] == {"v": 2, "key": [("email", 1)], "unique": True}
+
+    again = import_snapshot(dst, str(tmp_path / "snap"), collections=["users"])
+    assert again["collections"]["users"]["inserted"] == 0 and again["collections"]["users"]["duplicates"] == 1
+    assert import_snapshot(dst, str(tmp_path / "snap"), collections=["users"], drop=True)["documents"] == 1
+
+    # the same email under another _id is a conflict, not an already-imported document
+    clash = FakeDatabase("clash")
+    clash["users"].indexes["email_1"] = {"v": 2, "key": [("email", 1)], "unique": True}
+    clash["users"].docs[ObjectId()] = {"email": "a@x"}
+    with pytest.raises(ValueError, match="unique index other than _id"):
+        import_snapshot(clash, str(tmp_path / "snap"), collections=["users"])
+
+
+def test_standalone_export_falls_back_with_warning(tmp_path):
+    src = FakeDatabase("chatraj", standalone=True, blogs=_blogs(3))
+    summary = export_snapshot(src, str(tmp_path), collections=["blogs"])
+    assert not summary["consistent"] and "standalone" in summary["warning"]
+    assert src.read_concerns == [] and src["blogs"].finds == [{}]
+    assert json.loads((tmp_path / "manifest.json").read_text())["at_cluster_time"] is None
+
+
+def test_import_rejects_corrupt_shard(tmp_path):
+    src = FakeDatabase("chatraj", blogs=_blogs(3))
+    export_snapshot(src, str(tmp_path), collections=["blogs"])
+    shard = tmp_path / "blogs" / "part-00000.ndjson.gz"
+    shard.write_bytes(gzip.compress(b"{}\n"))
+    with pytest.raises(ValueError, match="checksum"):
+        import_snapshot(FakeDatabase("copy"), str(tmp_path))
@@ -0,0 +1,43 @@
+import io
+import sys
+
+from chatraj_agent.agent import ChatrajAgent
+from chatraj_agent.suites import Shard, build_shards, format_summary, run_shards
+
+
+def fake_shard(tmp_path, suite, index, total, failed):
+    report = str(tmp_path / f"{suite}-{index}.json")
+    payload = {"numTotalTests": 3, "numPassedTests": 3 - failed, "numFailedTests": failed,
+               "numPendingTests": 0,
+               "testResults": [{"name": str(tmp_path / "bad.test.js"), "status": "failed"}] if failed else []}
+    code = (f"import json, sys; print('running {suite}'); "
+            f"json.dump({payload!r}, open({report!r}, 'w')); sys.exit({1 if failed else 0})")
+    return Shard(suite, index, total, str(tmp_path), [sys.executable, "-c", code], report)
+
+
+def test_run_shards_streams_and_merges_reports(tmp_path):
+    plan = [fake_shard(tmp_path, "backend", 1, 2, 0), fake_shard(tmp_path, "backend", 2, 2, 1),
+            fake_shard(tmp_path, "frontend", 1, 1, 0)]
+    out = io.StringIO()
+    summary = run_shards(plan, out=out)
+
+    assert "[backend 2/2] running backend" in out.getvalue()
+    assert summary["success"] is False
+    assert summary["suites"]["backend"] == {"total": 6, "passed": 5, "failed": 1, "skipped": 0,
+                                            "shard_seconds": summary["suites"]["backend"]["shard_seconds"]}
+    assert summary["shards"][1]["failed_files"] == ["bad.test.js"]
+    assert "FAIL" in format_summary(summary)
+
+
+def test_build_shards_uses_jest_and_vitest_shard_flags(tmp_path):
+    (tmp_path / "Backend").mkdir()
+    (tmp_path / "frontend").mkdir()
+    plan = build_shards(str(tmp_path), shards=2)
+    assert [s.label for s in plan] == ["backend 1/2", "backend 2/2", "frontend 1/2", "frontend 2/2"]
+    assert "--shard=2/2" in plan[1].argv and "jest" in plan[1].argv
+    assert "vitest" in plan[2].argv and "--reporter=json" in plan[2].argv
+
+
+def test_run_command_splits_string_commands(tmp_path):
+    agent = ChatrajAgent(repo_root=str(tmp_path))
+    assert agent.run_command(f'"{sys.executable}" -c "import sys; sys.exit(0)"') == 0
@@ -0,0 +1,56 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from chatraj_agent import tracing
+from chatraj_agent.agent import main
+from chatraj_agent.tracing import Tracer
+
+
+def test_spans_nest_and_record_counters_and_errors():
+    t = Tracer()
+    with t.span("outer", kind="test"):
+        with t.span("inner") as attrs:
+            t.count("http_requests", 3)
+            attrs["status"] = 200
+        with pytest.raises(ValueError):
+            with t.span("failing"):
+                raise ValueError("boom")
+    spans = {s["name"]: s for s in t.spans}
+    assert spans["inner"]["parent"] == spans["outer"]["id"]
+    assert spans["outer"]["parent"] is None
+    assert spans["inner"]["counters"] == {"http_requests": 3}
+    assert spans["outer"]["counters"] == {"http_requests": 3}
+    assert spans["inner"]["attrs"] == {"status": 200}
+    assert spans["failing"]["error"] == "ValueError: boom"
+    assert spans["outer"]["wall"] >= spans["inner"]["wall"]
+
+    summary = t.summary()
+    assert summary.splitlines()[0].startswith("span")
+    assert "inner" in summary and "failing" in summary
+
+
+def test_child_process_time_and_chrome_format(tmp_path):
+    t = Tracer()
+    with t.span("child"):
+        subprocess.run([sys.executable, "-c", "sum(range(2_000_000))"], check=True)
+    span = t.spans[0]
+    assert span["children_cpu"] > 0
+
+    t.write(str(tmp_path / "trace.json"), "chrome")
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    assert events[0]["name"] == "child" and events[0]["ph"] == "X"
+    assert events[0]["dur"] > 0 and "children_cpu" in events[0]["args"]
+
+
+def test_cli_trace_flag_writes_trace(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "a.txt").write_text("x")
+    monkeypatch.setattr(tracing, "TRACER", Tracer())
+    trace = tmp_path / "out" / "trace.json"
+    main(["--trace", str(trace), "scan", "--no-index"])
+    names = [s["name"] for s in json.loads(trace.read_text())["spans"]]
+    assert names == ["agent.scan", "cli.scan"]
+    assert "Trace written to" in capsys.readouterr().out
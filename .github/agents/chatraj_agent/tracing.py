@@ -0,0 +1,200 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+def _children_peak_rss_kb() -> int:
+    if resource is None:
+        return 0
+    rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return rss // 1024 if os.uname().sysname == "Darwin" else rss
+
+
+def _children_cpu() -> float:
+    t = os.times()
+    return t.children_user + t.children_system
+
+
+class Tracer:
+    """Collects timing spans for agent operations.
+
+    A span records wall time, this process's CPU time, CPU time of child
+    processes that finished inside it, the peak RSS of those children and the
+    change in named counters (e.g. `http_requests`). Counters are process-wide,
+    so a span also sees work done by other threads while it was open.
+    """
+
+    def __init__(self):
+        self.spans: List[dict] = []
+        self.counters: Counter = Counter()
+        self.origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._next_id = 0
+
+    def count(self, key: str, n: int = 1):
+        with self._lock:
+            self.counters[key] += n
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        with self._lock:
+            self._next_id += 1
+            span_id = self._next_id
+            counters_before = dict(self.counters)
+        rss_before = _children_peak_rss_kb()
+        cpu_before, child_cpu_before = time.process_time(), _children_cpu()
+        start = time.perf_counter()
+        stack.append(span_id)
+        error = None
+        try:
+            yield attrs
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            stack.pop()
+            end = time.perf_counter()
+            rss_after = _children_peak_rss_kb()
+            with self._lock:
+                deltas = {k: v - counters_before.get(k, 0) for k, v in self.counters.items()
+                          if v != counters_before.get(k, 0)}
+                self.spans.append({
+                    "id": span_id, "parent": stack[-1] if stack else None, "name": name,
+                    "thread": threading.get_ident(), "start": round(start - self.origin, 6),
+                    "wall": round(end - start, 6), "cpu": round(time.process_time() - cpu_before, 6),
+                    "children_cpu": round(_children_cpu() - child_cpu_before, 6),
+                    "children_peak_rss_mb": round(rss_after / 1024.0, 1) if rss_after > rss_before else None,
+                    "counters": deltas, "attrs": attrs, "error": error,
+                })
+
+    def to_chrome(self) -> dict:
+        """Chrome trace-event format (load in chrome://tracing or Perfetto)."""
+        events = []
+        for s in self.spans:
+            args = dict(s["attrs"], cpu=s["cpu"], children_cpu=s["children_cpu"], **s["counters"])
+            if s["children_peak_rss_mb"] is not None:
+                args["children_peak_rss_mb"] = s["children_peak_rss_mb"]
+            if s["error"]:
+                args["error"] = s["error"]
+            events.append({"name": s["name"], "ph": "X", "pid": os.getpid(), "tid": s["thread"],
+                           "ts": int(s["start"] * 1e6), "dur": int(s["wall"] * 1e6),
+                           "args": {k: v if isinstance(v, (int, float, str, bool)) or v is None else str(v)
+                                    for k, v in args.items()}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write(self, path: str, fmt: str = "json"):
+        payload = self.to_chrome() if fmt == "chrome" else {"spans": self.spans,
+                                                            "counters": dict(self.counters)}
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(payload, fh, indent=1, default=str)
+
+    def summary(self, limit: int = 20) -> str:
+        """Aggregate spans by name into a table that fits on one screen."""
+        rows: Dict[str, dict] = {}
+        for s in self.spans:
+            r = rows.setdefault(s["name"], {"n": 0, "wall": 0.0, "cpu": 0.0, "child": 0.0,
+                                            "rss": None, "http": 0, "errors": 0})
+            r["n"] += 1
+            r["wall"] += s["wall"]
+            r["cpu"] += s["cpu"]
+            r["child"] += s["children_cpu"]
+            r["http"] += s["counters"].get("http_requests", 0)
+            r["errors"] += 1 if s["error"] else 0
+            if s["children_peak_rss_mb"] is not None:
+                r["rss"] = max(r["rss"] or 0, s["children_peak_rss_mb"])
+        lines = [f"{'span':<36}{'n':>5}{'wall s':>9}{'cpu s':>8}{'child s':>9}{'rss MB':>8}{'http':>6}{'err':>5}"]
+        for name, r in sorted(rows.items(), key=lambda kv: -kv[1]["wall"])[:limit]:
+            rss = f"{r['rss']:.0f}" if r["rss"] is not None else "-"
+            lines.append(f"{name[:35]:<36}{r['n']:>5}{r['wall']:>9.3f}{r['cpu']:>8.3f}{r['child']:>9.3f}"
+                         f"{rss:>8}{r['http']:>6}{r['errors']:>5}")
+        if len(rows) > limit:
+            lines.append(f"... {len(rows) - limit} more span names in the trace file")
+        return "\n".join(lines)
+
+
+TRACER = Tracer()
+# Lets a long-running process (the `serve` daemon) give each request its own tracer
+_active: ContextVar[Optional[Tracer]] = ContextVar("chatraj_tracer", default=None)
+
+
+def current() -> Tracer:
+    return _active.get() or TRACER
+
+
+@contextmanager
+def use(tracer: Tracer):
+    token = _active.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _active.reset(token)
+
+
+def span(name: str, **attrs):
+    return current().span(name, **attrs)
+
+
+def count(key: str, n: int = 1):
+    current().count(key, n)
+
+
+def traced(name: Optional[str] = None):
+    """Decorator wrapping a function call in a span (default name: the qualified name).
+
+    When the function returns a dict, its top-level numbers (file counts,
+    bytes, URLs written, ...) are kept as span attributes.
+    """
+    def decorate(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with current().span(span_name) as attrs:
+                result = func(*args, **kwargs)
+                if isinstance(result, dict):
+                    attrs.update({k: v for k, v in result.items()
+                                  if isinstance(v, (int, float)) and not isinstance(v, bool)})
+                return result
+
+        return wrapper
+
+    return decorate
+
+
+def emit(path: Optional[str] = None, fmt: Optional[str] = None):
+    """Write the trace and print the summary if a path is given or CHATRAJ_TRACE is set."""
+    path = path or os.environ.get("CHATRAJ_TRACE")
+    if not path:
+        return
+    fmt = fmt or os.environ.get("CHATRAJ_TRACE_FORMAT", "json")
+    tracer = current()
+    tracer.write(path, fmt)
+    print(tracer.summary())
+    print(f"Trace written to {path} ({fmt})")
+
+
+def write_profile(profiler, path: str, top: int = 25):
+    import pstats
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    profiler.dump_stats(path)
+    pstats.Stats(path).sort_stats("cumulative").print_stats(top)
+    print(f"Profile written to {path} (inspect with python -m pstats)")
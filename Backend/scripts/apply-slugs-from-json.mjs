@@ -37,7 +37,10 @@ if (!mappingPath) {
 }
 try {
   const raw = fs.readFileSync(mappingPath, 'utf8')
-  const items = JSON.parse(raw)
+  // NDJSON chunks (one mapping per line) are written by the Python agent's auto_pr flow
+  const items = mappingPath.endsWith('.ndjson')
+    ? raw.split('\n').filter(line => line.trim()).map(line => JSON.parse(line))
+    : JSON.parse(raw)
 
   await mongoose.connect(MONGO_URI)
 
@@ -0,0 +1,84 @@
+import mongoose from 'mongoose';
+import User from '../models/user.model.js';
+import Project from '../models/project.model.js';
+import Blog from '../models/blog.model.js';
+import Message from '../models/message.model.js';
+
+// Seeds the fixture used by the Python agent's `loadtest` command and prints
+// it as one JSON line: verified users, projects used as Socket.IO rooms (each
+// user belongs to one), and blogs to fetch by id. Safe to re-run: records are
+// upserted by their loadtest email/name/title. With `--cleanup` it deletes
+// those records and the messages sent to the seeded rooms instead.
+const USERS = Number(process.env.LOADTEST_USERS || 50);
+const PROJECTS = Number(process.env.LOADTEST_PROJECTS || 5);
+const BLOGS = Number(process.env.LOADTEST_BLOGS || 20);
+const PASSWORD = process.env.LOADTEST_PASSWORD || 'LoadTest123!';
+
+const USER_FILTER = { email: /^loadtest-\d+@loadtest\.local$/ };
+const PROJECT_FILTER = { name: /^loadtest-room-\d+$/ };
+const BLOG_FILTER = { title: /^Load test blog \d+$/ };
+
+async function cleanup() {
+  const projects = await Project.find(PROJECT_FILTER, { _id: 1 }).lean();
+  const removed = {
+    messages: (await Message.deleteMany({ conversationId: { $in: projects.map(p => p._id) } })).deletedCount,
+    projects: (await Project.deleteMany(PROJECT_FILTER)).deletedCount,
+    blogs: (await Blog.deleteMany(BLOG_FILTER)).deletedCount,
+    users: (await User.deleteMany(USER_FILTER)).deletedCount
+  };
+  console.log(JSON.stringify(removed));
+}
+
+async function run() {
+  if (!process.env.MONGODB_URI) throw new Error('MONGODB_URI is not set');
+  await mongoose.connect(process.env.MONGODB_URI, { serverSelectionTimeoutMS: 10000 });
+  if (process.argv.includes('--cleanup')) {
+    await cleanup();
+    await mongoose.connection.close();
+    return;
+  }
+
+  const hashed = await User.hashPassword(PASSWORD);
+  const users = [];
+  for (let i = 0; i < USERS; i++) {
+    const email = `loadtest-${i}@loadtest.local`;
+    const user = await User.findOneAndUpdate(
+      { email },
+      { firstName: 'Load', lastName: `Tester${i}`, email, password: hashed, googleApiKey: 'loadtest-google-key', isVerified: true },
+      { upsert: true, new: true, setDefaultsOnInsert: true }
+    );
+    users.push({ id: user._id.toString(), email });
+  }
+
+  const projects = [];
+  for (let p = 0; p < PROJECTS; p++) {
+    const members = users.filter((_, i) => i % PROJECTS === p).map(u => u.id);
+    const project = await Project.findOneAndUpdate(
+      { name: `loadtest-room-${p}` },
+      { name: `loadtest-room-${p}`, category: 'loadtest', users: members },
+      { upsert: true, new: true, setDefaultsOnInsert: true }
+    );
+    projects.push(project._id.toString());
+  }
+  users.forEach((u, i) => { u.project = projects[i % PROJECTS]; });
+
+  const blogs = [];
+  for (let b = 0; b < BLOGS; b++) {
+    const title = `Load test blog ${b}`;
+    const blog = await Blog.findOneAndUpdate(
+      { title },
+      { title, content: `Load test content ${b} `.repeat(50), author: users[0].id },
+      { upsert: true, new: true, setDefaultsOnInsert: true }
+    );
+    blogs.push(blog._id.toString());
+  }
+
+  console.log(JSON.stringify({ password: PASSWORD, users, projects, blogs }));
+  await mongoose.connection.close();
+}
+
+run().catch(async (err) => {
+  console.error('Failed to seed load test data:', err && (err.stack || err.message || err));
+  await mongoose.connection.close().catch(() => {});
+  process.exit(1);
+});
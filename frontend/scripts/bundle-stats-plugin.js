@@ -0,0 +1,61 @@
+import fs from 'fs';
+import path from 'path';
+import zlib from 'zlib';
+
+// Vite plugin behind the Python agent's `bundle-report` command. When
+// VITE_BUNDLE_STATS names a file, it records every emitted chunk and asset
+// with its raw, gzip and brotli size, and every module rendered into each
+// chunk (sizes of the module's rendered code compressed on its own).
+const sizes = (code) => {
+  const buf = Buffer.isBuffer(code) ? code : Buffer.from(code ?? '');
+  return {
+    raw: buf.length,
+    gzip: zlib.gzipSync(buf, { level: 9 }).length,
+    brotli: zlib.brotliCompressSync(buf, {
+      params: { [zlib.constants.BROTLI_PARAM_QUALITY]: zlib.constants.BROTLI_MAX_QUALITY }
+    }).length
+  };
+};
+
+export default function bundleStatsPlugin(outFile = process.env.VITE_BUNDLE_STATS) {
+  let root = process.cwd();
+  const relative = (id) => {
+    const clean = id.replace(/^\0/, '').split('?')[0];
+    return path.isAbsolute(clean) ? path.relative(root, clean).split(path.sep).join('/') : clean;
+  };
+  return {
+    name: 'chatraj-bundle-stats',
+    apply: 'build',
+    configResolved(config) {
+      root = config.root;
+    },
+    generateBundle(_options, bundle) {
+      if (!outFile) return;
+      const chunks = [];
+      const assets = [];
+      for (const item of Object.values(bundle)) {
+        if (item.type === 'chunk') {
+          chunks.push({
+            file: item.fileName,
+            name: item.name,
+            isEntry: item.isEntry,
+            isDynamicEntry: item.isDynamicEntry,
+            facade: item.facadeModuleId ? relative(item.facadeModuleId) : null,
+            imports: item.imports,
+            dynamicImports: item.dynamicImports,
+            css: [...(item.viteMetadata?.importedCss ?? [])],
+            ...sizes(item.code),
+            modules: Object.entries(item.modules).map(([id, mod]) => ({
+              id: relative(id),
+              ...(mod.code != null ? sizes(mod.code) : { raw: mod.renderedLength, gzip: null, brotli: null })
+            }))
+          });
+        } else {
+          assets.push({ file: item.fileName, name: item.names?.[0] ?? item.name ?? null, ...sizes(item.source) });
+        }
+      }
+      fs.mkdirSync(path.dirname(path.resolve(outFile)), { recursive: true });
+      fs.writeFileSync(outFile, JSON.stringify({ root, chunks, assets }));
+    }
+  };
+}
@@ -1,6 +1,7 @@
 
 import { defineConfig } from 'vite'
 import react from '@vitejs/plugin-react'
+import bundleStatsPlugin from './scripts/bundle-stats-plugin.js'
 
 // Plugin to mock CSS imports as empty objects in test
 function mockCssPlugin() {
@@ -26,6 +27,8 @@ export default defineConfig({
     react(),
     // Only use the CSS mock plugin in test mode
     process.env.NODE_ENV === 'test' && mockCssPlugin(),
+    // Chunk/module size stats for the agent's `bundle-report` command
+    process.env.VITE_BUNDLE_STATS && bundleStatsPlugin(process.env.VITE_BUNDLE_STATS),
   ].filter(Boolean),
   server: {
     // Do not hardcode 'localhost' to preserve WSL/container/remote-dev workflows.